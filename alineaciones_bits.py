@@ -0,0 +1,48 @@
+# Índice de jugadores vacío: posición de bit de cada jugador de la temporada, por orden de aparición.
+def indice_jugadores():
+    return {}
+
+# Bit de un jugador en el índice (si es nuevo se le asigna el siguiente).
+def bit_jugador(indice, nombre):
+    posicion = indice.get(nombre)
+    if posicion is None:
+        posicion = indice[nombre] = len(indice)
+    return 1 << posicion
+
+# Conjunto de bits con los jugadores de una lista de nombres.
+def mascara_nombres(indice, nombres):
+    mascara = 0
+    for nombre in nombres:
+        mascara |= bit_jugador(indice, nombre)
+    return mascara
+
+# Conjunto de bits con los jugadores de una alineación de la API.
+def mascara_alineacion(indice, alineacion):
+    return mascara_nombres(indice, (player['name'] for player in alineacion))
+
+# Indica si un jugador está en un conjunto de bits (sin añadirlo al índice).
+def contiene(indice, mascara, nombre):
+    posicion = indice.get(nombre)
+    return posicion is not None and bool(mascara >> posicion & 1)
+
+# Jugadores compartidos por cada par de equipos de una ronda (matriz simétrica, ordenada por nombre de equipo).
+def coincidencias_ronda(mascaras):
+    equipos = sorted(mascaras)
+    return {
+        "equipos": equipos,
+        "matriz": [[(mascaras[a] & mascaras[b]).bit_count() if a != b else 0 for b in equipos] for a in equipos],
+    }
+
+# Suma las coincidencias de varias rondas por nombre de equipo: total de jugadores compartidos y jornadas en que coincidieron.
+def coincidencias_temporada(coincidencias_por_ronda):
+    totales = {}
+    for coincidencias in coincidencias_por_ronda:
+        equipos = coincidencias["equipos"]
+        for i, a in enumerate(equipos):
+            for j in range(i + 1, len(equipos)):
+                compartidos = coincidencias["matriz"][i][j]
+                if compartidos:
+                    par = totales.setdefault((a, equipos[j]), [0, 0])
+                    par[0] += compartidos
+                    par[1] += 1
+    return totales
@@ -0,0 +1,212 @@
+from collections import Counter
+import gzip
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+from urllib.parse import unquote, urlsplit
+
+from recursos_estaticos import huella
+
+# Segundos entre dos comprobaciones de si una ejecución ha cambiado los datos en caché.
+INTERVALO_RECARGA = 2.0
+# Por debajo de este tamaño la respuesta se envía sin comprimir aunque el cliente acepte gzip.
+TAMANO_MINIMO_GZIP = 1024
+
+# Cuadrícula de capitanes de una división: jornadas en orden y, por equipo, su capitán en cada una (None si no lo tuvo).
+def _cuadricula_capitanes(capitanes):
+    rondas = sorted(capitanes)
+    por_equipo = {}
+    for i, ronda in enumerate(rondas):
+        for entrada in capitanes[ronda]:
+            por_equipo.setdefault(entrada['team_name'], [None] * len(rondas))[i] = entrada['capitan']
+    return {"rondas": rondas, "equipos": dict(sorted(por_equipo.items()))}
+
+# Todo lo que la API sabe de un equipo: posición, multas (acumuladas y por jornada), sanciones, alineaciones indebidas y capitanes.
+def _ficha_equipo(datos, equipo, posicion, cuadricula):
+    return {
+        "equipo": equipo,
+        "posicion": posicion,
+        "clasificacion": datos["clasificacion"][posicion - 1] if posicion else None,
+        "multa_total": round(datos["totales"].get(equipo, 0.0), 2),
+        "multas": {str(j['numero']): j['multas'][equipo] for j in datos["jornadas"] if equipo in j['multas']},
+        "sanciones": datos["sanciones"].get(equipo, {}),
+        "violaciones": datos["violaciones"].get(equipo, []),
+        "capitanes": dict(zip(map(str, cuadricula["rondas"]), cuadricula["equipos"].get(equipo, []))),
+    }
+
+# Objetos que sirve la API, por ruta, a partir del estado de la temporada ({división: {clasificacion, totales, jornadas,
+# sanciones, violaciones, capitanes, ultima_ronda}}). Las rutas se guardan sin escapar, como quedan tras decodificar la URL.
+def rutas_api(estado, generado):
+    rutas = {}
+    indice = {"generado": generado, "divisiones": {}}
+    for division, datos in estado.items():
+        base = f"/api/{division}"
+        posiciones = {equipo['name']: i for i, equipo in enumerate(datos["clasificacion"], 1)}
+        cuadricula = _cuadricula_capitanes(datos["capitanes"])
+        equipos = sorted(set(posiciones) | set(datos["totales"]) | set(datos["sanciones"]) | set(datos["violaciones"]))
+        rondas = [j['numero'] for j in datos["jornadas"]]
+
+        rutas[f"{base}/clasificacion"] = datos["clasificacion"]
+        rutas[f"{base}/multas"] = {
+            "multas_acumuladas": dict(sorted(datos["totales"].items(), key=lambda x: (-x[1], x[0]))),
+            "jornadas": rondas,
+        }
+        for jornada in datos["jornadas"]:
+            rutas[f"{base}/multas/{jornada['numero']}"] = jornada['multas']
+        rutas[f"{base}/sanciones"] = {"sanciones": datos["sanciones"], "violaciones": datos["violaciones"]}
+        rutas[f"{base}/capitanes"] = cuadricula
+        rutas[f"{base}/equipos"] = equipos
+        for equipo in equipos:
+            rutas[f"{base}/equipos/{equipo}"] = _ficha_equipo(datos, equipo, posiciones.get(equipo), cuadricula)
+        indice["divisiones"][division] = {"ultima_ronda": datos["ultima_ronda"], "jornadas": rondas, "equipos": len(equipos)}
+    rutas["/api"] = indice
+    return rutas
+
+# Serializa cada objeto una sola vez, con su ETag (huella del contenido) y su variante gzip: cada petición solo copia bytes.
+# La variante gzip lleva su propio ETag (con sufijo "-gz"): son representaciones distintas y una caché no debe confundirlas.
+def preparar_respuestas(rutas):
+    respuestas = {}
+    for ruta, objeto in rutas.items():
+        cuerpo = json.dumps(objeto, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+        comprimido = gzip.compress(cuerpo, compresslevel=6, mtime=0) if len(cuerpo) >= TAMANO_MINIMO_GZIP else None
+        etiqueta = huella(cuerpo)
+        respuestas[ruta] = {
+            "cuerpo": cuerpo,
+            "gzip": comprimido,
+            "etag": f'"{etiqueta}"',
+            "etag_gzip": f'"{etiqueta}-gz"' if comprimido is not None else None,
+        }
+    return respuestas
+
+# Carga el estado con cargar() y prepara todas las respuestas. La firma se toma antes y después de cargar: si una ejecución
+# estaba escribiendo la caché a la vez, la carga se descarta (devuelve None) y se reintenta en la siguiente comprobación.
+def construir_estado_api(cargar, firmar):
+    firma = firmar()
+    rutas = rutas_api(cargar(), time.strftime("%Y-%m-%dT%H:%M:%S"))
+    if firmar() != firma:
+        return None
+    return {"firma": firma, "respuestas": preparar_respuestas(rutas)}
+
+# Indica si la cabecera If-None-Match de una petición incluye el ETag de la respuesta (o es "*").
+def coincide_etag(if_none_match, etag):
+    if not if_none_match:
+        return False
+    etiquetas = [e.strip().removeprefix('W/') for e in if_none_match.split(',')]
+    return '*' in etiquetas or etag in etiquetas
+
+# Indica si la cabecera Accept-Encoding admite gzip, respetando los valores q ("gzip;q=0" lo rechaza) y el comodín "*".
+def acepta_gzip(accept_encoding):
+    calidades = {}
+    for elemento in (accept_encoding or '').split(','):
+        codificacion, *parametros = [parte.strip() for parte in elemento.split(';')]
+        if not codificacion:
+            continue
+        calidad = 1.0
+        for parametro in parametros:
+            clave, _, valor = parametro.partition('=')
+            if clave.strip().lower() == 'q':
+                try:
+                    calidad = float(valor)
+                except ValueError:
+                    calidad = 0.0
+        calidades[codificacion.lower()] = calidad
+    for codificacion in ('gzip', 'x-gzip', '*'):
+        if codificacion in calidades:
+            return calidades[codificacion] > 0
+    return False
+
+# Crea la clase manejadora HTTP de la API. Lee el estado vigente de contenedor["estado"] una vez por petición,
+# de modo que una recarga (que sustituye esa referencia) nunca sirve una mezcla de datos viejos y nuevos.
+def crear_manejador_api(contenedor):
+    class ManejadorApi(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Cabeceras y cuerpo salen en escrituras separadas: sin TCP_NODELAY, Nagle y el ACK retardado del cliente añaden ~40 ms por respuesta.
+        disable_nagle_algorithm = True
+
+        def _enviar(self, codigo, cuerpo, cabeceras, con_cuerpo=True):
+            self.send_response(codigo)
+            for clave, valor in cabeceras.items():
+                self.send_header(clave, valor)
+            self.send_header('Content-Length', str(len(cuerpo)))
+            self.end_headers()
+            if con_cuerpo:
+                self.wfile.write(cuerpo)
+
+        def _atender(self, con_cuerpo=True):
+            estado = contenedor["estado"]
+            contador = contenedor["contadores"]
+            ruta = unquote(urlsplit(self.path).path).rstrip('/') or '/'
+            respuesta = estado["respuestas"].get(ruta)
+            if respuesta is None:
+                contador["404"] += 1
+                cuerpo = json.dumps({"error": f"Ruta no encontrada: {ruta}"}, ensure_ascii=False).encode('utf-8')
+                self._enviar(404, cuerpo, {'Content-Type': 'application/json; charset=utf-8'}, con_cuerpo)
+                return
+
+            # La codificación se elige antes de validar: el ETag que se compara es el de la representación que se serviría.
+            comprimir = respuesta["gzip"] is not None and acepta_gzip(self.headers.get('Accept-Encoding'))
+            etag = respuesta["etag_gzip"] if comprimir else respuesta["etag"]
+            cabeceras = {'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+            if coincide_etag(self.headers.get('If-None-Match'), etag):
+                contador["304"] += 1
+                self._enviar(304, b"", cabeceras, False)
+                return
+            contador["200"] += 1
+            cabeceras['Content-Type'] = 'application/json; charset=utf-8'
+            cuerpo = respuesta["cuerpo"]
+            if comprimir:
+                cuerpo = respuesta["gzip"]
+                cabeceras['Content-Encoding'] = 'gzip'
+            self._enviar(200, cuerpo, cabeceras, con_cuerpo)
+
+        def do_GET(self):
+            self._atender()
+
+        def do_HEAD(self):
+            self._atender(con_cuerpo=False)
+
+        def _no_permitido(self):
+            # El cuerpo de la petición no se lee: la conexión se cierra para no confundirlo con la siguiente petición.
+            self.close_connection = True
+            self._enviar(405, b'{"error":"API de solo lectura."}', {'Content-Type': 'application/json', 'Allow': 'GET, HEAD'})
+
+        do_POST = do_PUT = do_PATCH = do_DELETE = _no_permitido
+
+        def log_message(self, format, *args):
+            pass
+
+    return ManejadorApi
+
+# Comprueba periódicamente la firma de los datos y, cuando una ejecución los ha cambiado y la firma lleva un intervalo
+# sin moverse (la ejecución ha terminado de escribir), reconstruye el estado y lo sustituye de una vez.
+def _vigilar_recargas(contenedor, cargar, firmar, intervalo, parar):
+    vista = contenedor["estado"]["firma"]
+    while not parar.wait(intervalo):
+        try:
+            firma = firmar()
+            if firma == contenedor["estado"]["firma"] or firma != vista:
+                vista = firma
+                continue
+            nuevo = construir_estado_api(cargar, firmar)
+        except Exception as e:
+            print(f"Error al recargar los datos de la API: {e}")
+            continue
+        if nuevo is not None:
+            contenedor["estado"] = nuevo
+            contenedor["recargas"] += 1
+            print(f"Datos de la API recargados ({len(nuevo['respuestas'])} rutas).")
+
+# Arranca en segundo plano la API local de solo lectura y su vigilante de recargas. Devuelve (servidor, contenedor, URL base);
+# servidor.shutdown() la detiene y contenedor["parar"].set() detiene el vigilante.
+def iniciar_api_local(cargar, firmar, host="127.0.0.1", puerto=0, intervalo=INTERVALO_RECARGA):
+    estado = construir_estado_api(cargar, firmar)
+    while estado is None:
+        time.sleep(intervalo)
+        estado = construir_estado_api(cargar, firmar)
+    contenedor = {"estado": estado, "recargas": 0, "contadores": Counter(), "parar": threading.Event()}
+    servidor = ThreadingHTTPServer((host, puerto), crear_manejador_api(contenedor))
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    threading.Thread(target=_vigilar_recargas, args=(contenedor, cargar, firmar, intervalo, contenedor["parar"]), daemon=True).start()
+    return servidor, contenedor, f"http://{host}:{servidor.server_address[1]}"
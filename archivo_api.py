@@ -0,0 +1,139 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import zlib
+
+from configuracion import ARCHIVO_API_DIR
+from persistencia import cargar_json, escribir_atomico, guardar_json
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Índice en memoria {endpoint?query: huella}, cargado la primera vez que se usa y guardado con guardar_indice_archivo().
+_indice = None
+_indice_modificado = False
+_contadores = {"nuevas": 0, "duplicadas": 0}
+# Las alineaciones se descargan en paralelo: el índice y los contadores se actualizan de uno en uno.
+_bloqueo = threading.Lock()
+
+# Ruta del índice del archivo de respuestas.
+def _ruta_indice():
+    return os.path.join(ARCHIVO_API_DIR, "indice.json")
+
+# Ruta de un objeto del archivo a partir de su huella (repartido en subdirectorios por los dos primeros caracteres).
+def _ruta_objeto(huella, extension):
+    return os.path.join(ARCHIVO_API_DIR, "objetos", huella[:2], huella + extension)
+
+# Clave del índice para una petición: endpoint y consulta, sin la cabecera (que lleva el token de sesión).
+def clave_peticion(url, payload):
+    query = (payload or {}).get('query', {})
+    return f"{url}?{json.dumps(query, sort_keys=True, ensure_ascii=False, separators=(',', ':'))}"
+
+def _cargar_indice():
+    global _indice
+    if _indice is None:
+        _indice = cargar_json(_ruta_indice(), {})
+    return _indice
+
+# Busca el objeto de una huella con cualquiera de las compresiones admitidas.
+def _buscar_objeto(huella):
+    for extension in ('.zst', '.gz'):
+        ruta = _ruta_objeto(huella, extension)
+        if os.path.exists(ruta):
+            return ruta
+    return None
+
+# Comprime con zstd si está instalado y, si no, con gzip (sin fecha, para que el resultado sea determinista).
+def _comprimir(contenido):
+    if zstandard:
+        return '.zst', zstandard.ZstdCompressor(level=10).compress(contenido)
+    return '.gz', gzip.compress(contenido, compresslevel=9, mtime=0)
+
+def _descomprimir(ruta):
+    with open(ruta, 'rb') as f:
+        comprimido = f.read()
+    if ruta.endswith('.zst'):
+        if not zstandard:
+            raise RuntimeError(f"'{ruta}' está comprimido con zstd y el paquete 'zstandard' no está instalado.")
+        return zstandard.ZstdDecompressor().decompress(comprimido)
+    return gzip.decompress(comprimido)
+
+# Guarda un objeto comprimido en el archivo (si no estaba ya) y lo indexa por endpoint y consulta.
+def _guardar_objeto(url, payload, huella, extension, comprimido):
+    global _indice_modificado
+    with _bloqueo:
+        if _buscar_objeto(huella) is None:
+            escribir_atomico(comprimido, _ruta_objeto(huella, extension))
+            _contadores["nuevas"] += 1
+        else:
+            _contadores["duplicadas"] += 1
+
+        indice = _cargar_indice()
+        clave = clave_peticion(url, payload)
+        if indice.get(clave) != huella:
+            indice[clave] = huella
+            _indice_modificado = True
+    return huella
+
+# Guarda el cuerpo crudo (bytes) de una respuesta de la API en el archivo (una sola copia por contenido) y lo indexa por endpoint
+# y consulta. La huella es siempre la de los bytes tal como llegan, igual que en archivador_respuesta, para que una misma
+# respuesta tenga la misma dirección se descargue entera o por trozos.
+def archivar_respuesta(url, payload, contenido):
+    extension, comprimido = _comprimir(contenido)
+    return _guardar_objeto(url, payload, hashlib.sha256(contenido).hexdigest(), extension, comprimido)
+
+# Archiva el cuerpo crudo de una respuesta a medida que se lee: devuelve (enviar, terminar), que calculan la huella
+# y comprimen trozo a trozo, para poder archivar respuestas que no se decodifican enteras.
+def archivador_respuesta(url, payload):
+    huella = hashlib.sha256()
+    if zstandard:
+        extension, compresor = '.zst', zstandard.ZstdCompressor(level=10).compressobj()
+    else:
+        # wbits=31: formato gzip, con fecha 0 en la cabecera para que el resultado sea determinista.
+        extension, compresor = '.gz', zlib.compressobj(9, zlib.DEFLATED, 31)
+    comprimidos = []
+
+    def enviar(trozo):
+        huella.update(trozo)
+        comprimidos.append(compresor.compress(trozo))
+
+    def terminar():
+        comprimidos.append(compresor.flush())
+        return _guardar_objeto(url, payload, huella.hexdigest(), extension, b"".join(comprimidos))
+    return enviar, terminar
+
+# Devuelve la última respuesta archivada para una petición, o None si no está en el archivo.
+# Con 'campos', se decodifica conservando solo esas claves (ver campos_api).
+def leer_respuesta_archivada(url, payload, campos=None):
+    huella = _cargar_indice().get(clave_peticion(url, payload))
+    ruta = _buscar_objeto(huella) if huella else None
+    if ruta is None:
+        return None
+    if campos is not None:
+        from campos_api import decodificar_proyectado
+        return decodificar_proyectado(_descomprimir(ruta), campos)
+    return json.loads(_descomprimir(ruta))
+
+# Claves del índice del archivo ({endpoint}?{consulta}), p. ej. para servir las respuestas desde un simulador.
+def claves_archivadas():
+    return list(_cargar_indice())
+
+# Cuerpo JSON crudo (sin comprimir) archivado para una clave del índice, o None si no está.
+def cuerpo_archivado(clave):
+    huella = _cargar_indice().get(clave)
+    ruta = _buscar_objeto(huella) if huella else None
+    return _descomprimir(ruta) if ruta else None
+
+# Guarda el índice si ha cambiado y muestra cuántas respuestas se han añadido o ya estaban archivadas.
+def guardar_indice_archivo():
+    global _indice_modificado
+    if _indice_modificado:
+        guardar_json(_indice, _ruta_indice())
+        _indice_modificado = False
+    if _contadores["nuevas"] or _contadores["duplicadas"]:
+        print(f"Archivo de respuestas: {_contadores['nuevas']} nuevas, {_contadores['duplicadas']} ya archivadas.")
+        _contadores["nuevas"] = _contadores["duplicadas"] = 0
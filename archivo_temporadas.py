@@ -0,0 +1,168 @@
+import glob
+from itertools import groupby
+import os
+import shutil
+import zipfile
+
+import numpy as np
+
+from clasificacion import puntos_ronda
+from configuracion import ARCHIVO_TEMPORADAS_DIR, CACHE_DIR
+from persistencia import escribir_atomico_con
+
+# Índice de jugador de las jornadas en las que un equipo no tiene capitán.
+SIN_CAPITAN = -1
+# Puntos de liga de las jornadas que un equipo no ha disputado.
+SIN_JORNADA = -1
+
+# Ruta de la instantánea comprimida de fin de temporada de una división.
+def ruta_instantanea(temporada, division):
+    return os.path.join(ARCHIVO_TEMPORADAS_DIR, temporada, f"{division}.npz")
+
+# Instantáneas archivadas, ordenadas por temporada y división: [(temporada, división, ruta)].
+def instantaneas_archivadas():
+    rutas = sorted(glob.glob(os.path.join(ARCHIVO_TEMPORADAS_DIR, "*", "*.npz")))
+    return [(os.path.basename(os.path.dirname(ruta)), os.path.basename(ruta)[:-4], ruta) for ruta in rutas]
+
+# Construye los arrays de fin de temporada de una división a partir de un flujo de rondas (numero, ronda) en orden de calendario
+# y de las multas por jornada ({numero: {equipo: multas}}, con las alineaciones indebidas ya integradas).
+# Equipos, jugadores y conceptos son arrays de texto de ancho fijo; el resto, matrices equipos × jornadas (× conceptos).
+def construir_instantanea(rondas, multas_por_jornada, name_map, conceptos):
+    numeros, puntos_por_ronda, capitanes_por_ronda = [], [], []
+    jugadores = set()
+    for numero, ronda in rondas:
+        numeros.append(numero)
+        puntos_por_ronda.append(puntos_ronda(ronda, name_map))
+        capitanes = {}
+        for team_info in ronda['datos'].get('answer', {}).get('ranking', []):
+            lineup = ronda['alineaciones'].get(team_info['_id'], [])
+            jugadores.update(p['name'] for p in lineup)
+            capitan = next((p['name'] for p in lineup if p.get('cpt')), None)
+            if capitan:
+                capitanes[name_map.get(team_info['name'], team_info['name'])] = capitan
+        capitanes_por_ronda.append(capitanes)
+
+    equipos = sorted(set().union(*puntos_por_ronda, *capitanes_por_ronda, *(multas_por_jornada.get(n, {}) for n in numeros)))
+    indice_equipo = {nombre: i for i, nombre in enumerate(equipos)}
+    jugadores = sorted(jugadores)
+    indice_jugador = {nombre: i for i, nombre in enumerate(jugadores)}
+    indice_concepto = {concepto: i for i, concepto in enumerate(conceptos)}
+
+    forma = (len(equipos), len(numeros))
+    puntos = np.full(forma, np.nan, dtype=np.float32)
+    puntos_liga = np.full(forma, SIN_JORNADA, dtype=np.int8)
+    capitanes = np.full(forma, SIN_CAPITAN, dtype=np.int32)
+    multas = np.zeros(forma, dtype=np.float32)
+    multas_conceptos = np.zeros(forma + (len(conceptos),), dtype=np.float32)
+    for j, numero in enumerate(numeros):
+        for nombre, (liga, generales) in puntos_por_ronda[j].items():
+            puntos[indice_equipo[nombre], j] = generales
+            puntos_liga[indice_equipo[nombre], j] = liga
+        for nombre, capitan in capitanes_por_ronda[j].items():
+            capitanes[indice_equipo[nombre], j] = indice_jugador[capitan]
+        for nombre, datos in multas_por_jornada.get(numero, {}).items():
+            multas[indice_equipo[nombre], j] = datos.get('multa_total', 0.0)
+            for concepto, detalle in datos.get('desglose', {}).items():
+                if concepto in indice_concepto:
+                    multas_conceptos[indice_equipo[nombre], j, indice_concepto[concepto]] = detalle.get('multa', 0.0)
+
+    return {
+        "equipos": np.array(equipos, dtype=str),
+        "jugadores": np.array(jugadores, dtype=str),
+        "conceptos": np.array(conceptos, dtype=str),
+        "rondas": np.array(numeros, dtype=np.float32),
+        "puntos": puntos,
+        "puntos_liga": puntos_liga,
+        "capitanes": capitanes,
+        "multas": multas,
+        "multas_conceptos": multas_conceptos,
+    }
+
+# Guarda los arrays de una instantánea comprimidos en un .npz, de forma atómica.
+def guardar_instantanea(arrays, ruta):
+    escribir_atomico_con(lambda f: np.savez_compressed(f, **arrays), ruta)
+
+# Abre una instantánea con sus arrays mapeados en memoria: la primera vez (o si el .npz ha cambiado) se descomprimen a .npy
+# en la caché; después solo se mapean, y cada consulta lee de disco únicamente las filas y columnas que recorre.
+def abrir_instantanea(ruta):
+    destino = os.path.join(CACHE_DIR, "temporadas", os.path.relpath(ruta, ARCHIVO_TEMPORADAS_DIR)[:-4])
+    ruta_firma = os.path.join(destino, "origen.txt")
+    estado = os.stat(ruta)
+    firma = f"{estado.st_size}:{estado.st_mtime_ns}"
+    firma_previa = None
+    if os.path.exists(ruta_firma):
+        with open(ruta_firma, 'r', encoding='utf-8') as f:
+            firma_previa = f.read()
+    if firma_previa != firma:
+        if os.path.isdir(destino):
+            shutil.rmtree(destino)
+        os.makedirs(destino)
+        with zipfile.ZipFile(ruta) as archivo:
+            for nombre in archivo.namelist():
+                with archivo.open(nombre) as origen, open(os.path.join(destino, nombre), 'wb') as f:
+                    shutil.copyfileobj(origen, f)
+        with open(ruta_firma, 'w', encoding='utf-8') as f:
+            f.write(firma)
+    return {nombre[:-4]: np.load(os.path.join(destino, nombre), mmap_mode='r') for nombre in sorted(os.listdir(destino)) if nombre.endswith('.npy')}
+
+# Abre todas las instantáneas archivadas: [(temporada, división, arrays)].
+def abrir_archivo_temporadas():
+    return [(temporada, division, abrir_instantanea(ruta)) for temporada, division, ruta in instantaneas_archivadas()]
+
+# Equipos con más multas sumando todas las temporadas: [(equipo, total, {temporada: total})], de más a menos multado.
+def equipos_mas_multados(instantaneas, n=10):
+    totales = {}
+    for temporada, _, arrays in instantaneas:
+        por_equipo = np.asarray(arrays["multas"]).sum(axis=1, dtype=np.float64)
+        for equipo, total in zip(arrays["equipos"].tolist(), por_equipo.tolist()):
+            por_temporada = totales.setdefault(equipo, {})
+            por_temporada[temporada] = round(por_temporada.get(temporada, 0.0) + total, 2)
+    ranking = [(equipo, round(sum(por_temporada.values()), 2), por_temporada) for equipo, por_temporada in totales.items()]
+    return sorted(ranking, key=lambda x: (-x[1], x[0]))[:n]
+
+# Rachas de un mismo capitán en jornadas consecutivas de un equipo dentro de una instantánea: [(equipo, jugador, inicio, fin)] con
+# inicio y fin como posiciones de jornada. Se calculan por equipo sobre la fila de capitanes, sin recorrer jornada a jornada.
+def _rachas_instantanea(arrays):
+    capitanes = np.asarray(arrays["capitanes"])
+    equipos = arrays["equipos"].tolist()
+    jugadores = arrays["jugadores"]
+    rachas = []
+    for i, fila in enumerate(capitanes):
+        if not len(fila):
+            continue
+        inicios = np.flatnonzero(np.r_[True, fila[1:] != fila[:-1]])
+        fines = np.r_[inicios[1:], len(fila)] - 1
+        for inicio, fin in zip(inicios.tolist(), fines.tolist()):
+            if fila[inicio] != SIN_CAPITAN:
+                rachas.append((equipos[i], str(jugadores[fila[inicio]]), inicio, fin))
+    return rachas
+
+# Rachas de capitanía más largas de todas las temporadas: una racha que llega a la última jornada de una temporada continúa en la
+# siguiente si el equipo empieza con el mismo capitán. Devuelve [{equipo, jugador, jornadas, desde, hasta}] con desde/hasta (temporada, jornada).
+def rachas_capitania(instantaneas, n=10):
+    terminadas = []
+    abiertas = {}
+    for temporada, grupo in groupby(instantaneas, key=lambda x: x[0]):
+        siguientes = {}
+        for _, _, arrays in grupo:
+            rondas = arrays["rondas"].tolist()
+            for equipo, jugador, inicio, fin in _rachas_instantanea(arrays):
+                racha = {"equipo": equipo, "jugador": jugador, "jornadas": fin - inicio + 1,
+                         "desde": (temporada, _numero_ronda(rondas[inicio])), "hasta": (temporada, _numero_ronda(rondas[fin]))}
+                previa = abiertas.pop(equipo, None)
+                if previa and inicio == 0 and previa["jugador"] == jugador:
+                    racha["jornadas"] += previa["jornadas"]
+                    racha["desde"] = previa["desde"]
+                elif previa:
+                    terminadas.append(previa)
+                if fin == len(rondas) - 1:
+                    siguientes[equipo] = racha
+                else:
+                    terminadas.append(racha)
+        terminadas.extend(abiertas.values())
+        abiertas = siguientes
+    terminadas.extend(abiertas.values())
+    return sorted(terminadas, key=lambda r: (-r["jornadas"], r["equipo"], r["desde"]))[:n]
+
+def _numero_ronda(valor):
+    return int(valor) if float(valor).is_integer() else round(valor, 2)
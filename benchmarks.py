@@ -0,0 +1,586 @@
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+DIRECTORIO_REPO = os.path.dirname(os.path.abspath(__file__))
+
+# Módulos que carga cada modo de ejecución. 'monolitico' reproduce las importaciones del antiguo script único.
+IMPORTACIONES_POR_MODO = {
+    "monolitico": ["requests", "openpyxl", "msal", "pyperclip", "webbrowser", "smtplib", "email.mime.multipart", "dotenv"],
+    "email": ["fuentmondo", "correo"],
+    "html": ["fuentmondo", "futmondo_api", "multas", "informe_html", "requests"],
+    "excel_local": ["fuentmondo", "futmondo_api", "multas", "informe_html", "requests", "hoja_excel", "openpyxl"],
+}
+
+# Mide en un proceso nuevo el tiempo que tarda en importarse una lista de módulos.
+def _medir_importacion(modulos):
+    codigo = (
+        "import time; t = time.perf_counter()\n"
+        + "".join(f"import {m}\n" for m in modulos)
+        + "print(time.perf_counter() - t)"
+    )
+    resultado = subprocess.run([sys.executable, "-c", codigo], cwd=DIRECTORIO_REPO, capture_output=True, text=True, check=True)
+    return float(resultado.stdout.strip().splitlines()[-1])
+
+# Compara el tiempo de importación de cada modo de ejecución frente al script monolítico.
+def bench_importacion(repeticiones=7):
+    print(f"\n--- BENCHMARK DE IMPORTACIÓN ({repeticiones} repeticiones, mediana) ---")
+    resultados = {}
+    for modo, modulos in IMPORTACIONES_POR_MODO.items():
+        try:
+            tiempos = [_medir_importacion(modulos) for _ in range(repeticiones)]
+        except subprocess.CalledProcessError as e:
+            print(f"{modo:<12} no disponible: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        resultados[modo] = statistics.median(tiempos)
+    base = resultados.get("monolitico")
+    for modo, tiempo in resultados.items():
+        relativo = f" ({tiempo / base:.0%} del monolítico)" if base and modo != "monolitico" else ""
+        print(f"{modo:<12} {tiempo * 1000:8.1f} ms{relativo}")
+    return resultados
+
+# Genera un estado de temporada completa sintético ({nombre de archivo: datos}) con la forma de la caché de etapas.
+def _estado_temporada_sintetico(jornadas=38, equipos=20, semilla=0):
+    rnd = random.Random(semilla)
+    jugadores = [f"Jugador {n}" for n in range(300)]
+    nombres = [f"Equipo {n}" for n in range(equipos)]
+    estado = {}
+    for jornada in range(1, jornadas + 1):
+        ranking = [{"_id": f"t{n}", "name": nombre, "points": rnd.randint(20, 90)} for n, nombre in enumerate(nombres)]
+        alineaciones = {
+            f"t{n}": [{"name": j, "points": rnd.randint(-2, 15), "cpt": i == 0, "role": "def"} for i, j in enumerate(rnd.sample(jugadores, 11))]
+            for n in range(equipos)
+        }
+        estado[f"ronda_{jornada}.json"] = {"id": f"r{jornada}", "datos": {"answer": {"ranking": ranking}}, "alineaciones": alineaciones}
+    estado["multas.json"] = {
+        str(jornada): {nombre: {"multa_total": round(rnd.random() * 5, 2), "desglose": {"jugadores_repetidos": 0.5}} for nombre in nombres}
+        for jornada in range(1, jornadas + 1)
+    }
+    estado["sanciones.json"] = {"primera": {nombre: {jugadores[n]: {"captain_count": 3, "sanctions": [{"round": 3, "games_to_serve": 3}]} for n in range(5)} for nombre in nombres}}
+    return estado
+
+# Mide guardar y cargar el estado de una temporada completa: json con sangría y escritura directa frente a la capa de persistencia.
+def bench_persistencia(repeticiones=5):
+    import persistencia
+
+    estado = _estado_temporada_sintetico()
+    codec = "orjson" if persistencia.orjson else "json"
+    print(f"\n--- BENCHMARK DE PERSISTENCIA ({len(estado)} archivos, {repeticiones} repeticiones, mediana; códec: {codec}) ---")
+
+    def guardar_antes(datos, ruta):
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, indent=4, ensure_ascii=False)
+
+    def cargar_antes(ruta):
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    variantes = {
+        "antes": (guardar_antes, cargar_antes),
+        "ahora": (persistencia.guardar_json, persistencia.cargar_json),
+    }
+    resultados = {}
+    with tempfile.TemporaryDirectory() as directorio:
+        for nombre, (guardar, cargar) in variantes.items():
+            tiempos_guardar, tiempos_cargar = [], []
+            for _ in range(repeticiones):
+                t = time.perf_counter()
+                for archivo, datos in estado.items():
+                    guardar(datos, os.path.join(directorio, archivo))
+                tiempos_guardar.append(time.perf_counter() - t)
+                t = time.perf_counter()
+                for archivo in estado:
+                    cargar(os.path.join(directorio, archivo))
+                tiempos_cargar.append(time.perf_counter() - t)
+            tamano = sum(os.path.getsize(os.path.join(directorio, archivo)) for archivo in estado)
+            resultados[nombre] = {"guardar": statistics.median(tiempos_guardar), "cargar": statistics.median(tiempos_cargar), "bytes": tamano}
+            print(f"{nombre:<6} guardar {resultados[nombre]['guardar'] * 1000:8.1f} ms   cargar {resultados[nombre]['cargar'] * 1000:8.1f} ms   {tamano / 1024:8.0f} KiB")
+    return resultados
+
+# Genera datos de informe sintéticos ({division: datos}) con la forma que usa el libro de analítica.
+def _datos_informe_sinteticos(temporadas=1, jornadas=38, equipos=22, semilla=0):
+    from libro_analitico import CONCEPTOS_MULTAS
+
+    rnd = random.Random(semilla)
+    nombres = [f"Equipo {n}" for n in range(equipos)]
+    datos_jornadas, capitanes = [], {}
+    for numero in range(1, temporadas * jornadas + 1):
+        multas = {}
+        for nombre in nombres:
+            desglose = {clave: {"multa": rnd.choice([0.0, 0.0, 0.5, 1.0])} for clave, _ in CONCEPTOS_MULTAS}
+            multas[nombre] = {"multa_total": round(sum(d["multa"] for d in desglose.values()), 2), "desglose": desglose}
+        datos_jornadas.append({"numero": numero, "multas": multas})
+        capitanes[numero] = [{"team_name": nombre, "capitan": f"Jugador {rnd.randint(0, 300)}"} for nombre in nombres]
+    sanciones = {nombre: {f"Jugador {n}": [{"jornada_triggered": 3, "games_to_serve": 3, "games_served": 3, "status": "completed", "jornada_completed": 6}] for n in range(3)} for nombre in nombres}
+    violaciones = {nombre: [{"jornada": 4, "jugador": "Jugador 1", "multa": 5.0}] for nombre in nombres}
+    datos = {"jornadas": datos_jornadas, "capitanes": capitanes, "sanciones": sanciones, "violaciones": violaciones}
+    return {"primera": datos, "segunda": datos}
+
+# Compara el libro de analítica generado en streaming (write_only) con el modelo de celdas normal de openpyxl: tiempo y pico de memoria.
+def bench_libro_analitico(temporadas=5):
+    import contextlib
+    import io
+    import tracemalloc
+    from openpyxl import Workbook
+    import libro_analitico
+
+    datos = _datos_informe_sinteticos(temporadas)
+    etiquetas = {"primera": "1a División", "segunda": "2a División"}
+    hojas = [
+        ("Multas por jornada", libro_analitico.CABECERA_MULTAS, lambda e, d: libro_analitico.filas_multas(e, d["jornadas"])),
+        ("Capitanes", libro_analitico.CABECERA_CAPITANES, lambda e, d: libro_analitico.filas_capitanes(e, d["capitanes"])),
+        ("Sanciones", libro_analitico.CABECERA_SANCIONES, lambda e, d: libro_analitico.filas_sanciones(e, d["sanciones"])),
+        ("Alineaciones indebidas", libro_analitico.CABECERA_INDEBIDAS, lambda e, d: libro_analitico.filas_indebidas(e, d["violaciones"])),
+    ]
+
+    # Mismo contenido escrito celda a celda, como actualizar_hoja_excel.
+    def celda_a_celda(ruta):
+        workbook = Workbook()
+        workbook.remove(workbook.active)
+        for titulo, cabecera, filas in hojas:
+            sheet = workbook.create_sheet(titulo)
+            todas = [cabecera] + [fila for division, d in datos.items() for fila in filas(etiquetas[division], d)]
+            for i, fila in enumerate(todas, start=1):
+                for j, valor in enumerate(fila, start=1):
+                    sheet.cell(row=i, column=j).value = valor
+        workbook.save(ruta)
+
+    def streaming(ruta):
+        with contextlib.redirect_stdout(io.StringIO()):
+            libro_analitico.generar_libro_analitico(datos, etiquetas, ruta)
+
+    filas_totales = sum(1 for _, _, filas in hojas for division, d in datos.items() for _ in filas(etiquetas[division], d))
+    print(f"\n--- BENCHMARK DEL LIBRO DE ANALÍTICA ({temporadas} temporadas, {filas_totales} filas) ---")
+    resultados = {}
+    with tempfile.TemporaryDirectory() as directorio:
+        for nombre, funcion in (("celda a celda", celda_a_celda), ("streaming", streaming)):
+            ruta = os.path.join(directorio, f"{nombre}.xlsx")
+            t = time.perf_counter()
+            funcion(ruta)
+            tiempo = time.perf_counter() - t
+            # El pico de memoria se mide en una segunda pasada, porque tracemalloc ralentiza mucho la primera.
+            tracemalloc.start()
+            funcion(ruta)
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            resultados[nombre] = {"tiempo": tiempo, "pico_memoria": pico}
+            print(f"{nombre:<14} {tiempo * 1000:8.1f} ms   pico de memoria {pico / 2**20:7.1f} MiB")
+    return resultados
+
+# Objetivo de tiempo para proyectar 100.000 temporadas de una división de 20 equipos con 32 jornadas restantes en un solo proceso.
+OBJETIVO_PROYECCION_S = 5.0
+
+# Mide la proyección Monte Carlo de la clasificación final en un proceso y con uno por CPU, frente al objetivo de tiempo.
+def bench_proyeccion(simulaciones=100_000, equipos=20, jornadas_jugadas=6, jornadas_temporada=38):
+    from proyeccion import preparar_datos_proyeccion, proyectar_clasificacion
+
+    rnd = random.Random(0)
+    nombres = [f"Equipo {n}" for n in range(equipos)]
+    rondas = {}
+    for jornada in range(1, jornadas_jugadas + 1):
+        orden = rnd.sample(range(1, equipos + 1), equipos)
+        matches = [{"p": orden[i:i + 2], "m": [rnd.randint(20, 90), rnd.randint(20, 90)]} for i in range(0, equipos, 2)]
+        rondas[jornada] = {"datos": {"answer": {"ranking": [{"name": n} for n in nombres], "matches": matches}}}
+    clasificacion = [{"name": n, "points": rnd.randint(0, 18), "general_points": rnd.randint(200, 500)} for n in nombres]
+    datos = preparar_datos_proyeccion(rondas, {}, clasificacion, jornadas_temporada)
+
+    print(f"\n--- BENCHMARK DE PROYECCIÓN ({simulaciones} temporadas, {equipos} equipos, {datos['jornadas_restantes']} jornadas restantes) ---")
+    resultados = {}
+    for procesos in sorted({1, os.cpu_count() or 1}):
+        t = time.perf_counter()
+        proyectar_clasificacion(datos, simulaciones, procesos, semilla=0)
+        resultados[procesos] = time.perf_counter() - t
+        objetivo = f" (objetivo {OBJETIVO_PROYECCION_S:.1f} s: {'cumplido' if resultados[procesos] <= OBJETIVO_PROYECCION_S else 'NO cumplido'})" if procesos == 1 else ""
+        print(f"{procesos:>3} procesos {resultados[procesos]:8.2f} s   {simulaciones / resultados[procesos]:10.0f} temporadas/s{objetivo}")
+    return resultados
+
+# Cuerpos JSON sintéticos de una temporada con la forma de la API: una respuesta de ronda y una alineación por equipo y jornada,
+# con todos los campos que la API devuelve de cada jugador aunque el proceso no los use.
+def _respuestas_api_sinteticas(jornadas=38, equipos=20, semilla=0):
+    rnd = random.Random(semilla)
+    estadisticas = ["goles", "asistencias", "paradas", "tarjetas", "minutos", "tiros", "pases", "regates", "faltas", "balones"]
+    for jornada in range(1, jornadas + 1):
+        ranking = [{"_id": f"t{n}", "name": f"Equipo {n}", "points": rnd.randint(20, 90), "avatar": "x" * 80, "userId": f"u{n}", "position": n + 1} for n in range(equipos)]
+        matches = [{"p": [n + 1, n + 2], "m": [rnd.randint(20, 90), rnd.randint(20, 90)], "data": {"partial": [1, 2], "events": list(range(20))}} for n in range(0, equipos, 2)]
+        yield json.dumps({"answer": {"ranking": ranking, "matches": matches, "round": jornada}}).encode()
+        for _ in range(equipos):
+            players = [{
+                "name": f"Jugador {rnd.randrange(400)}", "points": rnd.randint(-2, 15), "cpt": i == 0, "id": f"p{rnd.randrange(10**6)}",
+                "role": rnd.choice("pdcm"), "team": rnd.randrange(20), "price": rnd.randrange(10**7), "photo": "https://img/" + "x" * 60,
+                "stats": {clave: rnd.randrange(10) for clave in estadisticas}, "history": [rnd.randint(-2, 15) for _ in range(jornada)],
+            } for i in range(11)]
+            yield json.dumps({"answer": {"players": players, "formation": "4-4-2", "money": rnd.randrange(10**8)}}).encode()
+
+# Mide el pico de memoria y el tiempo de ingerir una temporada de respuestas de la API decodificándolas enteras o proyectadas a los campos que se usan.
+def bench_decodificacion(jornadas=38, equipos=20):
+    import tracemalloc
+    import campos_api
+
+    cuerpos = list(_respuestas_api_sinteticas(jornadas, equipos))
+    campos = campos_api.CAMPOS_RONDA | campos_api.CAMPOS_ALINEACION
+
+    # Se conservan todas las respuestas decodificadas, como las rondas de una temporada en memoria durante el proceso.
+    def completa():
+        return [json.loads(cuerpo) for cuerpo in cuerpos]
+
+    def por_trozos(cuerpo):
+        enviar, terminar = campos_api.decodificador_proyectado(campos)
+        for i in range(0, len(cuerpo), campos_api.TAMANO_TROZO):
+            enviar(cuerpo[i:i + campos_api.TAMANO_TROZO])
+        return terminar()
+
+    def proyectada():
+        return [por_trozos(cuerpo) for cuerpo in cuerpos]
+
+    modo = "ijson" if campos_api.ijson else "object_hook"
+    print(f"\n--- BENCHMARK DE DECODIFICACIÓN ({len(cuerpos)} respuestas, {sum(map(len, cuerpos)) / 2**20:.1f} MiB de JSON; proyección con {modo}) ---")
+    resultados = {}
+    for nombre, funcion in (("completa", completa), ("proyectada", proyectada)):
+        t = time.perf_counter()
+        funcion()
+        tiempo = time.perf_counter() - t
+        tracemalloc.start()
+        datos = funcion()
+        retenida, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del datos
+        resultados[nombre] = {"tiempo": tiempo, "pico_memoria": pico, "memoria_retenida": retenida}
+        print(f"{nombre:<12} {tiempo * 1000:8.1f} ms   pico de memoria {pico / 2**20:7.1f} MiB   retenida {retenida / 2**20:7.1f} MiB")
+    return resultados
+
+# Mide la evolución de la clasificación de muchas ligas: matriz equipos × jornadas construida columna a columna y posiciones vectorizadas, frente a recalcular la clasificación de cada jornada.
+def bench_evolucion(ligas=200, equipos=24, jornadas=38):
+    from clasificacion import historico_vacio, actualizar_historico, clasificacion_en_jornada
+    from evolucion import matriz_vacia, actualizar_matriz, calcular_evolucion
+
+    rnd = random.Random(0)
+    nombres = [f"Equipo {n}" for n in range(equipos)]
+    historicos = []
+    for _ in range(ligas):
+        rondas = {}
+        for jornada in range(1, jornadas + 1):
+            orden = rnd.sample(range(1, equipos + 1), equipos)
+            matches = [{"p": orden[i:i + 2], "m": [rnd.randint(20, 90), rnd.randint(20, 90)]} for i in range(0, equipos, 2)]
+            rondas[jornada] = {"datos": {"answer": {"ranking": [{"name": n} for n in nombres], "matches": matches}}}
+        historico = historico_vacio()
+        actualizar_historico(historico, rondas.items(), {})
+        historicos.append(historico)
+
+    print(f"\n--- BENCHMARK DE EVOLUCIÓN ({ligas} ligas de {equipos} equipos × {jornadas} jornadas) ---")
+    resultados = {}
+    t = time.perf_counter()
+    matrices = []
+    for historico in historicos:
+        matriz = matriz_vacia()
+        actualizar_matriz(matriz, historico)
+        matrices.append(matriz)
+    resultados["matriz"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    for matriz in matrices:
+        calcular_evolucion(matriz)
+    resultados["vectorizada"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    for historico in historicos:
+        for jornada in range(1, jornadas + 1):
+            clasificacion_en_jornada(historico, jornada, {})
+    resultados["por_jornada"] = time.perf_counter() - t
+
+    # Coste de añadir una jornada más a una temporada ya calculada (una columna y el recálculo vectorizado).
+    historico = historicos[0]
+    siguiente = {"ronda": jornadas + 1, "huella": "nueva", "acumulado": {n: [p + 3, g + 50.0] for n, (p, g) in historico["jornadas"][-1]["acumulado"].items()}}
+    t = time.perf_counter()
+    actualizar_matriz(matrices[0], {"jornadas": historico["jornadas"] + [siguiente]})
+    calcular_evolucion(matrices[0])
+    resultados["nueva_jornada"] = time.perf_counter() - t
+
+    print(f"Construcción de matrices   {resultados['matriz'] * 1000:9.1f} ms")
+    print(f"Posiciones vectorizadas    {resultados['vectorizada'] * 1000:9.1f} ms   ({resultados['vectorizada'] / ligas * 1e6:.0f} µs por liga)")
+    print(f"Clasificación por jornada  {resultados['por_jornada'] * 1000:9.1f} ms   ({resultados['por_jornada'] / resultados['vectorizada']:.1f}x más lenta)")
+    print(f"Añadir una jornada         {resultados['nueva_jornada'] * 1000:9.2f} ms")
+    return resultados
+
+# Guarda en la caché de un directorio temporal temporadas sintéticas completas (rondas con clasificación, enfrentamientos y alineaciones).
+def _cache_temporadas_sinteticas(directorio, temporadas, jornadas=38, equipos=20, semilla=0):
+    from persistencia import guardar_json
+
+    rnd = random.Random(semilla)
+    jugadores = [f"Jugador {n}" for n in range(400)]
+    for temporada in range(1, temporadas + 1):
+        for jornada in range(1, jornadas + 1):
+            ranking = [{"_id": f"t{n}", "name": f"Equipo {n}", "points": rnd.randint(20, 90)} for n in range(equipos)]
+            orden = rnd.sample(range(1, equipos + 1), equipos)
+            matches = [{"p": orden[i:i + 2], "m": [rnd.randint(20, 90), rnd.randint(20, 90)]} for i in range(0, equipos, 2)]
+            alineaciones = {
+                f"t{n}": [{"name": j, "points": rnd.randint(-2, 15), "cpt": i == 0} for i, j in enumerate(rnd.sample(jugadores, 11))]
+                for n in range(equipos)
+            }
+            ronda = {"id": f"r{jornada}", "datos": {"answer": {"ranking": ranking, "matches": matches}}, "alineaciones": alineaciones}
+            guardar_json(ronda, os.path.join(directorio, "cache", f"temporada_{temporada}", f"ronda_{jornada}.json"))
+    return {"rounds_map": {jornada: f"r{jornada}" for jornada in range(1, jornadas + 1)}, "name_map": {}}
+
+# Mide el pico de memoria de calcular las multas de varias temporadas: con todas las rondas cargadas a la vez, como antes, o en flujo ronda a ronda.
+def bench_flujo_multas(temporadas=(1, 4), jornadas=38, equipos=20):
+    import contextlib
+    import io
+    import tracemalloc
+    from etapas import cargar_rondas, iterar_rondas
+    from multas import procesar_historico_jornadas, iterar_multas_jornadas
+
+    def en_memoria(n, temporada):
+        rondas = [cargar_rondas(f"temporada_{t}", temporada) for t in range(1, n + 1)]
+        return [procesar_historico_jornadas(r, {}, f"temporada_{t}") for t, r in enumerate(rondas, start=1)]
+
+    def en_flujo(n, temporada):
+        multas_por_temporada = {}
+        for t in range(1, n + 1):
+            division = f"temporada_{t}"
+            multas_por_jornada = multas_por_temporada.setdefault(division, {})
+            for jornada in iterar_multas_jornadas(iterar_rondas(division, temporada), {}, division):
+                multas_por_jornada[str(jornada['numero'])] = jornada['multas']
+        return multas_por_temporada
+
+    print(f"\n--- BENCHMARK DEL FLUJO DE MULTAS ({jornadas} jornadas × {equipos} equipos por temporada) ---")
+    resultados = {}
+    directorio_previo = os.getcwd()
+    with tempfile.TemporaryDirectory() as directorio:
+        os.chdir(directorio)
+        try:
+            temporada = _cache_temporadas_sinteticas(directorio, max(temporadas), jornadas, equipos)
+            for n in temporadas:
+                for nombre, funcion in (("en memoria", en_memoria), ("en flujo", en_flujo)):
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        t = time.perf_counter()
+                        funcion(n, temporada)
+                        tiempo = time.perf_counter() - t
+                        tracemalloc.start()
+                        funcion(n, temporada)
+                        pico = tracemalloc.get_traced_memory()[1]
+                        tracemalloc.stop()
+                    resultados[(n, nombre)] = {"tiempo": tiempo, "pico_memoria": pico}
+                    print(f"{n} temporada(s)  {nombre:<10} {tiempo * 1000:8.1f} ms   pico de memoria {pico / 2**20:7.1f} MiB")
+        finally:
+            os.chdir(directorio_previo)
+    return resultados
+
+# Compara, contra el simulador de Futmondo con límite de ritmo y errores 503, la descarga de las alineaciones de una temporada
+# una a una sin reintentos (como antes), con concurrencia fija sin reintentos y con el planificador adaptativo.
+def bench_planificador(peticiones=240, tasa_servidor=60.0, rafaga_servidor=10, prob_error=0.05, latencia=0.05):
+    import requests
+    from concurrent.futures import ThreadPoolExecutor
+    from servidor_simulado import iniciar_servidor_futmondo
+    from futmondo_api import _peticion_api, _error_reintentable
+    from planificador_api import crear_planificador, ejecutar_peticiones, resumen_planificador
+
+    cuerpo = next(c for i, c in enumerate(_respuestas_api_sinteticas(jornadas=1, equipos=2)) if i == 1)
+    servidor, estado, base = iniciar_servidor_futmondo(
+        lambda ruta, query: cuerpo, tasa=tasa_servidor, rafaga=rafaga_servidor, prob_error=prob_error, latencia=latencia, latencia_por_peticion=0.005,
+    )
+    url = f"{base}/1/userteam/roundlineup"
+    tareas = [(url, {"header": {}, "query": {"userteamId": f"t{i}"}}) for i in range(peticiones)]
+
+    def sin_reintentos(tarea):
+        try:
+            respuesta = requests.post(tarea[0], json=tarea[1], timeout=30)
+            respuesta.raise_for_status()
+            return respuesta.json()
+        except requests.exceptions.RequestException:
+            return None
+
+    def una_a_una():
+        return [sin_reintentos(tarea) for tarea in tareas]
+
+    def concurrencia_fija():
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            return list(pool.map(sin_reintentos, tareas))
+
+    planificador = crear_planificador(tasa=2 * tasa_servidor)
+
+    def adaptativa():
+        return ejecutar_peticiones(planificador, _peticion_api, tareas, _error_reintentable)[0]
+
+    print(f"\n--- BENCHMARK DEL PLANIFICADOR ({peticiones} peticiones; servidor: {tasa_servidor:g}/s, ráfaga {rafaga_servidor}, {prob_error:.0%} de 503, {latencia * 1000:.0f} ms) ---")
+    resultados = {}
+    directorio_previo = os.getcwd()
+    with tempfile.TemporaryDirectory() as directorio:
+        # Las respuestas que pasan por el planificador se archivan en el directorio de trabajo.
+        os.chdir(directorio)
+        try:
+            for nombre, funcion in (("una a una", una_a_una), ("fija (16)", concurrencia_fija), ("adaptativa", adaptativa)):
+                t = time.perf_counter()
+                datos = funcion()
+                tiempo = time.perf_counter() - t
+                perdidas = sum(1 for d in datos if d is None)
+                resultados[nombre] = {"tiempo": tiempo, "perdidas": perdidas, "por_segundo": (peticiones - perdidas) / tiempo}
+                print(f"{nombre:<11} {tiempo:6.2f} s   {resultados[nombre]['por_segundo']:6.1f} respuestas/s   {perdidas:4d} perdidas")
+        finally:
+            os.chdir(directorio_previo)
+            servidor.shutdown()
+    print(f"Planificador: {resumen_planificador(planificador)}.")
+    print(f"Servidor: {estado['trafico']}")
+    return resultados
+
+# Compara la consulta "equipos más multados" de varias temporadas sobre las instantáneas archivadas (mapeadas en memoria)
+# con la misma consulta leyendo el multas.json de cada temporada, y el espacio en disco de ambos formatos.
+def bench_archivo_temporadas(temporadas=5, jornadas=38, equipos=20):
+    import contextlib
+    import io
+    from archivo_temporadas import (
+        abrir_archivo_temporadas, construir_instantanea, equipos_mas_multados, guardar_instantanea, rachas_capitania, ruta_instantanea,
+    )
+    from etapas import iterar_rondas
+    from libro_analitico import CONCEPTOS_MULTAS
+    from multas import iterar_multas_jornadas
+    from persistencia import cargar_json, guardar_json
+
+    def desde_json():
+        totales = {}
+        for ruta in rutas_json:
+            for multas_jornada in cargar_json(ruta).values():
+                for equipo, datos in multas_jornada.items():
+                    totales[equipo] = totales.get(equipo, 0.0) + datos.get('multa_total', 0.0)
+        return sorted(totales.items(), key=lambda x: (-x[1], x[0]))[:10]
+
+    print(f"\n--- BENCHMARK DEL ARCHIVO DE TEMPORADAS ({temporadas} temporadas de {jornadas} jornadas × {equipos} equipos) ---")
+    resultados = {}
+    directorio_previo = os.getcwd()
+    with tempfile.TemporaryDirectory() as directorio:
+        os.chdir(directorio)
+        try:
+            temporada = _cache_temporadas_sinteticas(directorio, temporadas, jornadas, equipos)
+            rutas_json = []
+            with contextlib.redirect_stdout(io.StringIO()):
+                for t in range(1, temporadas + 1):
+                    division = f"temporada_{t}"
+                    multas_por_jornada = {j['numero']: j['multas'] for j in iterar_multas_jornadas(iterar_rondas(division, temporada), {}, division)}
+                    rutas_json.append(os.path.join("cache", division, "multas.json"))
+                    guardar_json({str(n): m for n, m in multas_por_jornada.items()}, rutas_json[-1])
+                    arrays = construir_instantanea(iterar_rondas(division, temporada), multas_por_jornada, {}, [c for c, _ in CONCEPTOS_MULTAS])
+                    guardar_instantanea(arrays, ruta_instantanea(f"{2000 + t}", "primera"))
+
+            t = time.perf_counter()
+            desde_json()
+            resultados["json"] = time.perf_counter() - t
+            # La primera apertura descomprime las instantáneas en la caché; las siguientes solo las mapean.
+            t = time.perf_counter()
+            equipos_mas_multados(abrir_archivo_temporadas())
+            resultados["instantaneas_primera"] = time.perf_counter() - t
+            t = time.perf_counter()
+            instantaneas = abrir_archivo_temporadas()
+            equipos_mas_multados(instantaneas)
+            resultados["instantaneas"] = time.perf_counter() - t
+            t = time.perf_counter()
+            rachas_capitania(instantaneas)
+            resultados["rachas"] = time.perf_counter() - t
+
+            tamano_json = sum(os.path.getsize(ruta) for ruta in rutas_json)
+            tamano_npz = sum(os.path.getsize(os.path.join("temporadas", d, f)) for d in os.listdir("temporadas") for f in os.listdir(os.path.join("temporadas", d)))
+        finally:
+            os.chdir(directorio_previo)
+
+    print(f"Más multados (multas.json)      {resultados['json'] * 1000:8.1f} ms   {tamano_json / 1024:8.1f} KiB en disco")
+    print(f"Más multados (1ª apertura)      {resultados['instantaneas_primera'] * 1000:8.1f} ms")
+    print(f"Más multados (mapeadas)         {resultados['instantaneas'] * 1000:8.1f} ms   {tamano_npz / 1024:8.1f} KiB en disco "
+          f"({resultados['json'] / resultados['instantaneas']:.1f}x más rápida)")
+    print(f"Rachas de capitanía (mapeadas)  {resultados['rachas'] * 1000:8.1f} ms")
+    return resultados
+
+# Prueba de carga de la API local: varios clientes con conexiones persistentes piden rutas al azar, primero sin ETag (respuestas
+# completas, con gzip) y después revalidando con If-None-Match (304). Muestra también lo que costaría serializar cada respuesta al vuelo.
+def bench_api_local(clientes=16, peticiones_por_cliente=300, jornadas=38, equipos=22):
+    import gzip
+    import http.client
+    import json
+    from concurrent.futures import ThreadPoolExecutor
+    from urllib.parse import quote
+    from api_local import iniciar_api_local, rutas_api
+
+    estado = {}
+    for division, datos in _datos_informe_sinteticos(1, jornadas, equipos).items():
+        totales = {}
+        for jornada in datos["jornadas"]:
+            for equipo, multas in jornada["multas"].items():
+                totales[equipo] = round(totales.get(equipo, 0.0) + multas["multa_total"], 2)
+        clasificacion = [{"name": equipo, "points": 3 * n, "general_points": 1000 + n, "comentario": ""} for n, equipo in enumerate(sorted(totales))]
+        estado[division] = {**datos, "totales": totales, "clasificacion": clasificacion, "ultima_ronda": jornadas}
+
+    servidor, contenedor, base = iniciar_api_local(lambda: estado, lambda: None)
+    rutas = [quote(ruta) for ruta in contenedor["estado"]["respuestas"]]
+    # Los clientes aceptan gzip: revalidan con el ETag de la variante comprimida cuando la ruta la tiene.
+    etags = {quote(ruta): respuesta["etag_gzip"] or respuesta["etag"] for ruta, respuesta in contenedor["estado"]["respuestas"].items()}
+
+    def cliente(semilla, revalidar):
+        rnd = random.Random(semilla)
+        conexion = http.client.HTTPConnection("127.0.0.1", servidor.server_address[1])
+        latencias, bytes_recibidos = [], 0
+        for _ in range(peticiones_por_cliente):
+            ruta = rnd.choice(rutas)
+            cabeceras = {"Accept-Encoding": "gzip"}
+            if revalidar:
+                cabeceras["If-None-Match"] = etags[ruta]
+            t = time.perf_counter()
+            conexion.request("GET", ruta, headers=cabeceras)
+            respuesta = conexion.getresponse()
+            bytes_recibidos += len(respuesta.read())
+            latencias.append(time.perf_counter() - t)
+        conexion.close()
+        return latencias, bytes_recibidos
+
+    print(f"\n--- BENCHMARK DE LA API LOCAL ({len(rutas)} rutas, {clientes} clientes × {peticiones_por_cliente} peticiones) ---")
+    resultados = {}
+    try:
+        for nombre, revalidar in (("completas", False), ("revalidadas", True)):
+            t = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=clientes) as pool:
+                partes = list(pool.map(lambda i: cliente(i, revalidar), range(clientes)))
+            tiempo = time.perf_counter() - t
+            latencias = sorted(latencia for parte, _ in partes for latencia in parte)
+            bytes_recibidos = sum(b for _, b in partes)
+            resultados[nombre] = {
+                "por_segundo": len(latencias) / tiempo,
+                "p50": latencias[len(latencias) // 2],
+                "p99": latencias[int(len(latencias) * 0.99)],
+                "bytes": bytes_recibidos,
+            }
+            print(f"{nombre:<12} {resultados[nombre]['por_segundo']:8.0f} peticiones/s   p50 {resultados[nombre]['p50'] * 1000:6.2f} ms   "
+                  f"p99 {resultados[nombre]['p99'] * 1000:6.2f} ms   {bytes_recibidos / 2**20:7.2f} MiB recibidos")
+    finally:
+        contenedor["parar"].set()
+        servidor.shutdown()
+
+    # Coste de serializar y comprimir cada respuesta en cada petición, que la caché de respuestas evita.
+    objetos = rutas_api(estado, "")
+    t = time.perf_counter()
+    for objeto in objetos.values():
+        gzip.compress(json.dumps(objeto, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8'), compresslevel=6)
+    resultados["serializar"] = (time.perf_counter() - t) / len(objetos)
+    print(f"Serializar y comprimir al vuelo costaría {resultados['serializar'] * 1e6:.0f} µs por petición; con la caché, 0.")
+    print(f"Servidor: {dict(contenedor['contadores'])}")
+    return resultados
+
+BENCHMARKS = {
+    "importacion": bench_importacion,
+    "persistencia": bench_persistencia,
+    "libro_analitico": bench_libro_analitico,
+    "proyeccion": bench_proyeccion,
+    "evolucion": bench_evolucion,
+    "decodificacion": bench_decodificacion,
+    "flujo_multas": bench_flujo_multas,
+    "planificador": bench_planificador,
+    "archivo_temporadas": bench_archivo_temporadas,
+    "api_local": bench_api_local,
+}
+
+if __name__ == '__main__':
+    nombres = sys.argv[1:] or list(BENCHMARKS)
+    for nombre in nombres:
+        if nombre not in BENCHMARKS:
+            print(f"Benchmark desconocido '{nombre}'. Disponibles: {', '.join(BENCHMARKS)}")
+            continue
+        BENCHMARKS[nombre]()
@@ -0,0 +1,96 @@
+import json
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Claves que usa el proceso de cada respuesta grande de la API; el resto se descarta al decodificar.
+CAMPOS_ALINEACION = frozenset({"answer", "players", "name", "points", "cpt"})
+CAMPOS_RONDA = frozenset({"answer", "ranking", "matches", "_id", "name", "points", "p", "m", "data", "partial"})
+
+# Tamaño de los trozos en que se lee el cuerpo de las respuestas.
+TAMANO_TROZO = 64 * 1024
+
+# Construye un valor JSON a partir de eventos de ijson (evento, valor), saltándose sin construirlas las claves que no están en 'campos'.
+def _constructor_eventos(campos):
+    estado = {"pila": [], "clave": None, "omitir": False, "profundidad_omitida": 0, "resultado": None}
+    # Las claves se guardan con el objeto de 'campos' (como hace json con las repetidas) y no con una copia por objeto.
+    canonicas = {clave: clave for clave in campos}
+
+    def anadir(valor):
+        pila = estado["pila"]
+        if not pila:
+            estado["resultado"] = valor
+        elif isinstance(pila[-1], dict):
+            pila[-1][estado["clave"]] = valor
+        else:
+            pila[-1].append(valor)
+
+    def procesar(evento, valor):
+        if estado["profundidad_omitida"]:
+            if evento in ("start_map", "start_array"):
+                estado["profundidad_omitida"] += 1
+            elif evento in ("end_map", "end_array"):
+                estado["profundidad_omitida"] -= 1
+            return
+        if estado["omitir"]:
+            estado["omitir"] = False
+            if evento in ("start_map", "start_array"):
+                estado["profundidad_omitida"] = 1
+            return
+        if evento == "map_key":
+            estado["clave"] = canonicas.get(valor)
+            estado["omitir"] = estado["clave"] is None
+        elif evento in ("start_map", "start_array"):
+            contenedor = {} if evento == "start_map" else []
+            anadir(contenedor)
+            estado["pila"].append(contenedor)
+        elif evento in ("end_map", "end_array"):
+            estado["pila"].pop()
+        else:
+            anadir(valor)
+
+    return procesar, estado
+
+# Decodificador incremental de una respuesta JSON que solo conserva las claves indicadas, a cualquier profundidad.
+# Devuelve (enviar, terminar): enviar(trozo) recibe el cuerpo por partes y terminar() devuelve los datos proyectados.
+# Con ijson los objetos descartados nunca se construyen; sin él, el cuerpo se decodifica al final filtrando cada objeto.
+def decodificador_proyectado(campos):
+    if ijson is None:
+        trozos = []
+
+        def terminar():
+            return json.loads(b"".join(trozos), object_hook=lambda objeto: {k: v for k, v in objeto.items() if k in campos})
+        return trozos.append, terminar
+
+    eventos = ijson.sendable_list()
+    corrutina = ijson.basic_parse_coro(eventos, use_float=True)
+    procesar, estado = _constructor_eventos(campos)
+
+    def vaciar():
+        for evento, valor in eventos:
+            procesar(evento, valor)
+        del eventos[:]
+
+    def enviar(trozo):
+        try:
+            corrutina.send(trozo)
+        except ijson.JSONError as e:
+            raise ValueError(f"JSON inválido: {e}") from e
+        vaciar()
+
+    def terminar():
+        try:
+            corrutina.close()
+        except ijson.JSONError as e:
+            raise ValueError(f"JSON inválido: {e}") from e
+        vaciar()
+        return estado["resultado"]
+    return enviar, terminar
+
+# Decodifica de una vez un contenido JSON completo conservando solo las claves indicadas.
+def decodificar_proyectado(contenido, campos):
+    enviar, terminar = decodificador_proyectado(campos)
+    enviar(contenido)
+    return terminar()
@@ -0,0 +1,134 @@
+from bisect import bisect_left, bisect_right, insort
+
+from configuracion import AJUSTES_CLASIFICACION_FILE
+from futmondo_api import huella_respuesta
+from persistencia import cargar_json
+
+PUNTOS_VICTORIA = 3
+PUNTOS_EMPATE = 1
+
+# Carga el registro versionado de ajustes manuales de puntos (sanciones, compensaciones...).
+def cargar_ajustes(ruta_archivo=AJUSTES_CLASIFICACION_FILE):
+    return cargar_json(ruta_archivo, {"version": 0, "ajustes": []})
+
+# Agrupa los ajustes por equipo (puntos sumados y motivos unidos), de una división y vigentes en una jornada si se indican.
+def ajustes_por_equipo(registro, division=None, jornada=None):
+    agrupados = {}
+    for ajuste in registro.get("ajustes", []):
+        if division is not None and ajuste.get("division") not in (None, division):
+            continue
+        if jornada is not None and ajuste.get("desde_jornada") is not None and ajuste["desde_jornada"] > jornada:
+            continue
+        puntos, motivos = agrupados.get(ajuste["equipo"], (0, []))
+        agrupados[ajuste["equipo"]] = (puntos + ajuste["puntos"], motivos + [ajuste["motivo"]])
+    return {equipo: {"puntos": puntos, "comentario": "; ".join(motivos)} for equipo, (puntos, motivos) in agrupados.items()}
+
+# Clasificación ordenada vacía: claves de orden mantenidas con bisect y la clave y el comentario actuales de cada equipo.
+def clasificacion_vacia():
+    return {"claves": [], "equipos": {}}
+
+# Fija los puntos de un equipo y lo recoloca con búsqueda binaria, sin reordenar al resto.
+def fijar_puntos(clasificacion, nombre, puntos, puntos_generales, comentario=None):
+    previo = clasificacion["equipos"].get(nombre)
+    if previo:
+        del clasificacion["claves"][bisect_left(clasificacion["claves"], previo["clave"])]
+        orden = previo["clave"][2]
+        comentario = previo["comentario"] if comentario is None else comentario
+    else:
+        orden = len(clasificacion["equipos"])
+    # Más puntos primero; a igualdad, más puntos generales y después el orden de llegada (como un sorted estable).
+    clave = (-puntos, -puntos_generales, orden, nombre)
+    insort(clasificacion["claves"], clave)
+    clasificacion["equipos"][nombre] = {"clave": clave, "comentario": comentario or ""}
+
+# Suma (o resta) puntos a un equipo ya clasificado y lo recoloca.
+def sumar_puntos(clasificacion, nombre, puntos, puntos_generales=0, comentario=None):
+    clave = clasificacion["equipos"][nombre]["clave"]
+    fijar_puntos(clasificacion, nombre, -clave[0] + puntos, -clave[1] + puntos_generales, comentario)
+
+# Aplica de una vez los ajustes agrupados por equipo: cada equipo ajustado se recoloca una sola vez.
+def aplicar_ajustes(clasificacion, ajustes):
+    for nombre, ajuste in ajustes.items():
+        if nombre in clasificacion["equipos"]:
+            sumar_puntos(clasificacion, nombre, ajuste["puntos"], comentario=ajuste["comentario"])
+
+# Lista ordenada de la clasificación en el formato de siempre (name, points, general_points, comentario).
+def ranking(clasificacion):
+    return [
+        {'name': clave[3], 'points': -clave[0], 'general_points': -clave[1], 'comentario': clasificacion["equipos"][clave[3]]["comentario"]}
+        for clave in clasificacion["claves"]
+    ]
+
+# Nombres canónicos de los equipos en el orden en que los devuelve la API: es el desempate final de la clasificación.
+def orden_api(datos_general, name_map={}):
+    return [name_map.get(equipo['name'], equipo['name']) for equipo in datos_general['answer']['ranking']]
+
+# Procesa y ordena los datos de clasificación de la API, con los ajustes del registro (o los indicados) aplicados.
+def procesar_y_ordenar_clasificacion(datos_general, datos_teams, name_map={}, ajustes=None):
+    puntos_generales_dict = {name_map.get(e['teamname'], e['teamname']): e['points'] for e in datos_teams['answer']['teams']}
+    clasificacion = clasificacion_vacia()
+    for equipo, nombre_equipo_canonico in zip(datos_general['answer']['ranking'], orden_api(datos_general, name_map)):
+        fijar_puntos(clasificacion, nombre_equipo_canonico, equipo['points'], puntos_generales_dict.get(nombre_equipo_canonico, 0))
+    aplicar_ajustes(clasificacion, ajustes if ajustes is not None else ajustes_por_equipo(cargar_ajustes()))
+    return ranking(clasificacion)
+
+# Puntos de liga y puntos generales que suma cada equipo en una ronda, según sus enfrentamientos.
+def puntos_ronda(ronda, name_map):
+    answer = ronda['datos'].get('answer', {})
+    ranking_ronda = answer.get('ranking', [])
+    puntos = {}
+    for match in answer.get('matches', []):
+        if not all(1 <= posicion <= len(ranking_ronda) for posicion in match['p']):
+            continue
+        nombres = [name_map.get(ranking_ronda[posicion - 1]['name'], ranking_ronda[posicion - 1]['name']) for posicion in match['p']]
+        local, visitante = (float(p) for p in match.get('data', {}).get('partial', match.get('m', [0, 0])))
+        if local > visitante:
+            liga = (PUNTOS_VICTORIA, 0)
+        elif local < visitante:
+            liga = (0, PUNTOS_VICTORIA)
+        else:
+            liga = (PUNTOS_EMPATE, PUNTOS_EMPATE)
+        for nombre, puntos_liga, puntos_generales in zip(nombres, liga, (local, visitante)):
+            puntos[nombre] = [puntos_liga, puntos_generales]
+    return puntos
+
+# Histórico vacío de clasificaciones por jornada de una división.
+def historico_vacio():
+    return {"jornadas": []}
+
+# Actualiza los totales acumulados tras cada jornada de un flujo de pares (numero, ronda) en orden de calendario: conserva los de las jornadas sin cambios y recalcula solo desde la primera nueva o cambiada.
+def actualizar_historico(historico, rondas, name_map):
+    previas = historico["jornadas"]
+    jornadas = []
+    acumulado = {}
+    recalculadas = []
+    for i, (round_number, ronda) in enumerate(rondas):
+        huella = huella_respuesta(ronda['datos'])
+        if not recalculadas and i < len(previas) and previas[i]["ronda"] == round_number and previas[i]["huella"] == huella:
+            jornadas.append(previas[i])
+            acumulado = previas[i]["acumulado"]
+            continue
+        acumulado = {nombre: list(totales) for nombre, totales in acumulado.items()}
+        for nombre, (puntos_liga, puntos_generales) in puntos_ronda(ronda, name_map).items():
+            totales = acumulado.setdefault(nombre, [0, 0.0])
+            totales[0] += puntos_liga
+            totales[1] = round(totales[1] + puntos_generales, 2)
+        jornadas.append({"ronda": round_number, "huella": huella, "acumulado": acumulado})
+        recalculadas.append(round_number)
+    historico["jornadas"] = jornadas
+    return recalculadas
+
+# Clasificación tras una jornada (la última disputada hasta ella) con los ajustes vigentes entonces, leída del histórico sin recorrer rondas.
+# 'orden' es la lista de equipos en el orden de la API (ver orden_api): como en la clasificación actual, decide los empates completos.
+def clasificacion_en_jornada(historico, jornada, ajustes, orden=None):
+    i = bisect_right([j["ronda"] for j in historico["jornadas"]], jornada)
+    if i == 0:
+        return []
+    acumulado = historico["jornadas"][i - 1]["acumulado"]
+    posicion_api = {nombre: n for n, nombre in enumerate(orden or [])}
+    clasificacion = clasificacion_vacia()
+    for nombre in sorted(acumulado, key=lambda nombre: (posicion_api.get(nombre, len(posicion_api)), nombre)):
+        puntos, puntos_generales = acumulado[nombre]
+        fijar_puntos(clasificacion, nombre, puntos, puntos_generales)
+    aplicar_ajustes(clasificacion, ajustes)
+    return ranking(clasificacion)
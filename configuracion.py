@@ -0,0 +1,73 @@
+import os
+
+SANCIONES_FILE = "sanciones.json"
+VIOLACIONES_FILE = "violaciones.json"
+# Temporada en curso: da nombre a los libros de Excel y a su instantánea en el archivo de temporadas.
+TEMPORADA = "25-26"
+LOCAL_EXCEL_FILENAME = f"SuperLiga Fuentmondo {TEMPORADA}.xlsx"
+LIBRO_ANALITICO = f"Analítica Fuentmondo {TEMPORADA}.xlsx"
+CACHE_DIR = "cache"
+INFORME_HTML = "index.html"
+DATOS_INFORME_DIR = "datos"
+# Scripts del informe con la huella de su contenido en el nombre, relativos al directorio del informe.
+RECURSOS_INFORME_DIR = "recursos"
+ARCHIVO_API_DIR = "archivo_api"
+# Instantáneas comprimidas de fin de temporada (temporadas/<temporada>/<división>.npz).
+ARCHIVO_TEMPORADAS_DIR = "temporadas"
+# Registro versionado de ajustes manuales de puntos de la clasificación.
+AJUSTES_CLASIFICACION_FILE = "ajustes_clasificacion.json"
+
+# Servidor de la API de Futmondo; se puede apuntar a un simulador local (ver servidor_simulado.py).
+FUTMONDO_API_URL = os.getenv("FUTMONDO_API_URL", "https://api.futmondo.com").rstrip('/')
+API_URL_GENERAL = f"{FUTMONDO_API_URL}/1/ranking/general"
+API_URL_TEAMS = f"{FUTMONDO_API_URL}/2/championship/teams"
+API_URL_ROUNDS = f"{FUTMONDO_API_URL}/1/userteam/rounds"
+API_URL_ROUND = f"{FUTMONDO_API_URL}/1/ranking/round"
+API_URL_LINEUP = f"{FUTMONDO_API_URL}/1/userteam/roundlineup"
+
+TEAMS_1A = {
+    "1":"Galácticos de la noche FC", "2":"AL-CARRER F.C.", "3":"QUE BARBARIDAD FC",
+    "4":"Fuentino Pérez", "5":"CALAMARES CON TORRIJAS🦑🍞", "6":"CD Congelados",
+    "7":"THE LIONS", "8":"EL CHOLISMO FC", "9":"Real Fermín C.F.",
+    "10":"Real 🥚🥚 Bailarines 🪩F.C", "11":"MORRITOS F.C.", "12":"Poli Ejido CF",
+    "13":"Juaki la bomba", "14":"LA MARRANERA", "15":"Larios Limon FC",
+    "16":"PANAKOTA F.F.", "17":"Real Pezqueñines FC", "18":"LOS POKÉMON 🐭🟡🐭",
+    "19":"El Huracán CF", "20":"Lim Hijo de Puta"
+}
+TEAMS_2A = {
+  "1":"SANTA LUCIA FC", "2":"Osasuna N.S.R", "3":"Tetitas Colesterol . F.C",
+  "4":"Pollos sin cabeza 🐥🧄", "5":"Charo la   Picanta FC", "6":"Kostas Mariotas",
+  "7":"Real Pescados el Puerto Fc", "8":"Team pepino", "9":"🇧🇷Samba Rovinha 🇧🇷",
+  "10":"Banano Vallekano 🍌⚡", "11":"SICARIOS CF", "12":"Minabo De Kiev",
+  "13":"Todo por la camiseta 🇪🇸", "14":"parker f.c.", "15":"Molinardo fc",
+  "16":"Lazaroneta", "17":"ElBarto F.C", "18":"BANANEROS FC",
+  "19":"Morenetes de la Giralda 🍩", "20":"Jamon York F.C.", "21":"Elche pero Peor",
+  "22":"Motobetis a primera!", "23":"MTB Drink Team", "24":"Patejas"
+}
+
+# Jornadas de una temporada completa (para proyectar las que faltan).
+JORNADAS_TEMPORADA = 38
+
+# Configuración de cada división: payload de la API, equipos canónicos y posición de su tabla y de sus columnas de capitanes en el Excel.
+DIVISIONES = {
+    "primera": {
+        "payload": "payload_primera.json",
+        "equipos": TEAMS_1A,
+        "etiqueta": "1a División",
+        "hoja_clasificacion": "Clasificación 1a DIV",
+        "fila_inicio": 5,
+        "columna_inicio": 2,
+        "columna_capitanes": 3,
+        "plazas_descenso": 4,
+    },
+    "segunda": {
+        "payload": "payload.json",
+        "equipos": TEAMS_2A,
+        "etiqueta": "2a División",
+        "hoja_clasificacion": "Clasificación 2a DIV",
+        "fila_inicio": 2,
+        "columna_inicio": 3,
+        "columna_capitanes": 44,
+        "plazas_descenso": 0,
+    },
+}
@@ -0,0 +1,120 @@
+from datetime import datetime
+import os
+import smtplib
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+
+# Envía un correo con *todas* las sanciones activas y añade CC en Lunes/Viernes.
+def enviar_correo_sanciones(sanciones_por_division, violaciones_detectadas=None, elegibilidad=None):
+    EMAIL_HOST = os.getenv("EMAIL_HOST")
+    EMAIL_PORT = os.getenv("EMAIL_PORT")
+    EMAIL_USER = os.getenv("EMAIL_USER")
+    EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
+    EMAIL_RECIPIENT = os.getenv("EMAIL_RECIPIENT")
+    # Nueva variable de entorno para destinatarios en copia
+    EMAIL_RECIPIENTS_CC = os.getenv("EMAIL_RECIPIENTS_CC") or os.getenv("EMAIL_RECIPIENT_CC")
+
+    if not all([EMAIL_HOST, EMAIL_PORT, EMAIL_USER, EMAIL_PASSWORD, EMAIL_RECIPIENT]):
+        print("Faltan variables de entorno para el envío de correo. No se enviará la notificación.")
+        return
+
+    cuerpo_mensaje = ""
+    hay_sanciones_activas = False
+
+    for division, equipos in sanciones_por_division.items():
+        titulo_division = "1ª DIVISIÓN" if division == "primera" else "2ª DIVISIÓN"
+        buffer_division = ""
+        division_con_sanciones = False
+
+        for equipo, jugadores in sorted(equipos.items()):
+            buffer_equipo = ""
+            equipo_con_sanciones_en_buffer = False
+
+            for jugador, sanciones in sorted(jugadores.items()):
+                sancion_a_mostrar = next((s for s in sanciones if s.get('status') == 'active'), None)
+                if not sancion_a_mostrar:
+                    sancion_a_mostrar = next((s for s in sanciones if s.get('status') == 'captain_banned'), None)
+
+                if not sancion_a_mostrar:
+                    continue
+
+                hay_sanciones_activas = True
+                division_con_sanciones = True
+                equipo_con_sanciones_en_buffer = True
+                estado_str = ""
+
+                if sancion_a_mostrar['status'] == 'active':
+                    restantes = sancion_a_mostrar.get('games_to_serve', 3) - sancion_a_mostrar.get('games_served', 0)
+                    if restantes > 0:
+                        estado_str = f"Sancionado, le queda(n) {restantes} partido(s) por cumplir."
+                    else:
+                        estado_str = "Puede volver al once, pero no como capitan."
+                elif sancion_a_mostrar['status'] == 'captain_banned':
+                    jornada_fin_restriccion = sancion_a_mostrar.get('jornada_completed', 0) + 3
+                    estado_str = f"Puede volver al once, pero no como capitan. Restricción hasta la Jornada {jornada_fin_restriccion}."
+                
+                buffer_equipo += f"{jugador}: {estado_str}\n"
+
+            if equipo_con_sanciones_en_buffer:
+                buffer_division += f"- {equipo}\n{buffer_equipo}"
+
+        if division_con_sanciones:
+            cuerpo_mensaje += f"\n*Sanciones Activas - {titulo_division}*\n{buffer_division}"
+
+    if violaciones_detectadas:
+        cuerpo_mensaje += "\n\n⚠️  *ALINEACIONES INDEBIDAS DETECTADAS (MULTA 5€)* ⚠️\n"
+        hay_sanciones_activas = True # Forzar envío si hay multas nuevas
+        for division, violaciones in violaciones_detectadas.items():
+            if not violaciones: continue
+            titulo_division = "1ª DIVISIÓN" if division == "primera" else "2ª DIVISIÓN"
+            cuerpo_mensaje += f"\n{titulo_division}:\n"
+            for team_name, lista_multas in violaciones.items():
+                for m in lista_multas:
+                    cuerpo_mensaje += f"- {team_name}: Alineó a {m['jugador']} en la Jornada {m['jornada']} (Sancionado).\n"
+
+    if not hay_sanciones_activas:
+        print("No se detectaron sanciones activas. No se enviará correo.")
+        return
+
+    # Aviso preventivo: jugadores a los que la próxima capitanía les supondría una sanción.
+    for division, indice in (elegibilidad or {}).items():
+        avisos = [
+            f"- {equipo}: {', '.join(sorted(j for j, info in jugadores.items() if info['estado'] == 'a_una_capitania'))}"
+            for equipo, jugadores in sorted(indice['equipos'].items())
+            if any(info['estado'] == 'a_una_capitania' for info in jugadores.values())
+        ]
+        if avisos:
+            titulo_division = "1ª DIVISIÓN" if division == "primera" else "2ª DIVISIÓN"
+            cuerpo_mensaje += f"\n\n*A una capitanía de sanción en la Jornada {indice['ronda']} - {titulo_division}*\n" + "\n".join(avisos) + "\n"
+
+    cuerpo_mensaje += "\n\nInfo completa en blackmanx.github.io/fuentmondo"
+    msg = MIMEMultipart()
+    msg['From'] = EMAIL_USER
+    msg['To'] = EMAIL_RECIPIENT
+    msg['Subject'] = f"Informe de Sanciones SuperLiga - {datetime.now().strftime('%d/%m/%Y')}"
+    msg.attach(MIMEText(cuerpo_mensaje, 'plain'))
+
+    # --- Lógica de CC para Lunes y Viernes ---
+    dia_semana = datetime.now().weekday() # Lunes es 0, Viernes es 4
+    lista_destinatarios = [EMAIL_RECIPIENT]
+    mensaje_cc = ""
+
+    if EMAIL_RECIPIENTS_CC and dia_semana in [1, 4]:
+        msg['Cc'] = EMAIL_RECIPIENTS_CC
+        # Asumimos que EMAIL_RECIPIENTS_CC es una cadena de correos separados por coma
+        lista_destinatarios.extend([email.strip() for email in EMAIL_RECIPIENTS_CC.split(',')])
+        mensaje_cc = f" (y a destinatarios en copia: {EMAIL_RECIPIENTS_CC})"
+        print(f"Hoy es martes o viernes. Añadiendo destinatarios en CC: {EMAIL_RECIPIENTS_CC}")
+    # --- Fin de la lógica de CC ---
+
+    try:
+        server = smtplib.SMTP(EMAIL_HOST, int(EMAIL_PORT))
+        server.starttls()
+        server.login(EMAIL_USER, EMAIL_PASSWORD)
+        text = msg.as_string()
+        # Usamos la lista de destinatarios (To + Cc) para el método sendmail
+        server.sendmail(EMAIL_USER, lista_destinatarios, text)
+        server.quit()
+        print(f"Correo de informe de sanciones enviado a '{EMAIL_RECIPIENT}'{mensaje_cc}.")
+    except Exception as e:
+        print(f"Error al enviar el correo de notificación: {e}")
@@ -0,0 +1,111 @@
+import queue
+import threading
+import time
+
+# Estados finales de una etapa del grafo.
+CORRECTA = "ok"
+FALLIDA = "error"
+AGOTADA = "agotada"
+OMITIDA = "omitida"
+
+# Describe una etapa del grafo: la función que la ejecuta, los datos que necesita (entradas) y los que produce (salidas).
+# Las entradas que no produce ninguna etapa del grafo se consideran ya disponibles. Las entradas opcionales se esperan igual,
+# pero si la etapa que las produce falla, esta se ejecuta sin ellas: la función recibe entonces la tupla de opcionales disponibles.
+# timeout en segundos (None, sin límite).
+def crear_etapa(nombre, funcion, entradas=(), salidas=(), timeout=None, opcionales=()):
+    return {"nombre": nombre, "funcion": funcion, "entradas": tuple(entradas), "salidas": tuple(salidas), "timeout": timeout, "opcionales": tuple(opcionales)}
+
+# Etapa que produce cada salida del grafo; dos etapas no pueden producir la misma.
+def _productores(etapas):
+    productores = {}
+    for etapa in etapas:
+        for salida in etapa["salidas"]:
+            if salida in productores:
+                raise ValueError(f"La salida '{salida}' la producen '{productores[salida]}' y '{etapa['nombre']}'.")
+            productores[salida] = etapa["nombre"]
+    return productores
+
+# Dependencias de cada etapa (las etapas que producen alguna de sus entradas, también las opcionales), comprobando que el grafo no tiene ciclos.
+def dependencias_grafo(etapas):
+    productores = _productores(etapas)
+    dependencias = {etapa["nombre"]: {productores[e] for e in etapa["entradas"] + etapa["opcionales"] if e in productores} for etapa in etapas}
+
+    resueltas = set()
+    while len(resueltas) < len(dependencias):
+        listas = {nombre for nombre, deps in dependencias.items() if nombre not in resueltas and deps <= resueltas}
+        if not listas:
+            raise ValueError(f"El grafo de etapas tiene un ciclo entre: {', '.join(sorted(set(dependencias) - resueltas))}.")
+        resueltas |= listas
+    return dependencias
+
+# Ejecuta la etapa en un hilo propio y avisa al terminar. El hilo es daemon para que una etapa colgada más allá de su
+# timeout no impida terminar el proceso.
+def _lanzar(etapa, eventos, argumentos=()):
+    def ejecutar():
+        inicio = time.perf_counter()
+        try:
+            eventos.put((etapa["nombre"], CORRECTA, etapa["funcion"](*argumentos), time.perf_counter() - inicio))
+        except Exception as e:
+            eventos.put((etapa["nombre"], FALLIDA, e, time.perf_counter() - inicio))
+
+    threading.Thread(target=ejecutar, name=f"etapa-{etapa['nombre']}", daemon=True).start()
+
+# Ejecuta el grafo de etapas: cada etapa arranca en cuanto han terminado las que producen sus entradas, de modo que las
+# independientes corren a la vez. Una etapa que falla o agota su timeout solo arrastra a las que dependen de ella (se omiten),
+# salvo a las que solo la usan como entrada opcional; el resto sigue. Devuelve {nombre: {estado, duracion, resultado, error}}.
+def ejecutar_grafo(etapas):
+    por_nombre = {etapa["nombre"]: etapa for etapa in etapas}
+    dependencias = dependencias_grafo(etapas)
+    productores = _productores(etapas)
+    obligatorias = {etapa["nombre"]: {productores[e] for e in etapa["entradas"] if e in productores} for etapa in etapas}
+    resultados = {}
+    pendientes = list(por_nombre)
+    en_curso = {}
+    eventos = queue.Queue()
+
+    while pendientes or en_curso:
+        for nombre in list(pendientes):
+            estados = [resultados[d]["estado"] if d in resultados else None for d in dependencias[nombre]]
+            fallidas = sorted(d for d, estado in zip(dependencias[nombre], estados) if d in obligatorias[nombre] and estado not in (None, CORRECTA))
+            if fallidas:
+                resultados[nombre] = {"estado": OMITIDA, "duracion": 0.0, "resultado": None, "error": f"depende de {', '.join(fallidas)}"}
+                pendientes.remove(nombre)
+            elif all(estado is not None for estado in estados):
+                etapa = por_nombre[nombre]
+                en_curso[nombre] = (time.monotonic(), None if etapa["timeout"] is None else time.monotonic() + etapa["timeout"])
+                pendientes.remove(nombre)
+                argumentos = ()
+                if etapa["opcionales"]:
+                    argumentos = (tuple(e for e in etapa["opcionales"] if e not in productores or resultados[productores[e]]["estado"] == CORRECTA),)
+                _lanzar(etapa, eventos, argumentos)
+        if not en_curso:
+            continue
+
+        limites = [limite for _, limite in en_curso.values() if limite is not None]
+        try:
+            nombre, estado, valor, duracion = eventos.get(timeout=max(0.0, min(limites) - time.monotonic()) if limites else None)
+        except queue.Empty:
+            ahora = time.monotonic()
+            for nombre, (inicio, limite) in list(en_curso.items()):
+                if limite is not None and ahora >= limite:
+                    del en_curso[nombre]
+                    print(f"La etapa '{nombre}' ha superado su tiempo máximo ({por_nombre[nombre]['timeout']} s); se continúa sin ella.")
+                    resultados[nombre] = {"estado": AGOTADA, "duracion": ahora - inicio, "resultado": None, "error": "tiempo agotado"}
+            continue
+        # Una etapa que termina después de agotar su tiempo ya no cuenta.
+        if en_curso.pop(nombre, None) is None:
+            continue
+        if estado == FALLIDA:
+            print(f"Error en la etapa '{nombre}': {valor}")
+            resultados[nombre] = {"estado": FALLIDA, "duracion": duracion, "resultado": None, "error": str(valor)}
+        else:
+            resultados[nombre] = {"estado": CORRECTA, "duracion": duracion, "resultado": valor, "error": None}
+    return resultados
+
+# Muestra el estado y la duración de cada etapa ejecutada por el grafo, en el orden en que se declararon.
+def mostrar_resumen_grafo(etapas, resultados, duracion_total):
+    print(f"\n--- RESUMEN DE ETAPAS ({duracion_total:.2f} s) ---")
+    for etapa in etapas:
+        resultado = resultados[etapa["nombre"]]
+        detalle = f"  ({resultado['error']})" if resultado["error"] else ""
+        print(f"{etapa['nombre']:<16} {resultado['estado']:<8} {resultado['duracion']:7.2f} s{detalle}")
@@ -0,0 +1,80 @@
+from bisect import bisect_left
+
+from multas import REGLAS_POR_DEFECTO
+from sanciones import intervalos_sancion, jornada_en_posicion, posicion_jornada
+
+# Estados de un jugador para la próxima jornada, de más a menos restrictivo.
+SANCIONADO = "sancionado"
+SIN_CAPITANIA = "sin_capitania"
+A_UNA_CAPITANIA = "a_una_capitania"
+
+# Índice de elegibilidad vacío de una división.
+def indice_vacio():
+    return {"capitanes_contados": {}, "contador": {}, "ronda": None, "equipos": {}}
+
+# Actualiza los contadores de capitanías con las jornadas nuevas o cambiadas del historial de capitanes ({ronda: [{team_name, capitan}]}).
+def actualizar_contador_capitanias(indice, capitanes_por_ronda):
+    contador = indice["contador"]
+    cambiadas = 0
+    for round_number, capitanes in capitanes_por_ronda.items():
+        clave = str(round_number)
+        actuales = {info['team_name']: info['capitan'] for info in capitanes if info['capitan'] != "N/A"}
+        previos = indice["capitanes_contados"].get(clave, {})
+        if previos == actuales:
+            continue
+        for team_name, capitan in previos.items():
+            contador[team_name][capitan] -= 1
+        for team_name, capitan in actuales.items():
+            contador.setdefault(team_name, {})[capitan] = contador.get(team_name, {}).get(capitan, 0) + 1
+        indice["capitanes_contados"][clave] = actuales
+        cambiadas += 1
+    return cambiadas
+
+# Estado de un jugador en una posición del calendario según sus sanciones: (estado, última jornada afectada) o None si no tiene
+# restricciones. Los intervalos se cuentan en posiciones del calendario, igual que en el motor de sanciones.
+def _estado_por_sanciones(sanciones, posicion, calendario, reglas):
+    estado = None
+    for sancion in sanciones:
+        if sancion.get('status') not in ('active', 'captain_banned'):
+            continue
+        fin_partidos, fin_capitania = intervalos_sancion(
+            posicion_jornada(calendario, sancion['jornada_triggered']),
+            sancion.get('games_to_serve', reglas['partidos_sancion']), reglas['jornadas_sin_capitania'],
+        )
+        if posicion <= fin_partidos:
+            return (SANCIONADO, jornada_en_posicion(calendario, fin_partidos))
+        if posicion <= fin_capitania:
+            estado = (SIN_CAPITANIA, jornada_en_posicion(calendario, fin_capitania))
+    return estado
+
+# Recalcula el índice de la próxima jornada a partir de los contadores de capitanías y del estado de las sanciones de la división.
+# calendario son las jornadas disputadas en orden; la próxima ocupa la posición que le correspondería en él.
+def recalcular_indice(indice, sanciones_division, proxima_ronda, calendario, reglas=REGLAS_POR_DEFECTO):
+    posicion = bisect_left(calendario, proxima_ronda)
+    equipos = {}
+    umbral = reglas['capitanias_para_sancion']
+    for team_name in set(indice["contador"]) | set(sanciones_division):
+        jugadores = {}
+        for jugador, sanciones in sanciones_division.get(team_name, {}).items():
+            estado = _estado_por_sanciones(sanciones, posicion, calendario, reglas)
+            if estado:
+                jugadores[jugador] = {"estado": estado[0], "hasta": estado[1]}
+        for jugador, capitanias in indice["contador"].get(team_name, {}).items():
+            if capitanias % umbral == umbral - 1 and jugador not in jugadores:
+                jugadores[jugador] = {"estado": A_UNA_CAPITANIA, "capitanias": capitanias}
+        if jugadores:
+            equipos[team_name] = jugadores
+    indice["ronda"] = proxima_ronda
+    indice["equipos"] = equipos
+    return indice
+
+# Estado de un jugador de un equipo para la próxima jornada (lectura directa en el índice); None si puede jugar y ser capitán.
+def estado_jugador(indice, team_name, jugador):
+    return indice["equipos"].get(team_name, {}).get(jugador)
+
+# Jugadores de un equipo agrupados por estado, ordenados por nombre.
+def jugadores_por_estado(indice, team_name):
+    grupos = {SANCIONADO: [], SIN_CAPITANIA: [], A_UNA_CAPITANIA: []}
+    for jugador, info in sorted(indice["equipos"].get(team_name, {}).items()):
+        grupos[info["estado"]].append((jugador, info))
+    return grupos
@@ -0,0 +1,123 @@
+from futmondo_api import huella_respuesta
+from multas import analizar_ronda
+
+# Estadísticas acumuladas vacías de una división: solo los totales, que es lo que leen el informe y la consulta.
+def estadisticas_vacias():
+    return {"jornadas": 0, "jugadores": {}, "equipos": {}}
+
+# Aportaciones por jornada ({jornada: {huella, aportacion}}): van en su propio archivo, que solo lee la actualización.
+def aportaciones_vacias():
+    return {}
+
+# Calcula lo que aporta una ronda a las estadísticas: por jugador y por equipo, a partir de sus alineaciones y sus multas.
+def aportacion_ronda(ronda, name_map, multas_jornada):
+    analisis = analizar_ronda(ronda['datos'], ronda['alineaciones'], name_map)
+    if not analisis:
+        return {"jugadores": {}, "equipos": {}}
+
+    jugadores = {}
+    puntos_equipo = {}
+    for combate in analisis['resumen']['Resultados por combate']:
+        for team_name, datos in combate.items():
+            if isinstance(datos, dict):
+                puntos_equipo[team_name] = datos['Puntuacion']
+    for team_name, lineup in analisis['entradas_multas']['dict_alineaciones'].items():
+        for player in lineup:
+            jugador = jugadores.setdefault(player['name'], {"apariciones": 0, "capitanias": 0, "puntos": 0, "peor_jornada": 0, "peor_capitan": 0})
+            # Un mismo jugador puede estar en varios equipos; sus puntos de la jornada solo cuentan una vez.
+            if jugador["apariciones"] == 0:
+                jugador["puntos"] = player.get('points', 0)
+            jugador["apariciones"] += 1
+            jugador["capitanias"] += 1 if player.get('cpt') else 0
+    for peor in analisis['resumen']['Peor Jugador']:
+        if peor['nombre'] in jugadores:
+            jugadores[peor['nombre']]["peor_jornada"] = 1
+    for peor in analisis['resumen']['Peor Capitan']:
+        if peor['nombre'] in jugadores:
+            jugadores[peor['nombre']]["peor_capitan"] = 1
+
+    equipos = {}
+    for team_name, puntos in puntos_equipo.items():
+        datos_multas = (multas_jornada or {}).get(team_name, {})
+        equipos[team_name] = {
+            "jornadas": 1,
+            "puntos": puntos,
+            "multa_total": datos_multas.get('multa_total', 0.0),
+            "multas": {concepto: d.get('multa', 0.0) for concepto, d in datos_multas.get('desglose', {}).items()},
+        }
+    return {"jugadores": jugadores, "equipos": equipos}
+
+# Suma (o resta, con signo -1) recursivamente los valores numéricos de una aportación sobre una tabla acumulada.
+def _acumular(tabla, aportacion, signo=1):
+    for clave, valor in aportacion.items():
+        if isinstance(valor, dict):
+            _acumular(tabla.setdefault(clave, {}), valor, signo)
+        else:
+            tabla[clave] = round(tabla.get(clave, 0) + signo * valor, 2)
+
+def _todo_cero(valor):
+    return all(_todo_cero(v) for v in valor.values()) if isinstance(valor, dict) else valor == 0
+
+# Resta de los totales la aportación de una jornada y la quita de las aportaciones. Los jugadores y equipos que se quedan a cero
+# se borran: retirar una jornada deja los totales como si nunca se hubiera sumado.
+def _retirar(estadisticas, aportaciones, clave):
+    previa = aportaciones.pop(clave)["aportacion"]
+    for tipo in ("jugadores", "equipos"):
+        _acumular(estadisticas[tipo], previa[tipo], -1)
+        for nombre in previa[tipo]:
+            if _todo_cero(estadisticas[tipo][nombre]):
+                del estadisticas[tipo][nombre]
+
+# Incorpora a las estadísticas las rondas nuevas o cambiadas de un flujo de pares (numero, ronda); las demás no se vuelven a recorrer.
+# Devuelve las rondas incorporadas.
+def actualizar_estadisticas(estadisticas, aportaciones, rondas, name_map, multas_por_jornada):
+    incorporadas = []
+    for round_number, ronda in rondas:
+        clave = str(round_number)
+        multas_jornada = multas_por_jornada.get(clave)
+        huella = huella_respuesta([ronda, multas_jornada])
+        previa = aportaciones.get(clave)
+        if previa and previa["huella"] == huella:
+            continue
+        aportacion = aportacion_ronda(ronda, name_map, multas_jornada)
+        if previa:
+            _retirar(estadisticas, aportaciones, clave)
+        _acumular(estadisticas["jugadores"], aportacion["jugadores"])
+        _acumular(estadisticas["equipos"], aportacion["equipos"])
+        aportaciones[clave] = {"huella": huella, "aportacion": aportacion}
+        incorporadas.append(round_number)
+    estadisticas["jornadas"] = len(aportaciones)
+    return incorporadas
+
+# Retira de las estadísticas las jornadas que ya no están en el calendario (claves de texto). Devuelve las retiradas.
+def retirar_rondas(estadisticas, aportaciones, vigentes):
+    retiradas = sorted(set(aportaciones) - set(vigentes))
+    for clave in retiradas:
+        _retirar(estadisticas, aportaciones, clave)
+    estadisticas["jornadas"] = len(aportaciones)
+    return retiradas
+
+# Fija en las estadísticas de cada equipo las multas por alineación indebida, que se recalculan enteras en la etapa de sanciones.
+def fijar_multas_indebidas(estadisticas, violaciones_division):
+    for team_name, datos in estadisticas["equipos"].items():
+        anterior = datos.get("multas_indebidas", 0.0)
+        actual = round(sum(v['multa'] for v in violaciones_division.get(team_name, [])), 2)
+        datos["multas_indebidas"] = actual
+        datos["multa_total"] = round(datos.get("multa_total", 0.0) - anterior + actual, 2)
+        datos.setdefault("multas", {})["alineacion_indebida"] = round(datos["multas"].get("alineacion_indebida", 0.0) - anterior + actual, 2)
+
+# Estadísticas de un jugador (lectura directa, sin recorrer jornadas).
+def estadisticas_jugador(estadisticas, nombre):
+    return estadisticas["jugadores"].get(nombre)
+
+# Estadísticas de un equipo, con la media de puntos por jornada.
+def estadisticas_equipo(estadisticas, team_name):
+    datos = estadisticas["equipos"].get(team_name)
+    if datos is None:
+        return None
+    return {**datos, "puntos_medios": round(datos["puntos"] / datos["jornadas"], 2) if datos.get("jornadas") else 0.0}
+
+# Los N jugadores con más valor en un campo (p. ej. 'capitanias' o 'peor_jornada').
+def ranking_jugadores(estadisticas, campo, n=10):
+    candidatos = [(nombre, datos) for nombre, datos in estadisticas["jugadores"].items() if datos.get(campo)]
+    return sorted(candidatos, key=lambda x: (-x[1][campo], x[0]))[:n]
@@ -0,0 +1,744 @@
+from collections import defaultdict
+import copy
+import glob
+import json
+import os
+
+from configuracion import (
+    AJUSTES_CLASIFICACION_FILE, API_URL_GENERAL, API_URL_TEAMS, API_URL_ROUNDS, CACHE_DIR, DATOS_INFORME_DIR, DIVISIONES,
+    INFORME_HTML, JORNADAS_TEMPORADA, LIBRO_ANALITICO, LOCAL_EXCEL_FILENAME, RECURSOS_INFORME_DIR, SANCIONES_FILE, TEMPORADA, VIOLACIONES_FILE,
+)
+from persistencia import (
+    bloqueo_archivo, cargar_payload, cargar_json, guardar_json, cargar_sanciones, guardar_sanciones, cargar_violaciones, guardar_violaciones,
+    escribir_atomico_con,
+)
+
+# Convierte la clave de una ronda leída de JSON (texto) a su número (entero o decimal).
+def clave_ronda(valor):
+    numero = float(valor)
+    return int(numero) if numero % 1 == 0 else numero
+
+# Interpreta un filtro de rondas como "12", "10-12" o "1,3,5-7" en una lista de intervalos cerrados.
+def parsear_filtro_rondas(texto):
+    intervalos = []
+    for parte in texto.split(','):
+        parte = parte.strip()
+        if not parte:
+            continue
+        inicio, _, fin = parte.partition('-')
+        intervalos.append((float(inicio), float(fin or inicio)))
+    if not intervalos:
+        raise ValueError(f"Filtro de rondas vacío: '{texto}'")
+    return intervalos
+
+# Interpreta una dimensión de la rejilla de simulación, p. ej. "multa_jugador_repetido=0.5,1" -> ("multa_jugador_repetido", [0.5, 1]).
+def parsear_rejilla(texto):
+    clave, separador, valores = texto.partition('=')
+    if not separador or not valores:
+        raise ValueError(f"Formato de rejilla no válido: '{texto}'")
+    return clave.strip(), [json.loads(v) for v in valores.split(',')]
+
+# Indica si una ronda entra en el filtro (sin filtro entran todas).
+def ronda_en_filtro(round_number, filtro):
+    return filtro is None or any(inicio <= round_number <= fin for inicio, fin in filtro)
+
+def _ruta_cache(division, nombre):
+    return os.path.join(CACHE_DIR, division, nombre)
+
+def _ruta_ronda(division, round_number):
+    return _ruta_cache(division, f"ronda_{round_number}.json")
+
+# Relaciona los nombres de la API con los nombres canónicos de la liga según el orden de la clasificación de la ronda.
+def construir_mapa_nombres(datos_ronda, equipos):
+    if datos_ronda and 'answer' in datos_ronda and 'ranking' in datos_ronda['answer']:
+        round_ranking = datos_ronda['answer']['ranking']
+        if len(round_ranking) >= len(equipos):
+            return {round_ranking[i]['name']: equipos[str(i + 1)] for i in range(len(equipos))}
+    return {}
+
+# Lee de la caché los datos generales de la temporada de una división, sin avisar si no existen.
+def _leer_temporada(division):
+    temporada = cargar_json(_ruta_cache(division, "temporada.json"))
+    if not temporada:
+        return None
+    temporada['rounds_map'] = {clave_ronda(k): v for k, v in temporada['rounds_map'].items()}
+    temporada['estado_rondas'] = {clave_ronda(k): v for k, v in temporada.get('estado_rondas', {}).items()}
+    if 'ultima_ronda' not in temporada:
+        temporada['ultima_ronda'] = max(temporada['rounds_map'], default=0)
+    return temporada
+
+# Carga de la caché los datos generales de la temporada de una división (clasificación, equipos y rondas).
+def cargar_temporada(division):
+    temporada = _leer_temporada(division)
+    if not temporada:
+        print(f"No hay datos en caché para la división '{division}'. Ejecuta primero 'fetch'.")
+    return temporada
+
+# Lee de la caché, una a una y en orden de calendario, las rondas descargadas de una división, opcionalmente filtradas: genera pares (numero, ronda).
+def iterar_rondas(division, temporada, filtro=None, avisar=True):
+    for round_number in sorted(temporada['rounds_map']):
+        if not ronda_en_filtro(round_number, filtro):
+            continue
+        ronda = cargar_json(_ruta_ronda(division, round_number))
+        if ronda is None:
+            if avisar:
+                print(f"     -> Aviso: La Jornada {round_number} de {division} no está en caché. Saltando.")
+            continue
+        yield round_number, ronda
+
+# Carga de la caché las rondas descargadas de una división, opcionalmente filtradas.
+def cargar_rondas(division, temporada, filtro=None):
+    return dict(iterar_rondas(division, temporada, filtro))
+
+# Obtiene el mapa de rondas: si la respuesta de rondas no ha cambiado desde la última descarga se reutiliza el de la caché.
+def _mapa_rondas(rounds_data, previa):
+    from futmondo_api import procesar_rondas_api, huella_respuesta
+
+    rounds_list = (rounds_data or {}).get('answer', [])
+    huella = huella_respuesta(rounds_list)
+    if previa and previa.get('huella_rondas') == huella:
+        return previa['rounds_map'], huella
+    return procesar_rondas_api(rounds_list), huella
+
+# Etapa 'fetch': descarga de la API la clasificación, los equipos y solo las rondas nuevas o aún abiertas con sus alineaciones.
+# En modo offline reconstruye todas las rondas desde el archivo de respuestas.
+def etapa_fetch(divisiones, filtro=None):
+    from archivo_api import guardar_indice_archivo
+    from futmondo_api import MODO_OFFLINE, llamar_api, obtener_datos_ronda, obtener_alineaciones_ronda, clasificar_ronda, planificar_descarga_rondas, resumen_peticiones
+
+    descargadas = []
+    for division in divisiones:
+        config = DIVISIONES[division]
+        print(f"\n--- OBTENIENDO DATOS DE FUTMONDO ({division.upper()}) ---")
+        payload = cargar_payload(config['payload'])
+        if not payload:
+            continue
+
+        datos_general = llamar_api(API_URL_GENERAL, copy.deepcopy(payload))
+        payload_teams = copy.deepcopy(payload)
+        payload_teams['query'] = {"championshipId": payload["query"]["championshipId"]}
+        datos_teams = llamar_api(API_URL_TEAMS, payload_teams)
+        rounds_data = llamar_api(API_URL_ROUNDS, copy.deepcopy(payload))
+        previa = _leer_temporada(division)
+        rounds_map, huella = _mapa_rondas(rounds_data, previa)
+        if not rounds_map:
+            print(f"Error: No se pudo obtener y procesar la lista de rondas de {division}.")
+            continue
+
+        ultima_ronda = max(rounds_map)
+        ultima_ronda_entera = max((n for n in rounds_map if n % 1 == 0), default=0)
+        estados = {n: e for n, e in (previa or {}).get('estado_rondas', {}).items() if n in rounds_map}
+        if filtro is None and not MODO_OFFLINE:
+            rondas_en_cache = {n for n in rounds_map if os.path.exists(_ruta_ronda(division, n))}
+            pendientes = planificar_descarga_rondas(rounds_map, (previa or {}).get('rounds_map', {}), estados, rondas_en_cache)
+            print(f"Jornadas nuevas o abiertas: {pendientes or 'ninguna'} ({len(rounds_map) - len(pendientes)} cerradas en caché).")
+        else:
+            pendientes = [n for n in sorted(rounds_map) if ronda_en_filtro(n, filtro)]
+
+        datos_ultima_ronda = None
+        for round_number in pendientes:
+            round_id = rounds_map[round_number]
+            print(f"Descargando Jornada {round_number}...")
+            datos_ronda = obtener_datos_ronda(payload, round_id)
+            if not datos_ronda:
+                print(f"     -> Error: No se pudieron obtener datos para la Jornada {round_number}. Saltando.")
+                continue
+            alineaciones = obtener_alineaciones_ronda(payload, round_id, datos_ronda)
+            if alineaciones is None:
+                print(f"     -> Error: Faltan alineaciones de la Jornada {round_number}; no se guarda y se volverá a descargar en la próxima ejecución.")
+                continue
+            guardar_json({"id": round_id, "datos": datos_ronda, "alineaciones": alineaciones}, _ruta_ronda(division, round_number))
+            estados[round_number] = clasificar_ronda(round_number, ultima_ronda_entera)
+            if round_number == ultima_ronda:
+                datos_ultima_ronda = datos_ronda
+
+        if datos_ultima_ronda is None:
+            ronda_cache = cargar_json(_ruta_ronda(division, ultima_ronda))
+            datos_ultima_ronda = ronda_cache['datos'] if ronda_cache else obtener_datos_ronda(payload, rounds_map[ultima_ronda])
+
+        guardar_json({
+            "general": datos_general,
+            "teams": datos_teams,
+            "rounds_map": rounds_map,
+            "huella_rondas": huella,
+            "estado_rondas": estados,
+            "ultima_ronda": ultima_ronda,
+            "name_map": construir_mapa_nombres(datos_ultima_ronda, config['equipos']),
+        }, _ruta_cache(division, "temporada.json"))
+        descargadas.append(division)
+    guardar_indice_archivo()
+    resumen = resumen_peticiones()
+    if resumen:
+        print(f"Peticiones a la API: {resumen}.")
+    return descargadas
+
+# Etapa 'fines': calcula las multas de las rondas en caché y las fusiona con las ya calculadas.
+# Las rondas fluyen de disco a multas, estadísticas e histórico de una en una; solo se conservan los resultados por jornada.
+def etapa_multas(divisiones, filtro=None):
+    from multas import iterar_multas_jornadas
+
+    for division in divisiones:
+        temporada = cargar_temporada(division)
+        if not temporada:
+            continue
+        name_map = temporada['name_map']
+        ruta_multas = _ruta_cache(division, "multas.json")
+        ruta_coincidencias = _ruta_cache(division, "coincidencias.json")
+        with bloqueo_archivo(ruta_multas), bloqueo_archivo(ruta_coincidencias):
+            multas_por_jornada = cargar_json(ruta_multas, {}) if filtro else {}
+            coincidencias_por_jornada = cargar_json(ruta_coincidencias, {}) if filtro else {}
+            for jornada in iterar_multas_jornadas(iterar_rondas(division, temporada, filtro), name_map, division):
+                multas_por_jornada[str(jornada['numero'])] = jornada['multas']
+                coincidencias_por_jornada[str(jornada['numero'])] = jornada['coincidencias']
+            guardar_json(multas_por_jornada, ruta_multas)
+            guardar_json(coincidencias_por_jornada, ruta_coincidencias)
+        _actualizar_estadisticas_division(division, iterar_rondas(division, temporada, filtro, avisar=False), name_map, multas_por_jornada, temporada['rounds_map'])
+        # El histórico es acumulado: con un filtro de jornadas se recorre igualmente toda la temporada en caché.
+        _actualizar_historico_clasificacion(division, iterar_rondas(division, temporada, avisar=False), name_map)
+
+# Incorpora a las estadísticas acumuladas de una división las jornadas nuevas o cambiadas y retira las que ya no están en el calendario.
+# Los totales (estadisticas.json) y las aportaciones por jornada (estadisticas_rondas.json) se guardan por separado: solo este paso lee las segundas.
+def _actualizar_estadisticas_division(division, rondas, name_map, multas_por_jornada, vigentes):
+    from estadisticas import estadisticas_vacias, aportaciones_vacias, actualizar_estadisticas, retirar_rondas
+
+    ruta = _ruta_cache(division, "estadisticas.json")
+    ruta_aportaciones = _ruta_cache(division, "estadisticas_rondas.json")
+    with bloqueo_archivo(ruta), bloqueo_archivo(ruta_aportaciones):
+        estadisticas = cargar_json(ruta) or estadisticas_vacias()
+        # Formato anterior: las aportaciones iban dentro de estadisticas.json, en "rondas".
+        migradas = estadisticas.pop("rondas", None)
+        aportaciones = migradas if migradas is not None else cargar_json(ruta_aportaciones) or aportaciones_vacias()
+        incorporadas = actualizar_estadisticas(estadisticas, aportaciones, rondas, name_map, multas_por_jornada)
+        retiradas = retirar_rondas(estadisticas, aportaciones, [str(n) for n in vigentes])
+        if incorporadas or retiradas or migradas is not None:
+            guardar_json(aportaciones, ruta_aportaciones)
+            guardar_json(estadisticas, ruta)
+    print(f"Estadísticas de {division}: {len(incorporadas)} jornadas incorporadas, {len(retiradas)} retiradas, "
+          f"{estadisticas['jornadas'] - len(incorporadas)} sin cambios.")
+
+# Incorpora al histórico de clasificaciones por jornada de una división las jornadas nuevas o cambiadas.
+def _actualizar_historico_clasificacion(division, rondas, name_map):
+    from clasificacion import historico_vacio, actualizar_historico
+
+    ruta = _ruta_cache(division, "clasificaciones.json")
+    with bloqueo_archivo(ruta):
+        historico = cargar_json(ruta) or historico_vacio()
+        recalculadas = actualizar_historico(historico, rondas, name_map)
+        if recalculadas:
+            guardar_json(historico, ruta)
+    print(f"Clasificaciones por jornada de {division}: {len(recalculadas)} recalculadas, {len(historico['jornadas']) - len(recalculadas)} sin cambios.")
+    _actualizar_matriz_evolucion(division, historico)
+
+# Añade a la matriz equipos × jornadas de una división las columnas de las jornadas nuevas o cambiadas del histórico.
+def _actualizar_matriz_evolucion(division, historico):
+    try:
+        from evolucion import matriz_vacia, actualizar_matriz
+    except ImportError as e:
+        print(f"No se puede actualizar la evolución de la clasificación (falta una dependencia: {e.name}).")
+        return
+
+    ruta = _ruta_cache(division, "evolucion.json")
+    with bloqueo_archivo(ruta):
+        matriz = cargar_json(ruta) or matriz_vacia()
+        if actualizar_matriz(matriz, historico):
+            guardar_json(matriz, ruta)
+
+# Etapa 'sanctions': reprocesa cronológicamente todas las rondas en caché para actualizar sanciones y capitanes.
+def etapa_sanciones(divisiones):
+    from multas import procesar_sanciones_y_capitanes
+
+    # El bloqueo cubre toda la lectura-modificación-escritura para que dos ejecuciones solapadas no pierdan sanciones.
+    with bloqueo_archivo(SANCIONES_FILE), bloqueo_archivo(VIOLACIONES_FILE):
+        sanciones = cargar_sanciones(SANCIONES_FILE)
+        violaciones = cargar_violaciones(VIOLACIONES_FILE)
+        nuevas_sanciones = {}
+        for division in divisiones:
+            temporada = cargar_temporada(division)
+            if not temporada:
+                continue
+            capitanes, sanciones_division, nuevas_division, violaciones_division = procesar_sanciones_y_capitanes(
+                iterar_rondas(division, temporada), temporada['name_map'], division, sanciones.get(division, {})
+            )
+            sanciones[division] = sanciones_division
+            violaciones[division] = dict(violaciones_division)
+            nuevas_sanciones[division] = dict(nuevas_division)
+            guardar_json(capitanes, _ruta_cache(division, "capitanes.json"))
+            _fijar_indebidas_estadisticas(division, violaciones[division])
+            _actualizar_elegibilidad(division, capitanes, sanciones_division, int(temporada['ultima_ronda']) + 1)
+
+        guardar_sanciones(sanciones, SANCIONES_FILE)
+        guardar_violaciones(violaciones, VIOLACIONES_FILE)
+    return nuevas_sanciones, violaciones
+
+# Lleva a las estadísticas de una división las multas por alineación indebida recién recalculadas.
+def _fijar_indebidas_estadisticas(division, violaciones_division):
+    from estadisticas import fijar_multas_indebidas
+
+    ruta = _ruta_cache(division, "estadisticas.json")
+    with bloqueo_archivo(ruta):
+        estadisticas = cargar_json(ruta)
+        if estadisticas:
+            fijar_multas_indebidas(estadisticas, violaciones_division)
+            guardar_json(estadisticas, ruta)
+
+# Actualiza el índice de elegibilidad de capitanes de una división para la próxima jornada.
+def _actualizar_elegibilidad(division, capitanes, sanciones_division, proxima_ronda):
+    from elegibilidad import indice_vacio, actualizar_contador_capitanias, recalcular_indice
+
+    ruta = _ruta_cache(division, "elegibilidad.json")
+    indice = cargar_json(ruta) or indice_vacio()
+    actualizar_contador_capitanias(indice, capitanes)
+    recalcular_indice(indice, sanciones_division, proxima_ronda, sorted(capitanes))
+    guardar_json(indice, ruta)
+
+# Resume las estadísticas acumuladas de una división para el informe: rankings de jugadores y tabla de equipos.
+def _resumen_estadisticas(division):
+    from estadisticas import ranking_jugadores, estadisticas_equipo
+
+    estadisticas = cargar_json(_ruta_cache(division, "estadisticas.json"))
+    if not estadisticas:
+        return None
+    return {
+        "mas_capitanes": ranking_jugadores(estadisticas, "capitanias"),
+        "mas_veces_peor": ranking_jugadores(estadisticas, "peor_jornada"),
+        "equipos": {team_name: estadisticas_equipo(estadisticas, team_name) for team_name in sorted(estadisticas["equipos"])},
+    }
+
+# Pares de equipos de una división que más jugadores han compartido en la temporada, para el informe.
+def _resumen_coincidencias(division, n=20):
+    from alineaciones_bits import coincidencias_temporada
+
+    coincidencias_por_jornada = cargar_json(_ruta_cache(division, "coincidencias.json"))
+    if not coincidencias_por_jornada:
+        return None
+    totales = coincidencias_temporada(coincidencias_por_jornada.values())
+    pares = sorted(totales.items(), key=lambda x: (-x[1][0], x[0]))[:n]
+    return {
+        "jornadas": len(coincidencias_por_jornada),
+        "pares": [{"equipos": list(par), "compartidos": compartidos, "jornadas": jornadas} for par, (compartidos, jornadas) in pares],
+    }
+
+# Evolución de la clasificación de una división para el gráfico del informe: posición y puntos de cada equipo tras cada jornada.
+def _resumen_evolucion(division, temporada):
+    try:
+        from evolucion import matriz_ajustes, calcular_evolucion, datos_grafico
+        from clasificacion import cargar_ajustes, orden_api
+    except ImportError:
+        return None
+
+    matriz = cargar_json(_ruta_cache(division, "evolucion.json"))
+    if not matriz or not matriz["rondas"]:
+        return None
+    orden = orden_api(temporada['general'], temporada['name_map']) if temporada.get('general') else None
+    return datos_grafico(matriz, calcular_evolucion(matriz, matriz_ajustes(matriz, cargar_ajustes(), division), orden))
+
+# Índice de elegibilidad de una división para el informe y el correo (sin los contadores internos).
+def _resumen_elegibilidad(division):
+    indice = cargar_json(_ruta_cache(division, "elegibilidad.json"))
+    if not indice or indice.get("ronda") is None:
+        return None
+    return {"ronda": indice["ronda"], "equipos": indice["equipos"]}
+
+# Calcula la clasificación ordenada de una división a partir de los datos en caché.
+def _clasificacion_desde_cache(division, temporada):
+    from clasificacion import procesar_y_ordenar_clasificacion, cargar_ajustes, ajustes_por_equipo
+
+    if not temporada.get('general') or not temporada.get('teams'):
+        return None
+    ajustes = ajustes_por_equipo(cargar_ajustes(), division)
+    return procesar_y_ordenar_clasificacion(temporada['general'], temporada['teams'], temporada['name_map'], ajustes)
+
+# Etapa 'excel': actualiza las clasificaciones y el histórico de capitanes en el Excel local o de OneDrive.
+def etapa_excel(divisiones, filtro=None, destino='local'):
+    import io
+    import openpyxl
+
+    print("\n--- PROCESANDO ARCHIVO EXCEL ---")
+    datos_divisiones = {}
+    for division in divisiones:
+        temporada = cargar_temporada(division)
+        clasificacion = _clasificacion_desde_cache(division, temporada) if temporada else None
+        if clasificacion is None:
+            print("Faltan datos clave de la API para el Excel. Saltando actualización del Excel.")
+            return
+        datos_divisiones[division] = (temporada, clasificacion)
+
+    if destino == 'onedrive-rangos':
+        _etapa_excel_rangos(datos_divisiones, filtro)
+        return
+
+    try:
+        if destino == 'onedrive':
+            from onedrive import ONEDRIVE_SHARE_LINK, get_access_token, get_drive_item_from_share_link, download_excel_from_onedrive, upload_excel_to_onedrive
+            access_token = get_access_token()
+            if not access_token: raise Exception("No se pudo obtener el token de acceso.")
+            drive_id, item_id = get_drive_item_from_share_link(access_token, ONEDRIVE_SHARE_LINK)
+            excel_content = download_excel_from_onedrive(access_token, drive_id, item_id)
+            workbook = openpyxl.load_workbook(io.BytesIO(excel_content))
+        else:
+            workbook = openpyxl.load_workbook(LOCAL_EXCEL_FILENAME)
+
+        _actualizar_libro(workbook, datos_divisiones, filtro)
+
+        if destino == 'onedrive':
+            buffer = io.BytesIO()
+            workbook.save(buffer)
+            upload_excel_to_onedrive(access_token, drive_id, item_id, buffer.getvalue())
+        else:
+            # Se guarda de forma atómica: si la etapa se abandona por tiempo, el Excel anterior queda intacto.
+            escribir_atomico_con(workbook.save, LOCAL_EXCEL_FILENAME)
+            print(f"\nArchivo '{LOCAL_EXCEL_FILENAME}' guardado localmente.")
+    except Exception as e:
+        print(f"Error durante el procesamiento del Excel: {e}")
+        raise
+
+# Aplica al libro (en memoria) las clasificaciones y el histórico de capitanes de las divisiones.
+def _actualizar_libro(workbook, datos_divisiones, filtro):
+    from hoja_excel import actualizar_cabeceras_capitanes, actualizar_hoja_excel, actualizar_capitanes_historico
+
+    actualizar_cabeceras_capitanes(workbook, [(c['etiqueta'], c['equipos'], c['columna_capitanes']) for c in DIVISIONES.values()])
+    for division, (temporada, clasificacion) in datos_divisiones.items():
+        config = DIVISIONES[division]
+        actualizar_hoja_excel(workbook, clasificacion, config['hoja_clasificacion'], config['fila_inicio'], config['columna_inicio'])
+    for division, (temporada, _) in datos_divisiones.items():
+        rondas = cargar_rondas(division, temporada, filtro)
+        actualizar_capitanes_historico(workbook, rondas, DIVISIONES[division]['etiqueta'], temporada['name_map'])
+
+# Actualiza el Excel de OneDrive escribiendo solo los rangos que cambian, dentro de una sesión del libro y sin descargar el archivo.
+def _etapa_excel_rangos(datos_divisiones, filtro):
+    from hoja_excel import cargar_libro_desde_valores, valores_libro, calcular_rangos_modificados
+    from onedrive import ONEDRIVE_SHARE_LINK, get_access_token, get_drive_item_from_share_link, crear_sesion_libro, cerrar_sesion_libro, leer_rango_usado, escribir_rangos_por_lotes
+
+    try:
+        access_token = get_access_token()
+        if not access_token: raise Exception("No se pudo obtener el token de acceso.")
+        drive_id, item_id = get_drive_item_from_share_link(access_token, ONEDRIVE_SHARE_LINK)
+        session_id = crear_sesion_libro(access_token, drive_id, item_id)
+        try:
+            hojas = [DIVISIONES[division]['hoja_clasificacion'] for division in datos_divisiones] + ["Capitanes"]
+            workbook = cargar_libro_desde_valores({hoja: leer_rango_usado(access_token, drive_id, item_id, session_id, hoja) for hoja in hojas})
+            valores_previos = valores_libro(workbook)
+            _actualizar_libro(workbook, datos_divisiones, filtro)
+            rangos = calcular_rangos_modificados(valores_previos, workbook)
+            if rangos:
+                escribir_rangos_por_lotes(access_token, drive_id, item_id, session_id, rangos)
+            else:
+                print("El Excel de OneDrive ya estaba al día; no hay rangos que escribir.")
+        finally:
+            cerrar_sesion_libro(access_token, drive_id, item_id, session_id)
+    except Exception as e:
+        print(f"Error durante la actualización por rangos del Excel: {e}")
+        raise
+
+# Multas por jornada de una división desde la caché, en orden de jornada y con las alineaciones indebidas integradas, y sus totales por equipo.
+def _multas_con_indebidas(division, violaciones):
+    from multas import integrar_violaciones
+
+    multas_por_jornada = cargar_json(_ruta_cache(division, "multas.json"), {})
+    datos_jornadas = sorted(
+        ({'numero': clave_ronda(k), 'multas': v} for k, v in multas_por_jornada.items()),
+        key=lambda x: x['numero']
+    )
+    totales = defaultdict(float)
+    for jornada in datos_jornadas:
+        for team, data in jornada['multas'].items():
+            totales[team] += data.get('multa_total', 0.0)
+    totales = dict(totales)
+    integrar_violaciones(datos_jornadas, totales, violaciones)
+    return datos_jornadas, totales
+
+# Reúne desde la caché los datos del informe de una división, con las alineaciones indebidas integradas.
+# Sin incluir_proyeccion no se lee la proyección en caché (que podría ser de otra ejecución) y el informe sale sin ella.
+def _datos_informe_division(division, temporada, sanciones, violaciones, incluir_proyeccion=True):
+    datos_jornadas, totales = _multas_con_indebidas(division, violaciones)
+
+    capitanes = {clave_ronda(k): v for k, v in cargar_json(_ruta_cache(division, "capitanes.json"), {}).items()}
+    return {
+        "jornadas": datos_jornadas,
+        "totales": totales,
+        "clasificacion": _clasificacion_desde_cache(division, temporada) or [],
+        "evolucion": _resumen_evolucion(division, temporada),
+        "coincidencias": _resumen_coincidencias(division),
+        "capitanes": capitanes,
+        "sanciones": sanciones,
+        "violaciones": violaciones,
+        "violaciones_historico": violaciones,
+        "proyeccion": cargar_json(_ruta_cache(division, "proyeccion.json")) if incluir_proyeccion else None,
+        "estadisticas": _resumen_estadisticas(division),
+        "elegibilidad": _resumen_elegibilidad(division),
+    }
+
+# Etapa 'report': genera el informe HTML y los datos por división a partir de la caché (con o sin la proyección).
+def etapa_informe(incluir_proyeccion=True):
+    from informe_html import generar_pagina_html_completa, exportar_datos_informe
+    from recursos_estaticos import escribir_cabeceras_hosting
+
+    sanciones = cargar_sanciones(SANCIONES_FILE)
+    violaciones = cargar_violaciones(VIOLACIONES_FILE)
+    datos_informe = {}
+    current_matchday = 0
+    for division in DIVISIONES:
+        temporada = cargar_temporada(division)
+        if not temporada:
+            continue
+        datos_informe[division] = _datos_informe_division(division, temporada, sanciones.get(division, {}), violaciones.get(division, {}), incluir_proyeccion)
+        current_matchday = max(current_matchday, temporada['ultima_ronda'])
+
+    if not datos_informe:
+        print("No hay datos en caché para generar el informe.")
+        return []
+    rutas = generar_pagina_html_completa(datos_informe, INFORME_HTML, current_matchday)
+    rutas += exportar_datos_informe(datos_informe, DATOS_INFORME_DIR)
+    return rutas + [escribir_cabeceras_hosting(os.path.dirname(INFORME_HTML), RECURSOS_INFORME_DIR, DATOS_INFORME_DIR)]
+
+# Etapa 'analytics': genera en streaming el libro de analítica con multas, capitanes, sanciones y alineaciones indebidas.
+def etapa_libro_analitico(ruta_salida=LIBRO_ANALITICO):
+    from libro_analitico import generar_libro_analitico
+
+    print("\n--- GENERANDO LIBRO DE ANALÍTICA ---")
+    sanciones = cargar_sanciones(SANCIONES_FILE)
+    violaciones = cargar_violaciones(VIOLACIONES_FILE)
+    datos_divisiones = {}
+    for division in DIVISIONES:
+        temporada = cargar_temporada(division)
+        if temporada:
+            datos_divisiones[division] = _datos_informe_division(division, temporada, sanciones.get(division, {}), violaciones.get(division, {}))
+    if not datos_divisiones:
+        print("No hay datos en caché para generar el libro de analítica.")
+        return
+    try:
+        generar_libro_analitico(datos_divisiones, {d: DIVISIONES[d]['etiqueta'] for d in datos_divisiones}, ruta_salida)
+    except Exception as e:
+        print(f"Error al generar el libro de analítica: {e}")
+        raise
+
+# Etapa 'publish': publica el informe y sus datos en GitHub si están configuradas las variables de entorno.
+def etapa_publicar():
+    github_token = os.getenv("GITHUB_TOKEN")
+    github_username = os.getenv("GITHUB_USERNAME")
+    github_repo = os.getenv("GITHUB_REPO")
+    if not all([github_token, github_username, github_repo]):
+        print("\n--- AVISO: Faltan variables de entorno de GitHub (.env) para la subida automática. ---")
+        return False
+
+    from publicacion import publicar_artefactos
+    from recursos_estaticos import ARCHIVO_CABECERAS
+    remote_url = f"https://{github_token}@github.com/{github_username}/{github_repo}.git"
+    # El informe, sus variantes precomprimidas, los scripts con huella y los datos por división.
+    rutas_informe = sorted(glob.glob(glob.escape(INFORME_HTML) + "*"))
+    rutas_recursos = sorted(glob.glob(os.path.join(RECURSOS_INFORME_DIR, "*")))
+    rutas_datos = sorted(glob.glob(os.path.join(DATOS_INFORME_DIR, "*.json*")))
+    rutas_cabeceras = glob.glob(os.path.join(os.path.dirname(INFORME_HTML), ARCHIVO_CABECERAS))
+    return publicar_artefactos([*rutas_informe, *rutas_recursos, *rutas_datos, *rutas_cabeceras], remote_url, os.getenv("GITHUB_BRANCH", "main"))
+
+# Etapa 'email': envía el informe de sanciones guardado en disco.
+def etapa_email():
+    sanciones = cargar_sanciones(SANCIONES_FILE)
+    violaciones = cargar_violaciones(VIOLACIONES_FILE)
+    if not any(sanciones.values()) and not any(violaciones.values()):
+        print("No hay datos de sanciones o violaciones guardados para enviar.")
+        return
+
+    from correo import enviar_correo_sanciones
+    elegibilidad = {division: _resumen_elegibilidad(division) for division in DIVISIONES}
+    enviar_correo_sanciones(sanciones, violaciones, {d: e for d, e in elegibilidad.items() if e})
+
+# Etapa 'simulate': evalúa variantes de las reglas de multas y sanciones sobre la temporada en caché.
+def etapa_simulacion(divisiones, filtro=None, ruta_variantes=None, rejilla=None, procesos=None, salida="simulacion.json"):
+    from multas import construir_reglas
+    from simulador import preparar_datos_temporada, simular_variantes, generar_variantes_rejilla, cargar_variantes, imprimir_resumen_simulacion
+
+    variantes = []
+    if ruta_variantes:
+        variantes.extend(cargar_variantes(ruta_variantes))
+    if rejilla:
+        variantes.extend(generar_variantes_rejilla(dict(rejilla)))
+    if not variantes:
+        variantes.append(construir_reglas())
+
+    datos_divisiones = {}
+    for division in divisiones:
+        temporada = cargar_temporada(division)
+        if not temporada:
+            continue
+        datos_divisiones[division] = preparar_datos_temporada(cargar_rondas(division, temporada, filtro), temporada['name_map'])
+    if not datos_divisiones:
+        return None
+
+    resultados = simular_variantes(datos_divisiones, variantes, procesos)
+    guardar_json(resultados, salida)
+    imprimir_resumen_simulacion(resultados)
+    print(f"\nResultados de la simulación guardados en '{salida}'.")
+    return resultados
+
+# Etapa 'project': proyecta la clasificación final de cada división con Monte Carlo y guarda las probabilidades para el informe.
+def etapa_proyeccion(divisiones, simulaciones=None, procesos=None, semilla=None):
+    try:
+        from proyeccion import SIMULACIONES_POR_DEFECTO, preparar_datos_proyeccion, proyectar_clasificacion, resumir_proyeccion
+    except ImportError as e:
+        print(f"No se puede proyectar la clasificación (falta una dependencia: {e.name}).")
+        return None
+
+    simulaciones = simulaciones or SIMULACIONES_POR_DEFECTO
+    resultados = {}
+    for division in divisiones:
+        temporada = cargar_temporada(division)
+        clasificacion = _clasificacion_desde_cache(division, temporada) if temporada else None
+        if not clasificacion:
+            continue
+        datos = preparar_datos_proyeccion(cargar_rondas(division, temporada), temporada['name_map'], clasificacion, JORNADAS_TEMPORADA)
+        print(f"\n--- PROYECCIÓN DE {division.upper()}: {simulaciones} temporadas, {datos['jornadas_restantes']} jornadas restantes ---")
+        probabilidades = proyectar_clasificacion(datos, simulaciones, procesos, semilla)
+        resumen = resumir_proyeccion(datos, probabilidades, simulaciones, DIVISIONES[division].get('plazas_descenso', 0))
+        for equipo in resumen['equipos'][:3]:
+            print(f"{equipo['name']}: {equipo['campeon']:.1%} campeón, posición media {equipo['posicion_media']}")
+        guardar_json(resumen, _ruta_cache(division, "proyeccion.json"))
+        resultados[division] = resumen
+    return resultados
+
+# Etapa 'standings': muestra la clasificación actual o la que había tras una jornada, leída del histórico acumulado.
+def etapa_clasificacion(divisiones, jornada=None):
+    from clasificacion import cargar_ajustes, ajustes_por_equipo, clasificacion_en_jornada, orden_api
+
+    registro = cargar_ajustes()
+    for division in divisiones:
+        if jornada is None:
+            temporada = cargar_temporada(division)
+            clasificacion = _clasificacion_desde_cache(division, temporada) if temporada else None
+            titulo = "ACTUAL"
+        else:
+            historico = cargar_json(_ruta_cache(division, "clasificaciones.json"))
+            if not historico:
+                print(f"No hay histórico de clasificaciones de '{division}'. Ejecuta primero 'fines'.")
+                continue
+            temporada = cargar_temporada(division)
+            orden = orden_api(temporada['general'], temporada['name_map']) if temporada and temporada.get('general') else None
+            clasificacion = clasificacion_en_jornada(historico, jornada, ajustes_por_equipo(registro, division, jornada), orden)
+            titulo = f"TRAS LA JORNADA {jornada}"
+        if not clasificacion:
+            continue
+        print(f"\n--- CLASIFICACIÓN {titulo} DE {division.upper()} (ajustes v{registro.get('version', 0)}) ---")
+        for posicion, equipo in enumerate(clasificacion, 1):
+            comentario = f"  ({equipo['comentario']})" if equipo['comentario'] else ""
+            print(f"{posicion:>2}. {equipo['name']}: {equipo['points']} pts, {equipo['general_points']} generales{comentario}")
+
+# Etapa 'stats': muestra las estadísticas acumuladas de un jugador, de un equipo o los rankings de cada división.
+def etapa_estadisticas(divisiones, jugador=None, equipo=None):
+    from estadisticas import estadisticas_jugador, estadisticas_equipo, ranking_jugadores
+
+    for division in divisiones:
+        estadisticas = cargar_json(_ruta_cache(division, "estadisticas.json"))
+        if not estadisticas:
+            print(f"No hay estadísticas de '{division}'. Ejecuta primero 'fines'.")
+            continue
+        print(f"\n--- ESTADÍSTICAS DE {division.upper()} ({estadisticas.get('jornadas', len(estadisticas.get('rondas', {})))} jornadas) ---")
+        if jugador:
+            print(f"{jugador}: {estadisticas_jugador(estadisticas, jugador) or 'sin apariciones'}")
+        if equipo:
+            print(f"{equipo}: {estadisticas_equipo(estadisticas, equipo) or 'sin datos'}")
+        if not (jugador or equipo):
+            for titulo, campo in (("Más veces capitán", "capitanias"), ("Más veces peor jugador", "peor_jornada")):
+                print(f"{titulo}: " + ", ".join(f"{nombre} ({datos[campo]})" for nombre, datos in ranking_jugadores(estadisticas, campo, 5)))
+
+# Etapa 'snapshot': archiva la temporada en caché de cada división como instantánea comprimida para las consultas entre temporadas.
+def etapa_instantanea(divisiones, nombre_temporada=TEMPORADA):
+    try:
+        from archivo_temporadas import construir_instantanea, guardar_instantanea, ruta_instantanea
+        from libro_analitico import CONCEPTOS_MULTAS
+    except ImportError as e:
+        print(f"No se puede archivar la temporada (falta una dependencia: {e.name}).")
+        return
+
+    violaciones = cargar_violaciones(VIOLACIONES_FILE)
+    for division in divisiones:
+        temporada = cargar_temporada(division)
+        if not temporada:
+            continue
+        datos_jornadas, _ = _multas_con_indebidas(division, violaciones.get(division, {}))
+        multas_por_jornada = {jornada['numero']: jornada['multas'] for jornada in datos_jornadas}
+        ruta = ruta_instantanea(nombre_temporada, division)
+        try:
+            arrays = construir_instantanea(iterar_rondas(division, temporada), multas_por_jornada, temporada['name_map'],
+                                           [concepto for concepto, _ in CONCEPTOS_MULTAS])
+            guardar_instantanea(arrays, ruta)
+        except Exception as e:
+            print(f"Error al archivar la temporada {nombre_temporada} de '{division}': {e}")
+            continue
+        print(f"Temporada {nombre_temporada} de '{division}' archivada en '{ruta}' "
+              f"({len(arrays['equipos'])} equipos, {len(arrays['rondas'])} jornadas, {os.path.getsize(ruta) / 1024:.1f} KiB).")
+
+# Etapa 'history': responde a consultas entre temporadas sobre las instantáneas archivadas.
+def etapa_historico(consulta="multas", top=10):
+    try:
+        from archivo_temporadas import abrir_archivo_temporadas, equipos_mas_multados, rachas_capitania
+    except ImportError as e:
+        print(f"No se puede consultar el archivo de temporadas (falta una dependencia: {e.name}).")
+        return
+
+    instantaneas = abrir_archivo_temporadas()
+    if not instantaneas:
+        print("No hay temporadas archivadas. Ejecuta primero 'snapshot'.")
+        return
+    temporadas = sorted({temporada for temporada, _, _ in instantaneas})
+    if consulta == "multas":
+        print(f"\n--- EQUIPOS MÁS MULTADOS ({', '.join(temporadas)}) ---")
+        for posicion, (equipo, total, por_temporada) in enumerate(equipos_mas_multados(instantaneas, top), 1):
+            detalle = ", ".join(f"{temporada}: {importe:.2f}€" for temporada, importe in sorted(por_temporada.items()))
+            print(f"{posicion:>2}. {equipo}: {total:.2f}€ ({detalle})")
+    else:
+        print(f"\n--- RACHAS DE CAPITANÍA MÁS LARGAS ({', '.join(temporadas)}) ---")
+        for posicion, racha in enumerate(rachas_capitania(instantaneas, top), 1):
+            (desde_temporada, desde_jornada), (hasta_temporada, hasta_jornada) = racha['desde'], racha['hasta']
+            print(f"{posicion:>2}. {racha['equipo']}: {racha['jugador']} capitán {racha['jornadas']} jornadas seguidas "
+                  f"(J{desde_jornada} {desde_temporada} - J{hasta_jornada} {hasta_temporada})")
+
+# Estado de la temporada que sirve la API local: por división, clasificación, multas (acumuladas y por jornada, con las
+# alineaciones indebidas integradas), sanciones, alineaciones indebidas y capitanes.
+def cargar_estado_api():
+    sanciones = cargar_sanciones(SANCIONES_FILE)
+    violaciones = cargar_violaciones(VIOLACIONES_FILE)
+    estado = {}
+    for division in DIVISIONES:
+        temporada = _leer_temporada(division)
+        if not temporada:
+            continue
+        datos_jornadas, totales = _multas_con_indebidas(division, violaciones.get(division, {}))
+        estado[division] = {
+            "ultima_ronda": temporada['ultima_ronda'],
+            "clasificacion": _clasificacion_desde_cache(division, temporada) or [],
+            "jornadas": datos_jornadas,
+            "totales": totales,
+            "sanciones": sanciones.get(division, {}),
+            "violaciones": violaciones.get(division, {}),
+            "capitanes": {clave_ronda(k): v for k, v in cargar_json(_ruta_cache(division, "capitanes.json"), {}).items()},
+        }
+    return estado
+
+# Firma (ruta, tamaño y fecha de modificación) de los archivos de los que sale el estado de la API; cambia cuando una ejecución los reescribe.
+def firma_estado_api():
+    rutas = [SANCIONES_FILE, VIOLACIONES_FILE, AJUSTES_CLASIFICACION_FILE]
+    for division in DIVISIONES:
+        rutas += [_ruta_cache(division, nombre) for nombre in ("temporada.json", "multas.json", "capitanes.json")]
+    firma = []
+    for ruta in rutas:
+        try:
+            estado = os.stat(ruta)
+        except OSError:
+            continue
+        firma.append((ruta, estado.st_size, estado.st_mtime_ns))
+    return tuple(firma)
+
+# Etapa 'serve': sirve la clasificación, las multas, las sanciones y los capitanes como API JSON local de solo lectura,
+# recargando los datos cuando termina una nueva ejecución, hasta que se interrumpe con Ctrl+C.
+def etapa_api(host="127.0.0.1", puerto=8780):
+    import threading
+    from api_local import INTERVALO_RECARGA, iniciar_api_local
+
+    servidor, contenedor, base = iniciar_api_local(cargar_estado_api, firma_estado_api, host, puerto)
+    print(f"API local en {base}/api ({len(contenedor['estado']['respuestas'])} rutas); se recarga al cambiar la caché (cada {INTERVALO_RECARGA:g} s).")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        contenedor["parar"].set()
+        servidor.shutdown()
+        print(f"\nPeticiones: {dict(contenedor['contadores'])}, recargas: {contenedor['recargas']}")
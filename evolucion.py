@@ -0,0 +1,82 @@
+import numpy as np
+
+# Matriz equipos × jornadas vacía: puntos de liga y generales de cada equipo en cada jornada (una columna por jornada).
+def matriz_vacia():
+    return {"equipos": [], "rondas": [], "huellas": [], "puntos": [], "generales": []}
+
+# Añade al final la columna de una jornada; los equipos que aparecen por primera vez se rellenan con ceros en las anteriores.
+def anadir_columna(matriz, ronda, huella, puntos_por_equipo):
+    indice = {nombre: i for i, nombre in enumerate(matriz["equipos"])}
+    for nombre in puntos_por_equipo:
+        if nombre not in indice:
+            indice[nombre] = len(matriz["equipos"])
+            matriz["equipos"].append(nombre)
+            matriz["puntos"].append([0] * len(matriz["rondas"]))
+            matriz["generales"].append([0.0] * len(matriz["rondas"]))
+    for nombre, i in indice.items():
+        puntos_liga, puntos_generales = puntos_por_equipo.get(nombre, (0, 0.0))
+        matriz["puntos"][i].append(puntos_liga)
+        matriz["generales"][i].append(puntos_generales)
+    matriz["rondas"].append(ronda)
+    matriz["huellas"].append(huella)
+
+# Sincroniza la matriz con el histórico de clasificaciones: conserva las columnas sin cambios y añade (o rehace) las demás. Devuelve las jornadas añadidas.
+def actualizar_matriz(matriz, historico):
+    jornadas = historico["jornadas"]
+    comunes = 0
+    while comunes < min(len(jornadas), len(matriz["rondas"])) and \
+            (jornadas[comunes]["ronda"], jornadas[comunes]["huella"]) == (matriz["rondas"][comunes], matriz["huellas"][comunes]):
+        comunes += 1
+    del matriz["rondas"][comunes:], matriz["huellas"][comunes:]
+    for fila in matriz["puntos"] + matriz["generales"]:
+        del fila[comunes:]
+
+    # Los puntos de cada jornada son la diferencia entre los acumulados del histórico, así no se vuelven a leer las rondas.
+    anterior = jornadas[comunes - 1]["acumulado"] if comunes else {}
+    for jornada in jornadas[comunes:]:
+        diferencias = {}
+        for nombre, (puntos_liga, puntos_generales) in jornada["acumulado"].items():
+            previo = anterior.get(nombre, [0, 0.0])
+            diferencias[nombre] = (puntos_liga - previo[0], round(puntos_generales - previo[1], 2))
+        anadir_columna(matriz, jornada["ronda"], jornada["huella"], diferencias)
+        anterior = jornada["acumulado"]
+    return [jornada["ronda"] for jornada in jornadas[comunes:]]
+
+# Ajustes de puntos del registro en forma de matriz: cada ajuste cuenta desde su jornada (o desde el principio si no la indica).
+def matriz_ajustes(matriz, registro, division=None):
+    indice = {nombre: i for i, nombre in enumerate(matriz["equipos"])}
+    rondas = np.array(matriz["rondas"], dtype=float)
+    ajustes = np.zeros((len(matriz["equipos"]), len(rondas)))
+    for ajuste in registro.get("ajustes", []):
+        if (division is not None and ajuste.get("division") not in (None, division)) or ajuste["equipo"] not in indice:
+            continue
+        desde = ajuste.get("desde_jornada")
+        ajustes[indice[ajuste["equipo"]], rondas >= (desde if desde is not None else -np.inf)] += ajuste["puntos"]
+    return ajustes
+
+# Puntos acumulados y posición de cada equipo tras cada jornada, calculados de una vez para todas las columnas.
+# 'orden' es la lista de equipos en el orden de la API (ver clasificacion.orden_api); sin ella se usa el de la matriz.
+def calcular_evolucion(matriz, ajustes=None, orden=None):
+    n_equipos, n_rondas = len(matriz["equipos"]), len(matriz["rondas"])
+    puntos = np.cumsum(np.array(matriz["puntos"], dtype=float).reshape(n_equipos, n_rondas), axis=1)
+    generales = np.cumsum(np.array(matriz["generales"], dtype=float).reshape(n_equipos, n_rondas), axis=1)
+    if ajustes is not None:
+        puntos += ajustes
+    # Igual que la clasificación: más puntos, después más puntos generales y, a igualdad de todo, el orden de la API.
+    posicion_api = {nombre: i for i, nombre in enumerate(orden or [])}
+    desempate = np.array([posicion_api.get(nombre, len(posicion_api) + i) for i, nombre in enumerate(matriz["equipos"])])
+    desempate = np.broadcast_to(desempate[:, None], puntos.shape)
+    orden = np.lexsort((desempate, -generales, -puntos), axis=0)
+    posiciones = np.empty_like(orden)
+    np.put_along_axis(posiciones, orden, np.arange(1, n_equipos + 1)[:, None], axis=0)
+    return {"puntos": puntos, "generales": generales, "posiciones": posiciones}
+
+# Datos compactos para el gráfico del informe: jornadas, equipos y, por equipo, posición y puntos tras cada jornada.
+def datos_grafico(matriz, evolucion):
+    puntos = evolucion["puntos"]
+    return {
+        "rondas": matriz["rondas"],
+        "equipos": matriz["equipos"],
+        "posiciones": evolucion["posiciones"].tolist(),
+        "puntos": (puntos.astype(int) if np.all(puntos % 1 == 0) else np.round(puntos, 2)).tolist(),
+    }
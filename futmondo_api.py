@@ -0,0 +1,179 @@
+import copy
+import hashlib
+import json
+
+from campos_api import CAMPOS_ALINEACION, CAMPOS_RONDA, TAMANO_TROZO, decodificador_proyectado
+from configuracion import API_URL_ROUND, API_URL_LINEUP
+
+# En modo offline las llamadas a la API se sirven desde el archivo de respuestas, sin red.
+MODO_OFFLINE = False
+# Segundos máximos de espera de una respuesta (conexión y lectura); una petición colgada cuenta como fallo de red y se reintenta.
+TIMEOUT_API = 30
+# Planificador de peticiones compartido por toda la ejecución (cubos por endpoint y concurrencia adaptativa).
+_planificador = None
+
+# Activa el modo offline para el resto de la ejecución.
+def activar_modo_offline():
+    global MODO_OFFLINE
+    MODO_OFFLINE = True
+
+def _obtener_planificador():
+    global _planificador
+    if _planificador is None:
+        from planificador_api import crear_planificador
+        _planificador = crear_planificador()
+    return _planificador
+
+# Realiza una petición POST con un payload JSON y archiva la respuesta cruda; lanza la excepción de requests si falla.
+def _peticion_api(url, payload, campos=None):
+    import requests
+    from archivo_api import archivar_respuesta, archivador_respuesta
+
+    if campos is None:
+        response = requests.post(url, json=payload, timeout=TIMEOUT_API)
+        response.raise_for_status()
+        archivar_respuesta(url, payload, response.content)
+        return response.json()
+
+    # Respuestas grandes: el cuerpo se lee por trozos, se archiva crudo y se decodifica quedándose solo con 'campos'.
+    response = requests.post(url, json=payload, stream=True, timeout=TIMEOUT_API)
+    response.raise_for_status()
+    enviar_archivo, terminar_archivo = archivador_respuesta(url, payload)
+    enviar, terminar = decodificador_proyectado(campos)
+    for trozo in response.iter_content(TAMANO_TROZO):
+        enviar_archivo(trozo)
+        enviar(trozo)
+    datos = terminar()
+    terminar_archivo()
+    return datos
+
+# Indica si un error de la API es de saturación o de red (429, 5xx, conexión o tiempo agotado), la espera que pide el servidor
+# y si es un límite de ritmo (429).
+def _error_reintentable(error):
+    import requests
+
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        codigo = error.response.status_code
+        if codigo == 429 or codigo >= 500:
+            retry_after = error.response.headers.get('Retry-After')
+            try:
+                return True, float(retry_after) if retry_after else None, codigo == 429
+            except ValueError:
+                return True, None, codigo == 429
+        return False, None, False
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)), None, False
+
+# Realiza varias llamadas POST a la API, [(url, payload, campos)], a través del planificador: en paralelo, con límite de ritmo por endpoint
+# y reintentando las que Futmondo rechaza por saturación. Devuelve los datos en el mismo orden; None en las que fallan del todo.
+def llamar_api_lote(peticiones):
+    if MODO_OFFLINE:
+        from archivo_api import leer_respuesta_archivada
+        resultados = []
+        for url, payload, campos in peticiones:
+            datos = leer_respuesta_archivada(url, payload, campos)
+            if datos is None:
+                print(f"Sin respuesta archivada para '{url}' con la consulta {payload.get('query')}.")
+            resultados.append(datos)
+        return resultados
+
+    from planificador_api import ejecutar_peticiones
+    resultados, errores = ejecutar_peticiones(_obtener_planificador(), _peticion_api, peticiones, _error_reintentable)
+    for i, error in sorted(errores.items()):
+        print(f"Error en la llamada a la API '{peticiones[i][0]}': {error}")
+    return resultados
+
+# Realiza una llamada POST a una API con un payload JSON, archivando la respuesta cruda.
+def llamar_api(url, payload, campos=None):
+    if not payload: return None
+    return llamar_api_lote([(url, payload, campos)])[0]
+
+# Resumen de las peticiones hechas en esta ejecución (reintentos, fallos y concurrencia alcanzada).
+def resumen_peticiones():
+    if _planificador is None:
+        return None
+    from planificador_api import resumen_planificador
+    return resumen_planificador(_planificador)
+
+# Petición de la alineación de un equipo para una ronda específica: (url, payload, campos).
+def peticion_alineacion(payload_base, round_id, team_id):
+    payload_lineup = {
+        "header": copy.deepcopy(payload_base["header"]),
+        "query": {
+            "championshipId": payload_base["query"]["championshipId"],
+            "round": round_id,
+            "userteamId": team_id
+        }
+    }
+    return API_URL_LINEUP, payload_lineup, CAMPOS_ALINEACION
+
+# Jugadores de una respuesta de alineación (lista vacía si el equipo no tiene alineación).
+def jugadores_alineacion(datos_lineup):
+    if datos_lineup and 'answer' in datos_lineup and 'players' in datos_lineup['answer']:
+        return datos_lineup['answer']['players']
+    return []
+
+# Obtiene la clasificación y los enfrentamientos de una ronda, con el id de la ronda anotado en la consulta.
+def obtener_datos_ronda(payload_base, round_id):
+    payload_round = copy.deepcopy(payload_base)
+    payload_round['query'].update({'roundNumber': round_id})
+    datos_ronda = llamar_api(API_URL_ROUND, payload_round, CAMPOS_RONDA)
+    if not datos_ronda or 'answer' not in datos_ronda or datos_ronda['answer'] == 'api.error.general':
+        return None
+    datos_ronda.setdefault('query', {})
+    datos_ronda['query'].update({'roundNumber': round_id, 'roundId': round_id})
+    return datos_ronda
+
+# Obtiene en paralelo las alineaciones de todos los equipos de una ronda, indexadas por id de equipo.
+# Devuelve None si alguna no se pudo descargar ni tras los reintentos, para no calcular multas con alineaciones incompletas.
+def obtener_alineaciones_ronda(payload_base, round_id, datos_ronda):
+    team_ids = [team_info['_id'] for team_info in datos_ronda.get('answer', {}).get('ranking', [])]
+    respuestas = llamar_api_lote([peticion_alineacion(payload_base, round_id, team_id) for team_id in team_ids])
+    if any(datos is None for datos in respuestas):
+        return None
+    return {team_id: jugadores_alineacion(datos) for team_id, datos in zip(team_ids, respuestas)}
+
+# Procesa la respuesta de la API de rondas, manejando números de ronda enteros y flotantes.
+def procesar_rondas_api(rounds_list):
+    if not rounds_list:
+        return {}
+
+    rounds_map = {}
+    all_numbers = [r['number'] for r in rounds_list if r.get('number') is not None]
+    existing_integer_rounds = {int(n) for n in all_numbers if n % 1 == 0}
+
+    for r in rounds_list:
+        round_num = r.get('number')
+        round_id = r.get('id')
+
+        if round_num is None or not round_id:
+            continue
+
+        if round_num % 1 == 0:
+            rounds_map[int(round_num)] = round_id
+        else:
+            truncated_num = int(round_num)
+            if truncated_num in existing_integer_rounds:
+                rounds_map[round_num] = round_id
+            else:
+                rounds_map[truncated_num] = round_id
+
+    return rounds_map
+
+# Jornadas enteras posteriores que deben existir para dar por cerrada una ronda aplazada (número decimal).
+MARGEN_RONDAS_APLAZADAS = 2
+
+# Calcula una huella estable de una respuesta de la API para detectar cambios entre ejecuciones.
+def huella_respuesta(datos):
+    return hashlib.sha256(json.dumps(datos, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+# Clasifica una ronda como cerrada (ya hay jornadas posteriores) o abierta (en juego o aplazada reciente).
+def clasificar_ronda(round_number, ultima_ronda_entera):
+    margen = MARGEN_RONDAS_APLAZADAS if round_number % 1 else 1
+    return 'cerrada' if ultima_ronda_entera >= int(round_number) + margen else 'abierta'
+
+# Devuelve las rondas que hay que descargar: nuevas, con id cambiado, sin caché o todavía no cerradas.
+def planificar_descarga_rondas(rounds_map, ids_previos, estados_previos, rondas_en_cache):
+    return [
+        n for n in sorted(rounds_map)
+        if estados_previos.get(n) != 'cerrada' or ids_previos.get(n) != rounds_map[n] or n not in rondas_en_cache
+    ]
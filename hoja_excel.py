@@ -0,0 +1,134 @@
+from multas import get_captains_for_round
+
+# Actualiza una hoja de Excel con los datos de clasificación.
+def actualizar_hoja_excel(workbook, ranking_ordenado, sheet_name, fila_inicio, columna_inicio):
+    try:
+        sheet = workbook[sheet_name]
+        for row in sheet.iter_rows(min_row=fila_inicio, max_row=sheet.max_row, min_col=columna_inicio, max_col=columna_inicio + 2):
+            for cell in row:
+                cell.value = None
+        for i, equipo in enumerate(ranking_ordenado):
+            fila_actual = fila_inicio + i
+            sheet.cell(row=fila_actual, column=columna_inicio).value = equipo['name']
+            sheet.cell(row=fila_actual, column=columna_inicio + 1).value = equipo['points']
+            sheet.cell(row=fila_actual, column=columna_inicio + 2).value = equipo['general_points']
+        print(f"Hoja '{sheet_name}' actualizada en memoria.")
+    except Exception as e:
+        print(f"Error procesando la hoja '{sheet_name}' en memoria: {e}")
+
+# Actualiza las cabeceras con los nombres de los equipos en la hoja 'Capitanes'.
+def actualizar_cabeceras_capitanes(workbook, divisiones):
+    try:
+        sheet = workbook["Capitanes"]
+        for etiqueta, teams_dict, primera_columna in divisiones:
+            print(f"Actualizando cabeceras de {etiqueta} en la hoja 'Capitanes'...")
+            sorted_teams = sorted(teams_dict.items(), key=lambda item: int(item[0]))
+            current_col = primera_columna
+            for _, team_name in sorted_teams:
+                sheet.cell(row=3, column=current_col).value = team_name
+                current_col += 2
+        print("Cabeceras de la hoja 'Capitanes' actualizadas.")
+    except Exception as e:
+        print(f"Error al actualizar las cabeceras de la hoja 'Capitanes': {e}")
+
+# Actualiza la fila de una jornada con los capitanes de cada equipo en el Excel.
+def actualizar_hoja_capitanes(workbook, round_number, team_captains_list):
+    try:
+        sheet = workbook["Capitanes"]
+        team_to_captain_col = {}
+        for col_idx in range(3, sheet.max_column + 1):
+            team_name_cell = sheet.cell(row=3, column=col_idx)
+            if team_name_cell.value:
+                team_name = str(team_name_cell.value).strip()
+                team_to_captain_col[team_name] = col_idx
+        row_found = False
+        target_row_label = f"Jornada {round_number}"
+        for row_idx, row in enumerate(sheet.iter_rows(min_row=5, max_row=sheet.max_row, min_col=2, max_col=2), 5):
+            cell_value = row[0].value
+            if isinstance(cell_value, str) and cell_value.strip().lower() == target_row_label.lower():
+                for captain_info in team_captains_list:
+                    team_name = captain_info['team_name'].strip()
+                    captain = captain_info['capitan']
+                    if team_name in team_to_captain_col:
+                        col_to_update = team_to_captain_col[team_name]
+                        sheet.cell(row=row_idx, column=col_to_update).value = captain
+                    else:
+                        print(f"     -> Aviso: El equipo '{team_name}' no se encontró en la cabecera de la hoja 'Capitanes'.")
+                print(f"Capitanes de la '{target_row_label}' actualizados en memoria.")
+                row_found = True
+                break
+        if not row_found:
+            print(f"Advertencia: No se encontró la fila para '{target_row_label}' en la hoja 'Capitanes'.")
+    except Exception as e:
+        print(f"Error actualizando la hoja 'Capitanes' para la jornada {round_number}: {e}")
+
+# Itera sobre todas las jornadas para actualizar el histórico de capitanes en el Excel.
+def actualizar_capitanes_historico(workbook, rondas, division_name, name_map={}):
+    print(f"\n--- INICIANDO ACTUALIZACIÓN HISTÓRICA DE CAPITANES PARA {division_name.upper()} (EXCEL) ---")
+    sorted_round_numbers = sorted(rondas.keys())
+    for round_number in sorted_round_numbers:
+        ronda = rondas[round_number]
+        print(f"Procesando capitanes de la Jornada {round_number} para Excel...")
+        team_captains = get_captains_for_round(ronda['datos'], ronda['alineaciones'], name_map)
+        if not team_captains:
+            print(f"     -> Advertencia: No se encontraron capitanes para la Jornada {round_number}.")
+            continue
+        actualizar_hoja_capitanes(workbook, round_number, team_captains)
+
+# Crea un libro en memoria a partir de los rangos usados de unas hojas ({hoja: (dirección, valores)}), como los devuelve Graph.
+def cargar_libro_desde_valores(hojas):
+    from openpyxl import Workbook
+    from openpyxl.utils import range_boundaries
+
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for sheet_name, (direccion, valores) in hojas.items():
+        sheet = workbook.create_sheet(sheet_name)
+        min_col, min_row, _, _ = range_boundaries(direccion.split('!')[-1])
+        for i, fila in enumerate(valores):
+            for j, valor in enumerate(fila):
+                if valor != "":
+                    sheet.cell(row=min_row + i, column=min_col + j).value = valor
+    return workbook
+
+# Devuelve los valores no vacíos de todas las hojas del libro ({hoja: {(fila, columna): valor}}).
+def valores_libro(workbook):
+    return {
+        sheet.title: {(cell.row, cell.column): cell.value for row in sheet.iter_rows() for cell in row if cell.value is not None}
+        for sheet in workbook.worksheets
+    }
+
+# Calcula los rangos rectangulares de celdas que han cambiado respecto a unos valores previos, listos para escribir con Graph.
+def calcular_rangos_modificados(valores_previos, workbook):
+    from openpyxl.utils import get_column_letter
+
+    rangos = []
+    for sheet_name, actuales in valores_libro(workbook).items():
+        previos = valores_previos.get(sheet_name, {})
+        cambiadas = sorted(k for k in previos.keys() | actuales.keys() if previos.get(k) != actuales.get(k))
+
+        # Primero tramos contiguos dentro de cada fila; luego se unen los de filas consecutivas con las mismas columnas.
+        tramos = []
+        for fila, columna in cambiadas:
+            if tramos and tramos[-1][0] == fila and tramos[-1][2] == columna - 1:
+                tramos[-1][2] = columna
+            else:
+                tramos.append([fila, columna, columna])
+        bloques, abiertos = [], {}
+        for fila, col_ini, col_fin in tramos:
+            bloque = abiertos.get((col_ini, col_fin))
+            if bloque and bloque[1] == fila - 1:
+                bloque[1] = fila
+            else:
+                bloque = abiertos[(col_ini, col_fin)] = [fila, fila, col_ini, col_fin]
+                bloques.append(bloque)
+
+        for fila_ini, fila_fin, col_ini, col_fin in bloques:
+            direccion = f"{get_column_letter(col_ini)}{fila_ini}:{get_column_letter(col_fin)}{fila_fin}"
+            # Graph ignora los null al escribir un rango; la cadena vacía es la que borra la celda.
+            valores = [
+                [actuales.get((fila, columna), "") for columna in range(col_ini, col_fin + 1)]
+                for fila in range(fila_ini, fila_fin + 1)
+            ]
+            rangos.append((sheet_name, direccion, valores))
+    return rangos
@@ -0,0 +1,750 @@
+import json
+import os
+import shutil
+import tempfile
+
+from configuracion import DATOS_INFORME_DIR, RECURSOS_INFORME_DIR
+from persistencia import abrir_temporal_atomico, confirmar_atomico, descartar_atomico, escribir_atomico
+from recursos_estaticos import (
+    escribir_recurso_con_huella, escribir_variantes_comprimidas, escribir_variantes_comprimidas_por_bloques, minificar_html, minificar_js,
+)
+
+# Tamaño a partir del cual el contenido del informe en construcción pasa de memoria a un archivo temporal.
+TAMANO_MAXIMO_EN_MEMORIA = 4 * 2**20
+
+# Genera el HTML para la tabla de multas de una jornada.
+def _generar_tabla_multas_jornada_html(multas_data):
+    sorted_teams = sorted(multas_data.items(), key=lambda item: item[1]['multa_total'], reverse=True)
+    table_rows = ""
+    for i, (team_name, data) in enumerate(sorted_teams):
+        multa_total = data.get('multa_total', 0.0)
+        if multa_total == 0: continue
+        desglose = data.get('desglose', {})
+        desglose_html = "<ul class='list-disc list-inside space-y-1'>"
+
+        jr = desglose.get("jugadores_repetidos", {})
+        if jr.get("multa", 0) > 0:
+            desglose_html += f"<li>Jugadores repetidos ({jr.get('cantidad', 0)}): {jr.get('multa', 0):.2f}€</li>"
+        cr = desglose.get("capitan_repetido_con_rival", {})
+        if cr.get("multa", 0) > 0:
+            desglose_html += f"<li>Capitán repetido con rival: {cr.get('multa', 0):.2f}€</li>"
+        tcr = desglose.get("tenias_capitan_rival", {})
+        if tcr.get("multa", 0) > 0:
+            desglose_html += f"<li>Alinear al capitán del rival: {tcr.get('multa', 0):.2f}€</li>"
+        pe = desglose.get("peor_equipo_jornada", {})
+        if pe.get("multa", 0) > 0:
+            pos_map = {1: "Peor", 2: "2º Peor", 3: "3er Peor"}
+            pos_str = pos_map.get(pe.get("posicion"), f"{pe.get('posicion')}º Peor")
+            desglose_html += f"<li>{pos_str} equipo de la jornada: {pe.get('multa', 0):.2f}€</li>"
+        apj = desglose.get("alinear_peor_jugador", {})
+        if apj.get("multa", 0) > 0:
+            desglose_html += f"<li>Alinear al peor jugador: {apj.get('multa', 0):.2f}€</li>"
+        epc = desglose.get("elegir_peor_capitan", {})
+        if epc.get("multa", 0) > 0:
+            desglose_html += f"<li>Elegir al peor capitán: {epc.get('multa', 0):.2f}€</li>"
+        
+        ali = desglose.get("alineacion_indebida", {})
+        if ali.get("multa", 0) > 0:
+            jugadores_str = ", ".join(ali.get("jugadores", []))
+            desglose_html += f"<li class='text-red-600 font-bold'>Alineación indebida ({jugadores_str}): {ali.get('multa', 0):.2f}€</li>"
+
+        desglose_html += "</ul>"
+
+        row_bg = 'bg-slate-50' if i % 2 != 0 else 'bg-white'
+        table_rows += f"""
+        <tr class="{row_bg}">
+            <td class="p-3 border border-slate-300">{team_name}</td>
+            <td class="p-3 border border-slate-300 text-center font-bold text-red-600">{multa_total:.2f}€</td>
+            <td class="p-3 border border-slate-300">{desglose_html}</td>
+        </tr>"""
+    if not table_rows:
+        table_rows = '<tr><td colspan="3" class="text-center p-4 border border-slate-300">No se registraron multas en esta jornada.</td></tr>'
+
+    return f"""
+    <div class="overflow-x-auto">
+        <table class="w-full text-left border-collapse">
+            <thead class="bg-slate-200">
+                <tr>
+                    <th class="p-3 font-bold uppercase text-slate-600 border border-slate-300">Equipo</th>
+                    <th class="p-3 font-bold uppercase text-slate-600 border border-slate-300 text-center">Multa Total</th>
+                    <th class="p-3 font-bold uppercase text-slate-600 border border-slate-300">Desglose</th>
+                </tr>
+            </thead>
+            <tbody>{table_rows}</tbody>
+        </table>
+    </div>"""
+
+# Genera el HTML para la tabla de multas totales acumuladas.
+def _generar_tabla_multas_totales_html(multas_acumuladas):
+    sorted_teams = sorted(multas_acumuladas.items(), key=lambda item: item[1], reverse=True)
+    table_rows = ""
+    for i, (team_name, total_multa) in enumerate(sorted_teams):
+        row_bg = 'bg-slate-50' if i % 2 != 0 else 'bg-white'
+        table_rows += f"""
+        <tr class="{row_bg}">
+            <td class="p-3 border border-slate-300">{team_name}</td>
+            <td class="p-3 border border-slate-300 text-center font-bold text-red-600">{total_multa:.2f}€</td>
+        </tr>"""
+    return f"""
+    <div class="overflow-x-auto">
+        <table class="w-full text-left border-collapse">
+            <thead class="bg-slate-200">
+                <tr>
+                    <th class="p-3 font-bold uppercase text-slate-600 border border-slate-300">Equipo</th>
+                    <th class="p-3 font-bold uppercase text-slate-600 border border-slate-300 text-center">Total Acumulado</th>
+                </tr>
+            </thead>
+            <tbody>{table_rows}</tbody>
+        </table>
+    </div>"""
+
+# Genera el HTML para la tabla de clasificación.
+def _generar_tabla_clasificacion_html(ranking_ordenado):
+    table_rows = ""
+    for i, equipo in enumerate(ranking_ordenado):
+        row_bg = 'bg-slate-50' if i % 2 != 0 else 'bg-white'
+        
+        comentario_html = ""
+        if equipo.get('comentario'):
+             comentario_html = f"<div class='mt-1 text-xs text-red-600 font-semibold italic'>{equipo['comentario']}</div>"
+
+        table_rows += f"""
+        <tr class="{row_bg}">
+            <td class="p-3 border border-slate-300 text-center">{i + 1}</td>
+            <td class="p-3 border border-slate-300">
+                <div class="font-medium">{equipo['name']}</div>
+                {comentario_html}
+            </td>
+            <td class="p-3 border border-slate-300 text-center font-bold">{equipo['points']}</td>
+            <td class="p-3 border border-slate-300 text-center text-slate-500">{equipo['general_points']}</td>
+        </tr>"""
+    return f"""
+    <div class="overflow-x-auto rounded-lg shadow-sm">
+        <table class="w-full text-left border-collapse min-w-[600px]">
+            <thead class="bg-slate-200 text-slate-700">
+                <tr>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-slate-300 text-center w-12">Pos.</th>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-slate-300">Equipo</th>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-slate-300 text-center w-24">Puntos (J)</th>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-slate-300 text-center w-24">Puntos (G)</th>
+                </tr>
+            </thead>
+            <tbody>{table_rows}</tbody>
+        </table>
+    </div>"""
+
+# Genera el contenedor del gráfico de evolución de la clasificación, con sus datos en JSON compacto para el script del informe.
+def _generar_grafico_evolucion_html(evolucion, div_key):
+    datos_json = json.dumps(evolucion, ensure_ascii=False, separators=(',', ':')).replace("</", "<\\/")
+    return f"""
+    <p class="text-sm text-slate-500 text-center mb-4">Posición de cada equipo tras cada jornada (pasa el ratón por una línea para ver el equipo).</p>
+    <script type="application/json" id="{div_key}-evolucion-datos">{datos_json}</script>
+    <div class="grafico-evolucion overflow-x-auto" data-datos="{div_key}-evolucion-datos"></div>"""
+
+# Script que dibuja en SVG los gráficos de evolución de la clasificación a partir de sus datos JSON, una vez cargadas las secciones.
+SCRIPT_GRAFICO_EVOLUCION = """
+            document.addEventListener('informe-cargado', () => {
+                const escapar = texto => String(texto).replace(/[&<>"]/g, c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c]));
+                document.querySelectorAll('.grafico-evolucion').forEach(contenedor => {
+                    const datos = JSON.parse(document.getElementById(contenedor.dataset.datos).textContent);
+                    const ultima = datos.rondas.length - 1;
+                    const ancho = Math.max(640, datos.rondas.length * 40 + 300);
+                    const alto = datos.equipos.length * 24 + 40;
+                    const x = i => 30 + i * (ancho - 300) / Math.max(1, ultima);
+                    const y = posicion => 15 + (posicion - 1) * 24;
+                    let svg = `<svg xmlns="http://www.w3.org/2000/svg" width="${ancho}" height="${alto}" font-size="12">`;
+                    datos.rondas.forEach((ronda, i) => {
+                        svg += `<text x="${x(i)}" y="${alto - 5}" text-anchor="middle" fill="#64748b">J${ronda}</text>`;
+                    });
+                    datos.equipos.forEach((equipo, e) => {
+                        const color = `hsl(${Math.round(e * 360 / datos.equipos.length)}, 65%, 45%)`;
+                        const puntos = datos.posiciones[e].map((posicion, i) => `${x(i)},${y(posicion)}`).join(' ');
+                        const posicionFinal = datos.posiciones[e][ultima];
+                        svg += `<polyline points="${puntos}" fill="none" stroke="${color}" stroke-width="2"><title>${escapar(equipo)}</title></polyline>`;
+                        svg += `<text x="${x(ultima) + 10}" y="${y(posicionFinal) + 4}" fill="${color}">${posicionFinal}. ${escapar(equipo)} (${datos.puntos[e][ultima]})</text>`;
+                    });
+                    contenedor.innerHTML = svg + '</svg>';
+                });
+            });"""
+
+# Genera el HTML para la tabla de probabilidades de la proyección de la clasificación final.
+def _generar_tabla_proyeccion_html(proyeccion):
+    con_descenso = bool(proyeccion.get('plazas_descenso'))
+    table_rows = ""
+    for i, equipo in enumerate(proyeccion['equipos']):
+        row_bg = 'bg-slate-50' if i % 2 != 0 else 'bg-white'
+        celda_descenso = f'<td class="p-3 border border-slate-300 text-center text-red-600">{equipo["descenso"]:.1%}</td>' if con_descenso else ''
+        table_rows += f"""
+        <tr class="{row_bg}">
+            <td class="p-3 border border-slate-300 font-medium">{equipo['name']}</td>
+            <td class="p-3 border border-slate-300 text-center">{equipo['puntos']:g}</td>
+            <td class="p-3 border border-slate-300 text-center">{equipo['posicion_media']:.1f}</td>
+            <td class="p-3 border border-slate-300 text-center font-bold text-sky-700">{equipo['campeon']:.1%}</td>
+            {celda_descenso}
+            <td class="p-3 border border-slate-300 text-center text-slate-500">{equipo['colista']:.1%}</td>
+        </tr>"""
+    cabecera_descenso = f'<th class="p-3 font-bold uppercase text-xs tracking-wider border border-slate-300 text-center w-24">Descenso ({proyeccion["plazas_descenso"]})</th>' if con_descenso else ''
+    return f"""
+    <p class="text-sm text-slate-500 text-center mb-4">{proyeccion['simulaciones']:,} temporadas simuladas con {proyeccion['jornadas_restantes']} jornadas restantes.</p>
+    <div class="overflow-x-auto rounded-lg shadow-sm">
+        <table class="w-full text-left border-collapse min-w-[600px]">
+            <thead class="bg-slate-200 text-slate-700">
+                <tr>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-slate-300">Equipo</th>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-slate-300 text-center w-24">Puntos (J)</th>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-slate-300 text-center w-24">Pos. media</th>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-slate-300 text-center w-24">Campeón</th>
+                    {cabecera_descenso}
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-slate-300 text-center w-24">Colista</th>
+                </tr>
+            </thead>
+            <tbody>{table_rows}</tbody>
+        </table>
+    </div>"""
+
+# Genera el HTML de la tabla de pares de equipos que más jugadores han compartido en la temporada.
+def _generar_tabla_coincidencias_html(coincidencias):
+    table_rows = ""
+    for i, par in enumerate(coincidencias['pares']):
+        row_bg = 'bg-slate-50' if i % 2 != 0 else 'bg-white'
+        table_rows += f"""
+        <tr class="{row_bg}">
+            <td class="p-3 border border-slate-300 font-medium">{par['equipos'][0]}</td>
+            <td class="p-3 border border-slate-300 font-medium">{par['equipos'][1]}</td>
+            <td class="p-3 border border-slate-300 text-center font-bold">{par['compartidos']}</td>
+            <td class="p-3 border border-slate-300 text-center">{par['jornadas']}</td>
+            <td class="p-3 border border-slate-300 text-center text-slate-500">{par['compartidos'] / coincidencias['jornadas']:.1f}</td>
+        </tr>"""
+    return f"""
+    <p class="text-sm text-slate-500 text-center mb-4">Jugadores alineados a la vez por cada par de equipos (se enfrenten o no) en {coincidencias['jornadas']} jornadas.</p>
+    <div class="overflow-x-auto rounded-lg shadow-sm">
+        <table class="w-full text-left border-collapse min-w-[600px]">
+            <thead class="bg-slate-200 text-slate-700">
+                <tr>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-slate-300">Equipo</th>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-slate-300">Equipo</th>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-slate-300 text-center w-24">Compartidos</th>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-slate-300 text-center w-24">Jornadas</th>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-slate-300 text-center w-24">Media</th>
+                </tr>
+            </thead>
+            <tbody>{table_rows}</tbody>
+        </table>
+    </div>"""
+
+# Conceptos de multa que se muestran como columnas en las estadísticas de equipos.
+CONCEPTOS_ESTADISTICAS = [
+    ("jugadores_repetidos", "Repetidos"),
+    ("capitan_repetido_con_rival", "Cap. repetido"),
+    ("tenias_capitan_rival", "Cap. rival"),
+    ("peor_equipo_jornada", "Peor equipo"),
+    ("alinear_peor_jugador", "Peor jugador"),
+    ("elegir_peor_capitan", "Peor capitán"),
+    ("alineacion_indebida", "Indebida"),
+]
+
+# Genera el HTML de las estadísticas acumuladas: rankings de jugadores y multas por concepto de cada equipo.
+def _generar_tabla_estadisticas_html(estadisticas):
+    def lista_ranking(titulo, ranking, campo):
+        items = "".join(f'<li class="flex justify-between py-1 border-b border-slate-200"><span>{nombre}</span><span class="font-bold">{datos[campo]}</span></li>' for nombre, datos in ranking)
+        return f'<div class="flex-1 min-w-[250px]"><h3 class="font-bold text-slate-700 mb-2">{titulo}</h3><ol class="text-sm">{items or "<li>Sin datos.</li>"}</ol></div>'
+
+    table_rows = ""
+    for i, (team_name, datos) in enumerate(sorted(estadisticas['equipos'].items(), key=lambda x: -x[1]['multa_total'])):
+        row_bg = 'bg-slate-50' if i % 2 != 0 else 'bg-white'
+        celdas = "".join(f'<td class="p-2 border border-slate-300 text-center">{datos["multas"].get(concepto, 0.0):.2f}€</td>' for concepto, _ in CONCEPTOS_ESTADISTICAS)
+        table_rows += f"""
+        <tr class="{row_bg}">
+            <td class="p-2 border border-slate-300 font-medium">{team_name}</td>
+            <td class="p-2 border border-slate-300 text-center">{datos['puntos_medios']:.1f}</td>
+            {celdas}
+            <td class="p-2 border border-slate-300 text-center font-bold text-red-600">{datos['multa_total']:.2f}€</td>
+        </tr>"""
+    cabeceras = "".join(f'<th class="p-2 font-bold uppercase text-xs tracking-wider border border-slate-300 text-center">{titulo}</th>' for _, titulo in CONCEPTOS_ESTADISTICAS)
+    return f"""
+    <div class="flex flex-wrap gap-6 mb-6">
+        {lista_ranking("Más veces capitán", estadisticas['mas_capitanes'], 'capitanias')}
+        {lista_ranking("Más veces peor jugador de la jornada", estadisticas['mas_veces_peor'], 'peor_jornada')}
+    </div>
+    <div class="overflow-x-auto rounded-lg shadow-sm">
+        <table class="w-full text-left border-collapse min-w-[800px]">
+            <thead class="bg-slate-200 text-slate-700">
+                <tr>
+                    <th class="p-2 font-bold uppercase text-xs tracking-wider border border-slate-300">Equipo</th>
+                    <th class="p-2 font-bold uppercase text-xs tracking-wider border border-slate-300 text-center">Media (J)</th>
+                    {cabeceras}
+                    <th class="p-2 font-bold uppercase text-xs tracking-wider border border-slate-300 text-center">Total</th>
+                </tr>
+            </thead>
+            <tbody>{table_rows}</tbody>
+        </table>
+    </div>"""
+
+# Genera el HTML de la elegibilidad de capitanes para la próxima jornada: sancionados, sin capitanía y a una capitanía de sanción.
+def _generar_tabla_elegibilidad_html(elegibilidad):
+    def lista(jugadores, detalle):
+        return "<br>".join(f"{jugador} <span class='text-xs text-slate-500'>({detalle(info)})</span>" for jugador, info in jugadores) or "-"
+
+    from elegibilidad import jugadores_por_estado
+
+    table_rows = ""
+    for i, team_name in enumerate(sorted(elegibilidad['equipos'])):
+        row_bg = 'bg-slate-50' if i % 2 != 0 else 'bg-white'
+        grupos = jugadores_por_estado(elegibilidad, team_name)
+        table_rows += f"""
+        <tr class="{row_bg}">
+            <td class="p-3 border border-slate-300 font-medium">{team_name}</td>
+            <td class="p-3 border border-slate-300 text-red-600">{lista(grupos['sancionado'], lambda info: f"hasta J{info['hasta']}")}</td>
+            <td class="p-3 border border-slate-300 text-orange-600">{lista(grupos['sin_capitania'], lambda info: f"hasta J{info['hasta']}")}</td>
+            <td class="p-3 border border-slate-300 text-amber-600">{lista(grupos['a_una_capitania'], lambda info: f"{info['capitanias']} capitanías")}</td>
+        </tr>"""
+    if not table_rows:
+        table_rows = '<tr><td colspan="4" class="text-center p-4 border border-slate-300">Todos los jugadores pueden jugar y ser capitanes.</td></tr>'
+    return f"""
+    <div class="overflow-x-auto rounded-lg shadow-sm">
+        <table class="w-full text-left border-collapse min-w-[600px]">
+            <thead class="bg-slate-200 text-slate-700">
+                <tr>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-slate-300">Equipo</th>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-slate-300">No pueden jugar</th>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-slate-300">No pueden ser capitán</th>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-slate-300">A una capitanía de sanción</th>
+                </tr>
+            </thead>
+            <tbody>{table_rows}</tbody>
+        </table>
+    </div>"""
+
+# Genera el HTML para la tabla del historial de capitanes.
+def _generar_tabla_capitanes_html(datos_capitanes, team_names):
+    if not datos_capitanes: return "<p>No hay datos de capitanes disponibles.</p>"
+    sorted_jornadas = sorted(datos_capitanes.keys())
+    sorted_teams = sorted(list(team_names))
+    header_cols = "".join(f"<th class='p-3 font-bold uppercase text-slate-600 border border-slate-300 sticky top-0 bg-slate-200'>{team}</th>" for team in sorted_teams)
+    header = f"<tr><th class='p-3 font-bold uppercase text-slate-600 border border-slate-300 sticky top-0 bg-slate-200'>Jornada</th>{header_cols}</tr>"
+
+    body_rows = ""
+    for i, jornada_num in enumerate(sorted_jornadas):
+        capitanes_jornada = {item['team_name']: item for item in datos_capitanes[jornada_num]}
+        row_bg = 'bg-slate-50' if i % 2 != 0 else 'bg-white'
+        row_cols = f"<td class='p-3 border border-slate-300 font-semibold'>Jornada {jornada_num}</td>"
+        for team_name in sorted_teams:
+            cap_info = capitanes_jornada.get(team_name)
+            if cap_info:
+                capitan_name = cap_info.get('capitan', 'N/A')
+                is_sanction_trigger = cap_info.get('is_red_card', False)
+
+                cell_classes = "p-3 border border-slate-300"
+                if is_sanction_trigger:
+                    cell_classes += " bg-yellow-300 font-semibold"
+
+                row_cols += f'<td class="{cell_classes}">{capitan_name}</td>'
+            else:
+                row_cols += '<td class="p-3 border border-slate-300">-</td>'
+        body_rows += f"<tr class='{row_bg}'>{row_cols}</tr>"
+
+    return f"""
+    <div class="overflow-x-auto">
+        <table class="w-full text-left border-collapse">
+            <thead>{header}</thead>
+            <tbody>{body_rows}</tbody>
+        </table>
+    </div>"""
+
+# Genera el HTML para la tabla de sanciones.
+def _generar_tabla_sanciones_html(sanciones_division, violaciones_division=None):
+    if not any(sanciones_division.values()) and not violaciones_division:
+        return "<p>No hay sanciones activas o recientes en esta división.</p>"
+
+    table_rows = ""
+    equipos_con_sanciones = {team: players for team, players in sanciones_division.items() if any(s.get('status') != 'completed' for p in players.values() for s in p)}
+
+    # --- Sección de Alineaciones Indebidas ---
+    if violaciones_division:
+        for team_name, lista_multas in violaciones_division.items():
+            for m in lista_multas:
+                 table_rows += f"""
+                <tr class="bg-red-50">
+                    <td class="p-3 border border-slate-300 font-bold text-red-700">{team_name}</td>
+                    <td class="p-3 border border-slate-300 font-bold text-red-700">{m['jugador']}</td>
+                    <td class="p-3 border border-slate-300 font-bold text-red-700">
+                        ALINEACIÓN INDEBIDA (Jornada {m['jornada']})<br>
+                        Multa: 5€
+                    </td>
+                </tr>"""
+
+    if not equipos_con_sanciones and not violaciones_division:
+        return "<p>No hay sanciones activas o recientes en esta división.</p>"
+
+    sorted_teams = sorted(equipos_con_sanciones.items())
+
+    row_index = 0
+    for team_name, jugadores in sorted_teams:
+        sorted_jugadores = sorted(jugadores.items())
+
+        for player_name, sanciones in sorted_jugadores:
+            sancion_a_mostrar = next((s for s in sanciones if s.get('status') == 'active'), None)
+            if not sancion_a_mostrar:
+                sancion_a_mostrar = next((s for s in sanciones if s.get('status') == 'captain_banned'), None)
+
+            if not sancion_a_mostrar:
+                continue
+
+            row_bg = 'bg-slate-50' if row_index % 2 != 0 else 'bg-white'
+            estado_html = ""
+
+            if sancion_a_mostrar['status'] == 'active':
+                restantes = sancion_a_mostrar.get('games_to_serve', 3) - sancion_a_mostrar.get('games_served', 0)
+                if restantes > 0:
+                    estado_html = f"<span class='font-bold text-red-600'>Sancionado</span><br>Le quedan {restantes} partido(s) por cumplir."
+                else:
+                    estado_html = "<span class='font-semibold text-orange-500'>Puede volver al once, pero no como capitan.</span>"
+
+            elif sancion_a_mostrar['status'] == 'captain_banned':
+                jornada_fin_restriccion = sancion_a_mostrar.get('jornada_completed', 0) + 3
+                estado_html = f"<span class='font-semibold text-orange-500'>Puede volver al once, pero no como capitan.</span><br>Esta restricción dura hasta la Jornada {jornada_fin_restriccion}."
+
+            table_rows += f"""
+            <tr class="{row_bg}">
+                <td class="p-3 border border-slate-300">{team_name}</td>
+                <td class="p-3 border border-slate-300">{player_name}</td>
+                <td class="p-3 border border-slate-300">{estado_html}</td>
+            </tr>"""
+            row_index += 1
+
+    if not table_rows:
+        return "<p>No hay sanciones activas o recientes en esta división.</p>"
+
+    return f"""
+    <div class="overflow-x-auto rounded-lg shadow-sm">
+        <table class="w-full text-left border-collapse min-w-[600px]">
+            <thead class="bg-slate-200 text-slate-700">
+                <tr>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-slate-300">Equipo</th>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-slate-300">Jugador</th>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-slate-300">Estado de la Sanción</th>
+                </tr>
+            </thead>
+            <tbody>{table_rows}</tbody>
+        </table>
+    </div>"""
+
+# Genera el HTML para la tabla de historial de alineaciones indebidas.
+def _generar_tabla_violaciones_html(violaciones_division):
+    if not violaciones_division:
+        return "<p class='text-slate-500 italic'>No hay alineaciones indebidas registradas.</p>"
+
+    table_rows = ""
+    # Aplanar la estructura: lista de (team, violacion)
+    lista_plana = []
+    for team_name, lista_multas in violaciones_division.items():
+        for m in lista_multas:
+            lista_plana.append({'team': team_name, **m})
+    
+    # Ordenar por jornada descendente
+    lista_plana.sort(key=lambda x: x['jornada'], reverse=True)
+
+    for item in lista_plana:
+        table_rows += f"""
+        <tr class="bg-red-50 hover:bg-red-100 transition-colors">
+            <td class="p-3 border border-red-200 font-bold text-red-800 text-center">{item['jornada']}</td>
+            <td class="p-3 border border-red-200 font-bold text-red-800">{item['team']}</td>
+            <td class="p-3 border border-red-200 text-red-700">{item['jugador']}</td>
+            <td class="p-3 border border-red-200 text-red-700 text-center font-mono font-bold">5.00€</td>
+        </tr>"""
+
+    return f"""
+    <div class="overflow-x-auto rounded-lg shadow-sm border border-red-200">
+        <table class="w-full text-left border-collapse min-w-[600px]">
+            <thead class="bg-red-100 text-red-800">
+                <tr>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-red-200 text-center w-20">Jornada</th>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-red-200">Equipo</th>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-red-200">Jugador</th>
+                    <th class="p-3 font-bold uppercase text-xs tracking-wider border border-red-200 text-center w-24">Multa</th>
+                </tr>
+            </thead>
+            <tbody>{table_rows}</tbody>
+        </table>
+    </div>"""
+
+# Script de navegación del informe: menú lateral en móvil, desplegables de jornadas y sección visible.
+SCRIPT_NAVEGACION = """
+            document.addEventListener('DOMContentLoaded', () => {
+                const hamburgerBtn = document.getElementById('hamburger-btn');
+                const navbar = document.getElementById('navbar');
+                const overlay = document.getElementById('overlay');
+                const navLinks = document.querySelectorAll('.nav-link, .dropdown-content a');
+                const dropdownBtns = document.querySelectorAll('.dropdown-btn');
+
+                function toggleMenu() {
+                    const isOffScreen = navbar.classList.contains('-translate-x-full');
+                    navbar.classList.toggle('-translate-x-full', !isOffScreen);
+                    navbar.classList.toggle('translate-x-0', isOffScreen);
+                    overlay.classList.toggle('hidden');
+                }
+
+                hamburgerBtn.addEventListener('click', toggleMenu);
+                overlay.addEventListener('click', toggleMenu);
+
+                function showContent(targetId) {
+                    document.querySelectorAll('.content-section').forEach(section => section.classList.add('hidden'));
+                    const targetElement = document.getElementById(targetId);
+                    if (targetElement) {
+                        targetElement.classList.remove('hidden');
+                    }
+
+                    document.querySelectorAll('.nav-link').forEach(link => link.classList.remove('bg-sky-600'));
+                    const activeLink = document.querySelector(`.nav-link[data-target='${targetId}']`);
+                    if (activeLink) {
+                        activeLink.classList.add('bg-sky-600');
+                    }
+                }
+
+                navLinks.forEach(link => {
+                    link.addEventListener('click', e => {
+                        e.preventDefault();
+                        const targetId = e.currentTarget.dataset.target;
+                        showContent(targetId);
+                        if (window.innerWidth < 768) {
+                            toggleMenu();
+                        }
+                        document.querySelectorAll('.dropdown-content').forEach(d => d.classList.add('hidden'));
+                    });
+                });
+
+                dropdownBtns.forEach(btn => {
+                    btn.addEventListener('click', e => {
+                        e.stopPropagation();
+                        const dropdownContent = e.currentTarget.nextElementSibling;
+                        document.querySelectorAll('.dropdown-content').forEach(d => {
+                            if (d !== dropdownContent) d.classList.add('hidden');
+                        });
+                        dropdownContent.classList.toggle('hidden');
+                    });
+                });
+
+                window.addEventListener('click', () => {
+                    document.querySelectorAll('.dropdown-content').forEach(d => d.classList.add('hidden'));
+                });
+
+                document.addEventListener('informe-cargado', () => {
+                    const firstSectionId = document.querySelector('.content-section')?.id;
+                    if (firstSectionId) {
+                        showContent(firstSectionId);
+                    }
+                });
+            });"""
+
+# Script que carga las secciones de cada división desde su JSON de datos y avisa con el evento 'informe-cargado' cuando están todas.
+SCRIPT_CARGA_SECCIONES = """
+            document.addEventListener('DOMContentLoaded', () => {
+                const contenedores = [...document.querySelectorAll('[data-secciones]')];
+                Promise.all(contenedores.map(contenedor => fetch(contenedor.dataset.secciones)
+                    .then(respuesta => {
+                        if (!respuesta.ok) throw new Error(respuesta.status);
+                        return respuesta.json();
+                    })
+                    .then(datos => { contenedor.innerHTML = datos.html; })
+                    .catch(() => {
+                        contenedor.innerHTML = '<p class="text-center text-red-700 p-6">No se pudieron cargar los datos de esta división.</p>';
+                    })
+                )).then(() => document.dispatchEvent(new Event('informe-cargado')));
+            });"""
+
+# Escribe los scripts del informe como recursos con huella en su nombre (cacheables indefinidamente) y devuelve
+# (etiquetas <script> que los cargan, rutas escritas).
+def _escribir_scripts_informe(directorio, con_grafico):
+    scripts = [("carga_secciones", SCRIPT_CARGA_SECCIONES), ("navegacion", SCRIPT_NAVEGACION)]
+    scripts += [("grafico_evolucion", SCRIPT_GRAFICO_EVOLUCION)] if con_grafico else []
+    etiquetas, rutas = [], []
+    for nombre, codigo in scripts:
+        archivo, rutas_recurso = escribir_recurso_con_huella(minificar_js(codigo).encode('utf-8'), directorio, nombre, ".js")
+        etiquetas.append(f'<script src="{RECURSOS_INFORME_DIR}/{archivo}"></script>')
+        rutas.extend(rutas_recurso)
+    return "".join(etiquetas), rutas
+
+# Copia por bloques las secciones de cada división, [(división, archivo con el HTML ya escapado como texto JSON)], a temporales junto a
+# datos/<división>.secciones.json, sin llevarlos aún a su sitio. Devuelve los temporales pendientes [(archivo, temporal, ruta)].
+def _preparar_secciones(directorio, secciones):
+    pendientes = []
+    try:
+        for div_key, contenido in secciones:
+            ruta = os.path.join(directorio, f"{div_key}.secciones.json")
+            f, ruta_temporal = abrir_temporal_atomico(ruta)
+            pendientes.append((f, ruta_temporal, ruta))
+            with contenido:
+                contenido.seek(0)
+                f.write(b'{"html":"')
+                shutil.copyfileobj(contenido, f)
+                f.write(b'"}')
+    except BaseException:
+        _descartar_secciones(pendientes)
+        raise
+    return pendientes
+
+# Lleva a su sitio los archivos de secciones pendientes y escribe sus variantes comprimidas; devuelve las rutas escritas.
+def _confirmar_secciones(pendientes):
+    rutas = []
+    for f, ruta_temporal, ruta in pendientes:
+        confirmar_atomico(f, ruta_temporal, ruta)
+        rutas += [ruta, *escribir_variantes_comprimidas_por_bloques(ruta)]
+    return rutas
+
+# Borra los temporales de secciones que aún no se han llevado a su sitio.
+def _descartar_secciones(pendientes):
+    for f, ruta_temporal, _ in pendientes:
+        descartar_atomico(f, ruta_temporal)
+
+# Genera el informe (minificado, con sus variantes .gz/.br) usando Tailwind CSS. index.html solo lleva la cabecera, la navegación y un
+# contenedor por división; las secciones de cada división van en datos/<división>.secciones.json, que se cargan al abrir la página.
+# Así index.html solo cambia cuando cambia la navegación, y el navegador revalida los datos de cada división por separado.
+# Los scripts van aparte, con la huella de su contenido en el nombre. Las secciones se acumulan en archivos temporales (en memoria hasta
+# cierto tamaño) y los archivos de secciones solo se sustituyen cuando ya se han escrito los scripts: si algo falla, no cambia nada.
+# Devuelve las rutas de todo lo escrito.
+def generar_pagina_html_completa(datos_informe, output_path, current_matchday=None):
+    directorio_datos = os.path.join(os.path.dirname(output_path), DATOS_INFORME_DIR)
+    nav_links_html = ""
+    contenedores_html = ""
+    secciones = []
+
+    for div_key, div_data in datos_informe.items():
+        # Las secciones se escriben según se generan en un archivo temporal (en memoria hasta cierto tamaño) en lugar de concatenarse en una cadena.
+        contenido = tempfile.SpooledTemporaryFile(max_size=TAMANO_MAXIMO_EN_MEMORIA)
+        secciones.append((div_key, contenido))
+        # Cada sección se minifica al escribirla (ninguna parte un <script> entre dos escrituras) y se escapa ya como texto JSON,
+        # para copiar el archivo tal cual dentro de {"html": "..."}.
+        def escribir(html, contenido=contenido):
+            contenido.write(json.dumps(minificar_html(html), ensure_ascii=False)[1:-1].encode('utf-8'))
+        div_titulo = "1ª División" if div_key == "primera" else "2ª División"
+
+        id_clasificacion = f"{div_key}-clasificacion"
+        id_sanciones = f"{div_key}-sanciones"
+        id_violaciones = f"{div_key}-violaciones"
+        id_capitanes = f"{div_key}-capitanes"
+        id_totales = f"{div_key}-totales"
+
+        nav_links_html += f'<a href="#" class="nav-link block px-4 py-2 text-white hover:bg-slate-700 md:inline-block rounded-md transition-colors" data-target="{id_clasificacion}">Clasificación {div_titulo}</a>'
+        if div_data.get("evolucion"):
+            nav_links_html += f'<a href="#" class="nav-link block px-4 py-2 text-white hover:bg-slate-700 md:inline-block rounded-md transition-colors" data-target="{div_key}-evolucion">Evolución {div_titulo}</a>'
+        if div_data.get("proyeccion"):
+            nav_links_html += f'<a href="#" class="nav-link block px-4 py-2 text-white hover:bg-slate-700 md:inline-block rounded-md transition-colors" data-target="{div_key}-proyeccion">Proyección {div_titulo}</a>'
+        if div_data.get("elegibilidad"):
+            nav_links_html += f'<a href="#" class="nav-link block px-4 py-2 text-white hover:bg-slate-700 md:inline-block rounded-md transition-colors" data-target="{div_key}-elegibilidad">Elegibilidad {div_titulo}</a>'
+        nav_links_html += f'<a href="#" class="nav-link block px-4 py-2 text-white hover:bg-slate-700 md:inline-block rounded-md transition-colors" data-target="{id_sanciones}">Sanciones {div_titulo}</a>'
+        nav_links_html += f'<a href="#" class="nav-link block px-4 py-2 text-white hover:bg-slate-700 md:inline-block rounded-md transition-colors" data-target="{id_violaciones}">Alineaciones Indebidas {div_titulo}</a>'
+        nav_links_html += f'<a href="#" class="nav-link block px-4 py-2 text-white hover:bg-slate-700 md:inline-block rounded-md transition-colors" data-target="{id_capitanes}">Capitanes {div_titulo}</a>'
+        nav_links_html += f'<a href="#" class="nav-link block px-4 py-2 text-white hover:bg-slate-700 md:inline-block rounded-md transition-colors" data-target="{id_totales}">Multas Totales {div_titulo}</a>'
+        if div_data.get("coincidencias"):
+            nav_links_html += f'<a href="#" class="nav-link block px-4 py-2 text-white hover:bg-slate-700 md:inline-block rounded-md transition-colors" data-target="{div_key}-coincidencias">Coincidencias {div_titulo}</a>'
+        if div_data.get("estadisticas"):
+            nav_links_html += f'<a href="#" class="nav-link block px-4 py-2 text-white hover:bg-slate-700 md:inline-block rounded-md transition-colors" data-target="{div_key}-estadisticas">Estadísticas {div_titulo}</a>'
+
+        escribir(f'<div id="{id_clasificacion}" class="content-section p-4 md:p-6 bg-white rounded-lg shadow-md mb-6"> <h2 class="text-xl md:text-2xl font-bold text-center text-slate-700 border-b-2 border-sky-500 pb-3 mb-6">Clasificación - {div_titulo}</h2> {_generar_tabla_clasificacion_html(div_data["clasificacion"])} </div>')
+        if div_data.get("evolucion"):
+            escribir(f'<div id="{div_key}-evolucion" class="content-section p-4 md:p-6 bg-white rounded-lg shadow-md mb-6"> <h2 class="text-xl md:text-2xl font-bold text-center text-slate-700 border-b-2 border-sky-500 pb-3 mb-6">Evolución de la Clasificación - {div_titulo}</h2> {_generar_grafico_evolucion_html(div_data["evolucion"], div_key)} </div>')
+        if div_data.get("proyeccion"):
+            escribir(f'<div id="{div_key}-proyeccion" class="content-section p-4 md:p-6 bg-white rounded-lg shadow-md mb-6"> <h2 class="text-xl md:text-2xl font-bold text-center text-slate-700 border-b-2 border-sky-500 pb-3 mb-6">Proyección Final - {div_titulo}</h2> {_generar_tabla_proyeccion_html(div_data["proyeccion"])} </div>')
+        if div_data.get("elegibilidad"):
+            escribir(f'<div id="{div_key}-elegibilidad" class="content-section p-4 md:p-6 bg-white rounded-lg shadow-md mb-6"> <h2 class="text-xl md:text-2xl font-bold text-center text-slate-700 border-b-2 border-sky-500 pb-3 mb-6">Elegibilidad Jornada {div_data["elegibilidad"]["ronda"]} - {div_titulo}</h2> {_generar_tabla_elegibilidad_html(div_data["elegibilidad"])} </div>')
+        escribir(f'<div id="{id_sanciones}" class="content-section p-4 md:p-6 bg-white rounded-lg shadow-md mb-6"> <h2 class="text-xl md:text-2xl font-bold text-center text-slate-700 border-b-2 border-sky-500 pb-3 mb-6">Sanciones Activas - {div_titulo}</h2> {_generar_tabla_sanciones_html(div_data["sanciones"])} </div>')
+        escribir(f'<div id="{id_violaciones}" class="content-section p-4 md:p-6 bg-white rounded-lg shadow-md mb-6"> <h2 class="text-xl md:text-2xl font-bold text-center text-red-700 border-b-2 border-red-500 pb-3 mb-6">Historial Alineaciones Indebidas - {div_titulo}</h2> {_generar_tabla_violaciones_html(div_data.get("violaciones_historico"))} </div>')
+        escribir(f'<div id="{id_capitanes}" class="content-section p-4 md:p-6 bg-white rounded-lg shadow-md mb-6"> <h2 class="text-xl md:text-2xl font-bold text-center text-slate-700 border-b-2 border-sky-500 pb-3 mb-6">Historial de Capitanes - {div_titulo}</h2> {_generar_tabla_capitanes_html(div_data["capitanes"], div_data["totales"].keys())} </div>')
+        escribir(f'<div id="{id_totales}" class="content-section p-4 md:p-6 bg-white rounded-lg shadow-md mb-6"> <h2 class="text-xl md:text-2xl font-bold text-center text-slate-700 border-b-2 border-sky-500 pb-3 mb-6">Multas Totales - {div_titulo}</h2> {_generar_tabla_multas_totales_html(div_data["totales"])} </div>')
+        if div_data.get("coincidencias"):
+            escribir(f'<div id="{div_key}-coincidencias" class="content-section p-4 md:p-6 bg-white rounded-lg shadow-md mb-6"> <h2 class="text-xl md:text-2xl font-bold text-center text-slate-700 border-b-2 border-sky-500 pb-3 mb-6">Coincidencias de Alineaciones - {div_titulo}</h2> {_generar_tabla_coincidencias_html(div_data["coincidencias"])} </div>')
+        if div_data.get("estadisticas"):
+            escribir(f'<div id="{div_key}-estadisticas" class="content-section p-4 md:p-6 bg-white rounded-lg shadow-md mb-6"> <h2 class="text-xl md:text-2xl font-bold text-center text-slate-700 border-b-2 border-sky-500 pb-3 mb-6">Estadísticas - {div_titulo}</h2> {_generar_tabla_estadisticas_html(div_data["estadisticas"])} </div>')
+
+        nav_links_html += '<div class="relative dropdown-container">'
+        nav_links_html += f'<button class="dropdown-btn block w-full text-left px-4 py-2 text-white hover:bg-slate-700 md:inline-block md:w-auto rounded-md transition-colors">Multas Jornada ({div_titulo}) &#9662;</button>'
+        nav_links_html += '<div class="dropdown-content hidden md:absolute bg-white text-black rounded-md shadow-lg mt-2 py-1 z-20 w-full md:w-48 max-h-64 overflow-y-auto">'
+
+        sorted_jornadas = sorted(div_data['jornadas'], key=lambda x: x['numero'])
+        for jornada_data in sorted_jornadas:
+            jornada_num = jornada_data['numero']
+            id_jornada = f"{div_key}-jornada-{jornada_num}"
+            escribir(f'<div id="{id_jornada}" class="content-section hidden p-4 md:p-6 bg-white rounded-lg shadow-md mb-6"> <h2 class="text-xl md:text-2xl font-bold text-center text-slate-700 border-b-2 border-sky-500 pb-3 mb-6">Multas Jornada {jornada_num} - {div_titulo}</h2> {_generar_tabla_multas_jornada_html(jornada_data["multas"])} </div>')
+            nav_links_html += f'<a href="#" class="block px-4 py-2 hover:bg-slate-100 text-sm" data-target="{id_jornada}">Jornada {jornada_num}</a>'
+
+        nav_links_html += '</div></div>'
+
+        contenedores_html += f'<div id="{div_key}-secciones" data-secciones="{DATOS_INFORME_DIR}/{div_key}.secciones.json"></div>'
+
+    try:
+        pendientes = _preparar_secciones(directorio_datos, secciones)
+    except Exception as e:
+        print(f"Error al guardar las secciones del informe: {e}")
+        return []
+
+    directorio_recursos = os.path.join(os.path.dirname(output_path), RECURSOS_INFORME_DIR)
+    try:
+        scripts_html, rutas = _escribir_scripts_informe(directorio_recursos, any(div_data.get("evolucion") for div_data in datos_informe.values()))
+    except Exception as e:
+        _descartar_secciones(pendientes)
+        print(f"Error al guardar los scripts del informe: {e}")
+        return []
+
+    pagina = f"""
+    <!DOCTYPE html>
+    <html lang="es" class="scroll-smooth">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>Informe - SuperLiga Fuentmondo</title>
+        <script src="https://cdn.jsdelivr.net/npm/@tailwindcss/browser@4"></script>
+    </head>
+    <body class="bg-slate-100 text-slate-800 font-sans">
+
+        <header class="bg-slate-800 text-white flex justify-between items-center p-4 shadow-lg fixed top-0 left-0 right-0 z-50">
+            <div class="flex flex-col">
+                <h1 class="text-xl font-bold">Informe SuperLiga</h1>
+                {f'<span class="text-sm text-slate-300">Jornada Actual: {current_matchday}</span>' if current_matchday else ''}
+            </div>
+            <button id="hamburger-btn" class="md:hidden text-2xl">☰</button>
+            <nav id="navbar" class="fixed top-0 left-0 h-full w-64 bg-slate-800 transform -translate-x-full transition-transform duration-300 ease-in-out md:relative md:translate-x-0 md:flex md:w-auto md:h-auto md:bg-transparent">
+                <div class="p-4 md:flex md:items-center md:gap-2">
+                    {nav_links_html}
+                </div>
+            </nav>
+        </header>
+
+        <div id="overlay" class="fixed inset-0 bg-black bg-opacity-50 z-30 hidden md:hidden"></div>
+
+        <main class="pt-20">
+            <div class="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8 py-8 space-y-8">
+                {contenedores_html}
+            </div>
+        </main>
+
+        {scripts_html}
+    </body>
+    </html>"""
+
+    try:
+        # Se escribe de forma atómica: si la etapa se abandona por tiempo, el informe anterior queda intacto.
+        html = minificar_html(pagina).encode('utf-8')
+        rutas_secciones = _confirmar_secciones(pendientes)
+        escribir_atomico(html, output_path)
+        rutas = [output_path, *escribir_variantes_comprimidas(output_path, html), *rutas, *rutas_secciones]
+        print(f"Informe HTML (Tailwind CSS) completo guardado en '{output_path}' ({len(rutas) - 1} recursos y variantes comprimidas).")
+    except Exception as e:
+        _descartar_secciones(pendientes)
+        print(f"Error al guardar el archivo HTML final: {e}")
+        return []
+    return rutas
+
+# Exporta los datos de cada división a un JSON determinista para publicarlos como artefactos independientes.
+def exportar_datos_informe(datos_informe, directorio_salida):
+    rutas = []
+    try:
+        os.makedirs(directorio_salida, exist_ok=True)
+        for div_key, div_data in datos_informe.items():
+            ruta = os.path.join(directorio_salida, f"{div_key}.json")
+            datos_json = json.dumps(div_data, ensure_ascii=False, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')
+            escribir_atomico(datos_json, ruta)
+            rutas.extend([ruta, *escribir_variantes_comprimidas(ruta, datos_json)])
+        print(f"Datos del informe exportados en '{directorio_salida}'.")
+    except Exception as e:
+        print(f"Error al exportar los datos del informe: {e}")
+    return rutas
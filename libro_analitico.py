@@ -0,0 +1,85 @@
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+from persistencia import escribir_atomico_con
+
+# Conceptos del desglose de multas, en el orden de las columnas de la hoja.
+CONCEPTOS_MULTAS = [
+    ("jugadores_repetidos", "Jugadores repetidos"),
+    ("capitan_repetido_con_rival", "Capitán repetido con rival"),
+    ("tenias_capitan_rival", "Tenías el capitán rival"),
+    ("peor_equipo_jornada", "Peor equipo de la jornada"),
+    ("alinear_peor_jugador", "Alinear al peor jugador"),
+    ("elegir_peor_capitan", "Elegir al peor capitán"),
+    ("alineacion_indebida", "Alineación indebida"),
+]
+
+CABECERA_MULTAS = ["División", "Jornada", "Equipo"] + [titulo for _, titulo in CONCEPTOS_MULTAS] + ["Total"]
+CABECERA_CAPITANES = ["División", "Jornada", "Equipo", "Capitán"]
+CABECERA_SANCIONES = ["División", "Equipo", "Jugador", "Jornada sanción", "Partidos", "Cumplidos", "Estado", "Jornada fin"]
+CABECERA_INDEBIDAS = ["División", "Jornada", "Equipo", "Jugador", "Multa"]
+
+# Filas de la hoja de multas: una por equipo y jornada, con el importe de cada concepto del desglose.
+def filas_multas(etiqueta, datos_jornadas):
+    for jornada in datos_jornadas:
+        for team_name, datos in sorted(jornada['multas'].items()):
+            desglose = datos.get('desglose', {})
+            importes = [desglose.get(clave, {}).get('multa', 0.0) for clave, _ in CONCEPTOS_MULTAS]
+            yield [etiqueta, jornada['numero'], team_name, *importes, datos.get('multa_total', 0.0)]
+
+# Filas de la hoja de capitanes: el capitán de cada equipo en cada jornada.
+def filas_capitanes(etiqueta, capitanes):
+    for round_number in sorted(capitanes):
+        for info in capitanes[round_number]:
+            yield [etiqueta, round_number, info['team_name'], info['capitan']]
+
+# Filas de la hoja de sanciones: una por sanción de cada jugador.
+def filas_sanciones(etiqueta, sanciones):
+    for team_name in sorted(sanciones):
+        for jugador, lista_sanciones in sorted(sanciones[team_name].items()):
+            for sancion in lista_sanciones:
+                yield [
+                    etiqueta, team_name, jugador, sancion.get('jornada_triggered'), sancion.get('games_to_serve'),
+                    sancion.get('games_served'), sancion.get('status'), sancion.get('jornada_completed'),
+                ]
+
+# Filas de la hoja de alineaciones indebidas.
+def filas_indebidas(etiqueta, violaciones):
+    for team_name in sorted(violaciones):
+        for multa in violaciones[team_name]:
+            yield [etiqueta, multa['jornada'], team_name, multa['jugador'], multa['multa']]
+
+# Añade a un libro en modo de solo escritura una hoja con cabecera en negrita y filas volcadas de una en una.
+def _escribir_hoja(workbook, titulo, cabecera, filas):
+    sheet = workbook.create_sheet(titulo)
+    sheet.freeze_panes = 'A2'
+    celdas_cabecera = []
+    for texto in cabecera:
+        celda = WriteOnlyCell(sheet, value=texto)
+        celda.font = Font(bold=True)
+        celdas_cabecera.append(celda)
+    sheet.append(celdas_cabecera)
+    total = 0
+    for fila in filas:
+        sheet.append(fila)
+        total += 1
+    return total
+
+# Genera el libro de analítica en modo de solo escritura (streaming) a partir de los datos del informe de cada división.
+def generar_libro_analitico(datos_divisiones, etiquetas, ruta_salida):
+    workbook = Workbook(write_only=True)
+    hojas = [
+        ("Multas por jornada", CABECERA_MULTAS, lambda etiqueta, datos: filas_multas(etiqueta, datos['jornadas'])),
+        ("Capitanes", CABECERA_CAPITANES, lambda etiqueta, datos: filas_capitanes(etiqueta, datos['capitanes'])),
+        ("Sanciones", CABECERA_SANCIONES, lambda etiqueta, datos: filas_sanciones(etiqueta, datos['sanciones'])),
+        ("Alineaciones indebidas", CABECERA_INDEBIDAS, lambda etiqueta, datos: filas_indebidas(etiqueta, datos['violaciones'])),
+    ]
+    for titulo, cabecera, filas in hojas:
+        n_filas = _escribir_hoja(workbook, titulo, cabecera, (
+            fila for division, datos in datos_divisiones.items() for fila in filas(etiquetas[division], datos)
+        ))
+        print(f"Hoja '{titulo}': {n_filas} filas.")
+    escribir_atomico_con(workbook.save, ruta_salida)
+    print(f"Libro de analítica guardado en '{ruta_salida}'.")
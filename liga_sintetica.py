@@ -0,0 +1,275 @@
+import argparse
+from contextlib import contextmanager
+import glob
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+# Jugadores de la plantilla de cada equipo, de los que salen sus once de cada jornada.
+JUGADORES_POR_PLANTILLA = 18
+JUGADORES_POR_ALINEACION = 11
+# Popularidad de los jugadores (ley de Zipf): unos pocos aparecen en muchas plantillas, como en una liga real.
+EXPONENTE_POPULARIDAD = 0.8
+# Probabilidad de que un equipo capitanee a su capitán habitual o a su alternativo; en el resto de jornadas elige uno cualquiera del once.
+PROB_CAPITAN_HABITUAL = 0.7
+PROB_CAPITAN_ALTERNATIVO = 0.2
+
+# Rutas de la API de Futmondo que reproduce el generador (las mismas que usa configuracion.py).
+RUTA_GENERAL = "/1/ranking/general"
+RUTA_EQUIPOS = "/2/championship/teams"
+RUTA_RONDAS = "/1/userteam/rounds"
+RUTA_RONDA = "/1/ranking/round"
+RUTA_ALINEACION = "/1/userteam/roundlineup"
+
+# Crea una liga sintética reproducible: equipos con plantillas extraídas de un mismo conjunto de jugadores (compartido entre ligas,
+# como los jugadores reales), capitán habitual y alternativo de cada equipo, y calendario con jornadas aplazadas (números .5).
+def crear_liga(id_liga, equipos=20, jornadas=38, jugadores=None, aplazadas=0, semilla=0):
+    rnd = random.Random(f"{semilla}-{id_liga}")
+    n_jugadores = jugadores or max(60, equipos * 8)
+    pesos = [1 / (n + 1) ** EXPONENTE_POPULARIDAD for n in range(n_jugadores)]
+    lista_equipos = []
+    for n in range(equipos):
+        plantilla = set()
+        while len(plantilla) < min(JUGADORES_POR_PLANTILLA, n_jugadores):
+            plantilla.update(rnd.choices(range(n_jugadores), weights=pesos, k=JUGADORES_POR_PLANTILLA - len(plantilla)))
+        plantilla = [f"Jugador {j}" for j in sorted(plantilla)]
+        habitual, alternativo = rnd.sample(plantilla, 2)
+        lista_equipos.append({"_id": f"{id_liga}-t{n + 1}", "name": f"Equipo {id_liga} {n + 1}", "plantilla": plantilla,
+                              "habitual": habitual, "alternativo": alternativo})
+
+    numeros = list(range(1, jornadas + 1))
+    numeros += [n + 0.5 for n in rnd.sample(range(1, max(1, jornadas - 2)), min(aplazadas, max(0, jornadas - 3)))]
+    return {
+        "id": id_liga,
+        "semilla": semilla,
+        "equipos": lista_equipos,
+        "rondas": {f"{id_liga}-r{numero}": numero for numero in sorted(numeros)},
+        "cache": {},
+        "bloqueo": threading.Lock(),
+    }
+
+# Equipos canónicos de una liga en el formato de configuracion.py ({"1": nombre, ...}), en el orden en que salen en las rondas.
+def equipos_canonicos(liga):
+    return {str(n): equipo["name"] for n, equipo in enumerate(liga["equipos"], 1)}
+
+# Puntos de un jugador en una jornada: dependen solo de la semilla, la jornada y el jugador, así que coinciden en todas las ligas.
+def _puntos_jugador(semilla, numero, jugador):
+    return random.Random(f"{semilla}-{numero}-{jugador}").choice([-2, -1, 0, 1, 2, 2, 3, 4, 4, 5, 6, 7, 8, 10, 12, 15])
+
+# Once y capitán de un equipo en una jornada, con los puntos de cada jugador (el capitán puntúa doble en el marcador del equipo).
+def _alineacion(liga, equipo, numero):
+    rnd = random.Random(f"{liga['semilla']}-{equipo['_id']}-{numero}")
+    once = rnd.sample(equipo["plantilla"], min(JUGADORES_POR_ALINEACION, len(equipo["plantilla"])))
+    eleccion = rnd.random()
+    if eleccion < PROB_CAPITAN_HABITUAL:
+        capitan = equipo["habitual"]
+    elif eleccion < PROB_CAPITAN_HABITUAL + PROB_CAPITAN_ALTERNATIVO:
+        capitan = equipo["alternativo"]
+    else:
+        capitan = rnd.choice(once)
+    if capitan not in once:
+        once[0] = capitan
+    return [{"name": jugador, "points": _puntos_jugador(liga["semilla"], numero, jugador), "cpt": jugador == capitan} for jugador in once]
+
+# Datos de una jornada (alineaciones, marcadores y enfrentamientos), calculados una vez y guardados en la liga.
+# Los enfrentamientos siguen un calendario de todos contra todos (método del círculo) según la posición de la jornada.
+def _jornada(liga, numero):
+    with liga["bloqueo"]:
+        if numero in liga["cache"]:
+            return liga["cache"][numero]
+    alineaciones = {equipo["_id"]: _alineacion(liga, equipo, numero) for equipo in liga["equipos"]}
+    marcadores = [sum(p["points"] * (2 if p["cpt"] else 1) for p in alineaciones[equipo["_id"]]) for equipo in liga["equipos"]]
+
+    n = len(liga["equipos"])
+    circulo = list(range(n)) + ([None] if n % 2 else [])
+    giro = sorted(liga["rondas"].values()).index(numero) % max(1, len(circulo) - 1)
+    circulo = circulo[:1] + circulo[1:][-giro:] + circulo[1:][:-giro] if giro else circulo
+    mitad = len(circulo) // 2
+    matches = [
+        {"p": [a + 1, b + 1], "m": [marcadores[a], marcadores[b]]}
+        for a, b in zip(circulo[:mitad], reversed(circulo[mitad:])) if a is not None and b is not None
+    ]
+    jornada = {"alineaciones": alineaciones, "marcadores": marcadores, "matches": matches}
+    with liga["bloqueo"]:
+        liga["cache"][numero] = jornada
+    return jornada
+
+# Puntos de liga y puntos generales acumulados de cada equipo en todas las jornadas del calendario.
+def _acumulado(liga):
+    from clasificacion import PUNTOS_EMPATE, PUNTOS_VICTORIA
+
+    puntos = [0] * len(liga["equipos"])
+    generales = [0] * len(liga["equipos"])
+    for numero in sorted(liga["rondas"].values()):
+        for match in _jornada(liga, numero)["matches"]:
+            (a, b), (ma, mb) = match["p"], match["m"]
+            generales[a - 1] += ma
+            generales[b - 1] += mb
+            if ma == mb:
+                puntos[a - 1] += PUNTOS_EMPATE
+                puntos[b - 1] += PUNTOS_EMPATE
+            else:
+                puntos[(a if ma > mb else b) - 1] += PUNTOS_VICTORIA
+    return puntos, generales
+
+# Cuerpo JSON de una respuesta de Futmondo para una liga, o None si la ruta o la consulta no corresponden a nada.
+def respuesta_liga(liga, ruta, query):
+    if ruta == RUTA_RONDAS:
+        return {"answer": [{"number": numero, "id": id_ronda} for id_ronda, numero in liga["rondas"].items()]}
+    if ruta in (RUTA_GENERAL, RUTA_EQUIPOS):
+        puntos, generales = _acumulado(liga)
+        if ruta == RUTA_EQUIPOS:
+            return {"answer": {"teams": [{"teamname": e["name"], "points": g} for e, g in zip(liga["equipos"], generales)]}}
+        ranking = sorted(zip(liga["equipos"], puntos, generales), key=lambda x: (-x[1], -x[2]))
+        return {"answer": {"ranking": [{"name": e["name"], "points": p} for e, p, _ in ranking]}}
+    if ruta == RUTA_RONDA and query.get("roundNumber") in liga["rondas"]:
+        jornada = _jornada(liga, liga["rondas"][query["roundNumber"]])
+        ranking = [{"_id": e["_id"], "name": e["name"], "points": m} for e, m in zip(liga["equipos"], jornada["marcadores"])]
+        return {"answer": {"ranking": ranking, "matches": jornada["matches"]}}
+    if ruta == RUTA_ALINEACION and query.get("round") in liga["rondas"]:
+        alineacion = _jornada(liga, liga["rondas"][query["round"]])["alineaciones"].get(query.get("userteamId"))
+        return None if alineacion is None else {"answer": {"players": alineacion}}
+    return None
+
+# Función (ruta, consulta) -> cuerpo JSON para el simulador de Futmondo que sirve varias ligas, elegidas por championshipId.
+def respuestas_ligas(ligas):
+    por_id = {liga["id"]: liga for liga in ligas}
+    return lambda ruta, query: respuesta_liga(por_id[query["championshipId"]], ruta, query) if query.get("championshipId") in por_id else None
+
+# Rondas de una liga en el formato de la caché ({número: {datos, alineaciones}}), sin pasar por el servidor: para pruebas y benchmarks.
+def rondas_liga(liga):
+    rondas = {}
+    for id_ronda, numero in liga["rondas"].items():
+        datos = respuesta_liga(liga, RUTA_RONDA, {"roundNumber": id_ronda})
+        alineaciones = {
+            equipo["_id"]: respuesta_liga(liga, RUTA_ALINEACION, {"round": id_ronda, "userteamId": equipo["_id"]})["answer"]["players"]
+            for equipo in liga["equipos"]
+        }
+        rondas[numero] = {"datos": datos, "alineaciones": alineaciones}
+    return rondas
+
+# Prepara el directorio de trabajo para procesar las ligas sintéticas con el proceso real: devuelve la configuración de una división
+# por liga, con su payload, y crea un Excel con una hoja de clasificación por liga y la hoja 'Capitanes' con una fila por jornada.
+def preparar_divisiones_sinteticas(ligas, ruta_excel):
+    import openpyxl
+
+    divisiones = {}
+    workbook = openpyxl.Workbook()
+    workbook.remove(workbook.active)
+    capitanes = workbook.create_sheet("Capitanes")
+    columna = 3
+    for liga in ligas:
+        division = f"liga_{liga['id']}"
+        ruta_payload = f"payload_{division}.json"
+        with open(ruta_payload, 'w', encoding='utf-8') as f:
+            json.dump({"header": {"token": "sintetico", "userid": "sintetico"}, "query": {"championshipId": liga["id"], "roundId": None, "userteamId": None}}, f)
+        divisiones[division] = {
+            "payload": ruta_payload,
+            "equipos": equipos_canonicos(liga),
+            "etiqueta": f"Liga {liga['id']}",
+            "hoja_clasificacion": f"Clasificación {liga['id']}",
+            "fila_inicio": 2,
+            "columna_inicio": 2,
+            "columna_capitanes": columna,
+            "plazas_descenso": 0,
+        }
+        workbook.create_sheet(divisiones[division]["hoja_clasificacion"])
+        columna += 2 * len(liga["equipos"]) + 1
+    numeros = sorted({numero for liga in ligas for numero in liga["rondas"].values()})
+    for fila, numero in enumerate(numeros, 5):
+        capitanes.cell(row=fila, column=2).value = f"Jornada {numero}"
+    workbook.save(ruta_excel)
+    return divisiones
+
+# Sustituye mientras dura el bloque las divisiones configuradas (que las etapas leen de configuracion.DIVISIONES) y restaura las originales al salir.
+@contextmanager
+def usar_divisiones(divisiones):
+    from configuracion import DIVISIONES
+
+    originales = dict(DIVISIONES)
+    DIVISIONES.clear()
+    DIVISIONES.update(divisiones)
+    try:
+        yield list(divisiones)
+    finally:
+        DIVISIONES.clear()
+        DIVISIONES.update(originales)
+
+# Borra los '.lock' que deja bloqueo_archivo junto a los JSON, para que el directorio de salida contenga solo los artefactos.
+def retirar_bloqueos(directorio):
+    for ruta in glob.glob(os.path.join(glob.escape(directorio), "**", "*.json.lock"), recursive=True):
+        os.remove(ruta)
+
+# Punto de entrada: genera las ligas, las sirve con el simulador de Futmondo y ejecuta sobre ellas el proceso completo
+# (descarga, multas, sanciones, Excel, informe), midiendo cada etapa y, con --profile, guardando su perfil.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga del proceso completo con ligas sintéticas servidas por el simulador de Futmondo.")
+    parser.add_argument('--ligas', type=int, default=2, help="Número de ligas (divisiones) que se procesan a la vez.")
+    parser.add_argument('--equipos', type=int, default=200, help="Equipos por liga.")
+    parser.add_argument('--jornadas', type=int, default=10, help="Jornadas por liga.")
+    parser.add_argument('--jugadores', type=int, help="Jugadores en el conjunto común (por defecto, 8 por equipo).")
+    parser.add_argument('--aplazadas', type=int, default=1, help="Jornadas aplazadas (números .5) por liga.")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--directorio', help="Directorio de trabajo (por defecto, uno temporal que se borra al terminar).")
+    parser.add_argument('--profile', action='store_true', help="Guarda el perfil de cada etapa en perfiles/ (en el directorio desde el que se lanza).")
+    args = parser.parse_args(argv)
+
+    from servidor_simulado import iniciar_servidor_futmondo
+
+    ligas = [crear_liga(f"L{n + 1}", args.equipos, args.jornadas, args.jugadores, args.aplazadas, args.semilla) for n in range(args.ligas)]
+    servidor, estado, base = iniciar_servidor_futmondo(respuestas_ligas(ligas), tasa=1e9, rafaga=10**9)
+    # La configuración toma la URL de la API al importarse: el proceso se importa después de fijarla.
+    os.environ["FUTMONDO_API_URL"] = base
+    # Los perfiles se guardan fuera del directorio de trabajo, que por defecto es temporal.
+    directorio_perfiles = os.path.abspath("perfiles")
+    temporal = None if args.directorio else tempfile.TemporaryDirectory()
+    directorio = args.directorio or temporal.name
+    os.makedirs(directorio, exist_ok=True)
+    origen = os.getcwd()
+    os.chdir(directorio)
+    try:
+        import futmondo_api
+        from configuracion import LOCAL_EXCEL_FILENAME
+        from etapas import etapa_fetch, etapa_multas, etapa_sanciones, etapa_excel, etapa_informe
+        from planificador_api import CONCURRENCIA_MAXIMA, crear_planificador
+
+        sinteticas = preparar_divisiones_sinteticas(ligas, LOCAL_EXCEL_FILENAME)
+        futmondo_api._planificador = crear_planificador(tasa=1e9, rafaga=10**9, concurrencia=CONCURRENCIA_MAXIMA)
+        etapas = [
+            ("fetch", etapa_fetch, (list(sinteticas),)),
+            ("fines", etapa_multas, (list(sinteticas),)),
+            ("sanctions", etapa_sanciones, (list(sinteticas),)),
+            ("excel", etapa_excel, (list(sinteticas),)),
+            ("report", etapa_informe, ()),
+        ]
+        if args.profile:
+            from perfilado import directorio_ejecucion, perfilar_etapa
+            directorio_perfiles = directorio_ejecucion(directorio_perfiles)
+            etapas = [(nombre, perfilar_etapa(etapa, directorio_perfiles), argumentos) for nombre, etapa, argumentos in etapas]
+
+        tiempos = {}
+        with usar_divisiones(sinteticas):
+            for nombre, etapa, argumentos in etapas:
+                inicio = time.perf_counter()
+                etapa(*argumentos)
+                tiempos[nombre] = time.perf_counter() - inicio
+
+        print(f"\n--- PRUEBA DE CARGA: {args.ligas} ligas × {args.equipos} equipos × {args.jornadas} jornadas (+{args.aplazadas} aplazadas) en '{directorio}' ---")
+        for nombre, segundos in tiempos.items():
+            print(f"{nombre:<10} {segundos:8.2f} s")
+        print(f"{'total':<10} {sum(tiempos.values()):8.2f} s")
+        print(f"Simulador: {estado['trafico']}")
+        if args.profile:
+            print(f"Perfiles en '{directorio_perfiles}'.")
+    finally:
+        retirar_bloqueos(".")
+        servidor.shutdown()
+        os.chdir(origen)
+        if temporal:
+            temporal.cleanup()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,398 @@
+from collections import defaultdict
+import copy
+
+from alineaciones_bits import indice_jugadores, mascara_alineacion, mascara_nombres, contiene, coincidencias_ronda
+from persistencia import guardar_respuesta
+from sanciones import PARTIDOS, indice_vacio, posicion_jornada, anadir_sancion, restriccion, sancion_vigente, sancion_con_estado
+
+# Cuantías de las multas y parámetros de las sanciones de la liga.
+REGLAS_POR_DEFECTO = {
+    "multa_jugador_repetido": 0.5,
+    "multa_capitan_repetido": 1.0,
+    "multa_capitan_rival": 1.0,
+    "multas_peores_equipos": {1: 2.0, 2: 1.5, 3: 1.0},
+    "multa_peor_jugador": 1.0,
+    "multa_peor_capitan": 1.0,
+    "multa_alineacion_indebida": 5.0,
+    "capitanias_para_sancion": 3,
+    "partidos_sancion": 3,
+    "jornadas_sin_capitania": 3,
+}
+
+# Combina unas reglas parciales con las reglas por defecto, normalizando las claves de la tabla de peores equipos.
+def construir_reglas(parciales=None):
+    reglas = copy.deepcopy(REGLAS_POR_DEFECTO)
+    for clave, valor in (parciales or {}).items():
+        if clave not in reglas:
+            raise ValueError(f"Regla desconocida: '{clave}'")
+        if clave == "multas_peores_equipos":
+            valor = {int(pos): float(multa) for pos, multa in valor.items()}
+        reglas[clave] = valor
+    return reglas
+
+# Calcula, para cada equipo de una jornada, los hechos que generan multas, independientemente de su cuantía.
+# Las alineaciones se comparan como conjuntos de bits sobre el índice de jugadores (si no se reciben, se construyen aquí).
+# Las máscaras solo valen con el índice con el que se calcularon: si llegan sin él, se descartan y se recalculan sobre uno nuevo.
+def calcular_indicadores_jornada(teams_in_round, matches, team_map_name, dict_alineaciones, dict_capitanes, lista_peores_equipos, peores_jugadores_final, peores_capitanes_final, indice=None, mascaras_alineaciones=None):
+    if indice is None:
+        indice, mascaras_alineaciones = indice_jugadores(), None
+    if mascaras_alineaciones is None:
+        mascaras_alineaciones = {team_name: mascara_alineacion(indice, lineup) for team_name, lineup in dict_alineaciones.items()}
+    indicadores = {}
+    for team_name in teams_in_round:
+        indicadores[team_name] = {
+            "jugadores_repetidos": 0,
+            "capitan_repetido_con_rival": False,
+            "tenias_capitan_rival": False,
+            "posicion_peor_equipo": 0,
+            "alinear_peor_jugador": False,
+            "elegir_peor_capitan": False,
+        }
+    for match in matches:
+        team_indices = match['p']
+        team_a_name = team_map_name.get(team_indices[0])
+        team_b_name = team_map_name.get(team_indices[1])
+        if not team_a_name or not team_b_name:
+            continue
+
+        mascara_a = mascaras_alineaciones.get(team_a_name, 0)
+        mascara_b = mascaras_alineaciones.get(team_b_name, 0)
+        capitan_a = dict_capitanes.get(team_a_name, "N/A")
+        capitan_b = dict_capitanes.get(team_b_name, "N/A")
+
+        mascara_capitanes = mascara_nombres(indice, [capitan for capitan in (capitan_a, capitan_b) if capitan != "N/A"])
+        repetidos_para_multa = (mascara_a & mascara_b & ~mascara_capitanes).bit_count()
+        if repetidos_para_multa:
+            indicadores[team_a_name]["jugadores_repetidos"] = repetidos_para_multa
+            indicadores[team_b_name]["jugadores_repetidos"] = repetidos_para_multa
+
+        if capitan_a == capitan_b and capitan_a != "N/A":
+            indicadores[team_a_name]["capitan_repetido_con_rival"] = True
+            indicadores[team_b_name]["capitan_repetido_con_rival"] = True
+        if contiene(indice, mascara_b, capitan_a) and capitan_a != capitan_b:
+            indicadores[team_b_name]["tenias_capitan_rival"] = True
+        if contiene(indice, mascara_a, capitan_b) and capitan_a != capitan_b:
+            indicadores[team_a_name]["tenias_capitan_rival"] = True
+
+    for item in lista_peores_equipos:
+        if item['equipo'] in indicadores:
+            indicadores[item['equipo']]["posicion_peor_equipo"] = item['posicion']
+
+    mascara_peores_jugadores = mascara_nombres(indice, (p['nombre'] for p in peores_jugadores_final))
+    for team_name, mascara in mascaras_alineaciones.items():
+        if mascara & mascara_peores_jugadores:
+            indicadores[team_name]["alinear_peor_jugador"] = True
+
+    nombres_peores_capitanes = {p['nombre'] for p in peores_capitanes_final}
+    for team_name, capitan in dict_capitanes.items():
+        if capitan in nombres_peores_capitanes:
+            indicadores[team_name]["elegir_peor_capitan"] = True
+
+    return indicadores
+
+# Convierte los indicadores de una jornada en multas con desglose, según las cuantías de las reglas.
+def aplicar_reglas_multas(indicadores, reglas=REGLAS_POR_DEFECTO):
+    multas_finales = {}
+    multas_peores = reglas["multas_peores_equipos"]
+    for team_name, ind in indicadores.items():
+        desglose = {
+            "jugadores_repetidos": {"cantidad": 0, "multa": 0.0},
+            "capitan_repetido_con_rival": {"aplicado": False, "multa": 0.0},
+            "tenias_capitan_rival": {"aplicado": False, "multa": 0.0},
+            "peor_equipo_jornada": {"posicion": 0, "multa": 0.0},
+            "alinear_peor_jugador": {"aplicado": False, "multa": 0.0},
+            "elegir_peor_capitan": {"aplicado": False, "multa": 0.0},
+            "alineacion_indebida": {"cantidad": 0, "multa": 0.0, "jugadores": []}
+        }
+        if ind["jugadores_repetidos"]:
+            cantidad = ind["jugadores_repetidos"]
+            desglose["jugadores_repetidos"] = {"cantidad": cantidad, "multa": cantidad * reglas["multa_jugador_repetido"]}
+        if ind["capitan_repetido_con_rival"]:
+            desglose["capitan_repetido_con_rival"] = {"aplicado": True, "multa": reglas["multa_capitan_repetido"]}
+        if ind["tenias_capitan_rival"]:
+            desglose["tenias_capitan_rival"] = {"aplicado": True, "multa": reglas["multa_capitan_rival"]}
+        pos = ind["posicion_peor_equipo"]
+        if pos in multas_peores:
+            desglose["peor_equipo_jornada"] = {"posicion": pos, "multa": multas_peores[pos]}
+        if ind["alinear_peor_jugador"]:
+            desglose["alinear_peor_jugador"] = {"aplicado": True, "multa": reglas["multa_peor_jugador"]}
+        if ind["elegir_peor_capitan"]:
+            desglose["elegir_peor_capitan"] = {"aplicado": True, "multa": reglas["multa_peor_capitan"]}
+
+        total = sum(d.get('multa', 0.0) for d in desglose.values())
+        multas_finales[team_name] = {"multa_total": round(total, 2), "desglose": desglose}
+    return multas_finales
+
+# Calcula las multas de una jornada con un desglose detallado.
+def calcular_multas_jornada(teams_in_round, matches, team_map_name, dict_alineaciones, dict_capitanes, lista_peores_equipos, peores_jugadores_final, peores_capitanes_final, indice=None, mascaras_alineaciones=None, reglas=REGLAS_POR_DEFECTO):
+    indicadores = calcular_indicadores_jornada(
+        teams_in_round, matches, team_map_name, dict_alineaciones, dict_capitanes,
+        lista_peores_equipos, peores_jugadores_final, peores_capitanes_final, indice, mascaras_alineaciones
+    )
+    return aplicar_reglas_multas(indicadores, reglas)
+
+# Obtiene una lista de los capitanes de todos los equipos para una ronda a partir de sus alineaciones.
+def get_captains_for_round(datos_ronda, alineaciones, name_map={}):
+    team_captains = []
+    if 'answer' not in datos_ronda or 'ranking' not in datos_ronda['answer']:
+        return []
+    ranking = datos_ronda['answer']['ranking']
+    for team_info in ranking:
+        team_id = team_info['_id']
+        team_name_api = team_info['name']
+
+        lineup_players = alineaciones.get(team_id, [])
+
+        if lineup_players:
+            capitan = next((p['name'] for p in lineup_players if p.get('cpt')), "N/A")
+            canonical_name = name_map.get(team_name_api, team_name_api)
+            team_captains.append({"team_name": canonical_name, "capitan": capitan})
+
+    return team_captains
+
+# Analiza una ronda: combates, capitanes, peores equipos, jugadores y capitanes, y los datos que necesitan las multas.
+# Las alineaciones se codifican como conjuntos de bits sobre el índice de jugadores (el de la temporada, si se recibe).
+def analizar_ronda(datos_ronda, alineaciones, name_map={}, indice=None):
+    if not datos_ronda or 'answer' not in datos_ronda or 'matches' not in datos_ronda['answer']:
+        print("Error: Respuesta de API de ronda inválida.")
+        return None
+    indice = indice_jugadores() if indice is None else indice
+    teams_in_round_list = datos_ronda['answer'].get('ranking', [])
+    matches = datos_ronda['answer']['matches']
+    team_map_id = {i + 1: team['_id'] for i, team in enumerate(teams_in_round_list)}
+    team_map_name = {i + 1: name_map.get(team['name'], team['name']) for i, team in enumerate(teams_in_round_list)}
+    resultados_finales, puntos_equipos_por_ronda, jugadores_ronda = [], [], []
+    dict_alineaciones, dict_capitanes, mascaras_alineaciones = {}, {}, {}
+    for match in matches:
+        ids = [team_map_id.get(p) for p in match['p']]
+        nombres = [team_map_name.get(p) for p in match['p']]
+        puntos = match.get('data', {}).get('partial', match.get('m', [0, 0]))
+        for i in range(2):
+            if nombres[i]:
+                puntos_equipos_por_ronda.append({"equipo": nombres[i], "puntos": puntos[i]})
+        lineups, capitanes, mascaras = [], [], []
+        for i in range(2):
+            if not ids[i]: continue
+            lineup_players = alineaciones.get(ids[i], [])
+            lineups.append(lineup_players)
+            mascaras.append(mascara_alineacion(indice, lineup_players))
+            capitan = next((p['name'] for p in lineup_players if p.get('cpt')), "N/A")
+            capitanes.append(capitan)
+            if nombres[i]:
+                dict_alineaciones[nombres[i]] = lineup_players
+                dict_capitanes[nombres[i]] = capitan
+                mascaras_alineaciones[nombres[i]] = mascaras[-1]
+            for player in lineup_players:
+                jugadores_ronda.append({
+                    "nombre": player['name'], "puntos": player['points'],
+                    "equipo": nombres[i], "es_capitan": player.get('cpt', False)
+                })
+        jugadores_repetidos = [p['name'] for p in lineups[0] if contiene(indice, mascaras[1], p['name'])]
+        if nombres[0] and nombres[1]:
+            resultados_finales.append({
+                "Combate": f"{nombres[0]} vs {nombres[1]}",
+                f"{nombres[0]}": {"Puntuacion": puntos[0], "Capitan": capitanes[0]},
+                f"{nombres[1]}": {"Puntuacion": puntos[1], "Capitan": capitanes[1]},
+                "Jugadores repetidos": jugadores_repetidos
+            })
+    ranking_peores_equipos = [{"posicion": i + 1, **equipo} for i, equipo in enumerate(sorted(puntos_equipos_por_ronda, key=lambda x: x['puntos']))]
+    lista_peores_equipos = ranking_peores_equipos[:3]
+    def encontrar_peores(jugadores, key_filter=None):
+        min_puntos = float('inf')
+        peores_map = defaultdict(list)
+        iterable = filter(key_filter, jugadores) if key_filter else jugadores
+        for jugador in iterable:
+            puntos_jugador = jugador.get('puntos', 0)
+            if puntos_jugador < min_puntos:
+                min_puntos = puntos_jugador
+                peores_map.clear()
+            if puntos_jugador == min_puntos:
+                if jugador['equipo'] and jugador['equipo'] not in peores_map[jugador['nombre']]:
+                    peores_map[jugador['nombre']].append(jugador['equipo'])
+        return [{"nombre": n, "puntos": min_puntos, "equipos": e} for n, e in peores_map.items()]
+    peores_capitanes_final = encontrar_peores(jugadores_ronda, lambda j: j.get('es_capitan'))
+    peores_jugadores_final = encontrar_peores(jugadores_ronda)
+    resumen_final = {
+        "Resultados por combate": resultados_finales,
+        "Peor Capitan": peores_capitanes_final,
+        "Peor Jugador": peores_jugadores_final,
+        "Los 3 peores equipos de la ronda": lista_peores_equipos
+    }
+    return {
+        "resumen": resumen_final,
+        "entradas_multas": {
+            "teams_in_round": list(team_map_name.values()), "matches": matches, "team_map_name": team_map_name,
+            "dict_alineaciones": dict_alineaciones, "dict_capitanes": dict_capitanes,
+            "lista_peores_equipos": ranking_peores_equipos, "peores_jugadores_final": peores_jugadores_final,
+            "peores_capitanes_final": peores_capitanes_final,
+            "indice": indice, "mascaras_alineaciones": mascaras_alineaciones
+        }
+    }
+
+# Procesa todos los datos de una ronda y calcula las multas correspondientes y los jugadores que comparte cada par de equipos.
+def procesar_ronda_completa(datos_ronda, alineaciones, output_file, name_map={}, reglas=REGLAS_POR_DEFECTO, indice=None):
+    analisis = analizar_ronda(datos_ronda, alineaciones, name_map, indice)
+    if not analisis:
+        return None, None
+    guardar_respuesta(analisis["resumen"], output_file)
+    entradas = analisis["entradas_multas"]
+    return calcular_multas_jornada(**entradas, reglas=reglas), coincidencias_ronda(entradas["mascaras_alineaciones"])
+
+# Genera, jornada a jornada, las multas de un flujo de rondas (numero, ronda) en orden de calendario.
+# Cada ronda se suelta en cuanto se han calculado sus multas, así que la memoria no crece con el número de jornadas.
+def iterar_multas_jornadas(rondas, name_map, division_str, reglas=REGLAS_POR_DEFECTO):
+    print(f"\n--- RECOPILANDO DATOS DE MULTAS PARA {division_str.upper()} ---")
+    # Un único índice de jugadores para toda la temporada: el mismo jugador ocupa el mismo bit en todas las jornadas.
+    indice = indice_jugadores()
+    for round_number, ronda in rondas:
+        print(f"Procesando Jornada {round_number}...")
+        output_file = f"resultados/jornada_{round_number}_{division_str}.json"
+        multas_de_la_jornada, coincidencias = procesar_ronda_completa(ronda['datos'], ronda['alineaciones'], output_file, name_map, reglas, indice)
+        if multas_de_la_jornada:
+            yield {'numero': round_number, 'multas': multas_de_la_jornada, 'coincidencias': coincidencias}
+
+# Itera sobre todas las jornadas para procesar y devolver los resultados y multas.
+def procesar_historico_jornadas(rondas, name_map, division_str, reglas=REGLAS_POR_DEFECTO):
+    multas_acumuladas = defaultdict(float)
+    datos_jornadas = []
+    for jornada in iterar_multas_jornadas(sorted(rondas.items()), name_map, division_str, reglas):
+        datos_jornadas.append(jornada)
+        for team, data in jornada['multas'].items():
+            multas_acumuladas[team] += data.get('multa_total', 0.0)
+    return datos_jornadas, dict(multas_acumuladas)
+
+# Recopila el historial de capitanes y alineaciones para procesar las sanciones de forma iterativa.
+# Las sanciones se guardan como intervalos de jornadas en un índice por equipo y jugador; su estado se deriva al final.
+# Las rondas llegan como un flujo (numero, ronda) en orden de calendario: de cada una solo se conservan capitán y jugadores por equipo.
+def procesar_sanciones_y_capitanes(rondas, name_map, division_str, sanciones_existentes, reglas=REGLAS_POR_DEFECTO):
+    print(f"\n--- PROCESANDO SANCIONES Y CAPITANES PARA {division_str.upper()} ---")
+
+    # Paso 1: Recopilar todos los datos históricos de capitanes.
+    calendario = []
+    all_teams_data = {}
+    print("Recopilando datos históricos de todas las jornadas para análisis...")
+    for round_number, ronda in rondas:
+        calendario.append(round_number)
+        for team_info in ronda['datos'].get('answer', {}).get('ranking', []):
+            team_id, team_name_api = team_info['_id'], team_info['name']
+            team_name = name_map.get(team_name_api, team_name_api)
+
+            lineup_players = ronda['alineaciones'].get(team_id, [])
+            capitan = next((p['name'] for p in lineup_players if p.get('cpt')), "N/A")
+
+            all_teams_data.setdefault(team_name, {})[round_number] = {
+                'capitan': capitan,
+                'players': {p['name'] for p in lineup_players}
+            }
+    posiciones = {round_number: i for i, round_number in enumerate(calendario)}
+
+    # Paso 2: Índice con las sanciones ya guardadas, sin duplicados (la misma jornada de inicio es la misma sanción).
+    indice = indice_vacio()
+    sanciones_actualizadas = {}
+    for team_name, jugadores in sanciones_existentes.items():
+        sanciones_equipo = sanciones_actualizadas.setdefault(team_name, {})
+        for jugador, sanciones in jugadores.items():
+            sanciones_jugador = sanciones_equipo.setdefault(jugador, [])
+            for sancion in sanciones:
+                if any(s['jornada_triggered'] == sancion['jornada_triggered'] for s in sanciones_jugador):
+                    continue
+                sanciones_jugador.append(sancion)
+                anadir_sancion(indice, team_name, jugador, posicion_jornada(calendario, sancion['jornada_triggered']), sancion, reglas)
+
+    # Paso 3: Recorrer las jornadas en orden cronológico: alineaciones indebidas y sanciones nuevas.
+    contador_capitanes = defaultdict(lambda: defaultdict(int))
+    multas_alineacion_indebida = defaultdict(list)
+    nuevas = []
+
+    for team_name, rounds_data in all_teams_data.items():
+        sanciones_equipo = sanciones_actualizadas.setdefault(team_name, {})
+
+        for round_number in calendario:
+            round_data = rounds_data.get(round_number)
+            if not round_data: continue
+            posicion = posiciones[round_number]
+
+            # A. Alineación indebida: sancionados del equipo que están en la alineación y cumplen partidos de sanción en esta jornada.
+            for player in sanciones_equipo:
+                if player in round_data['players'] and restriccion(indice, team_name, player, posicion) == PARTIDOS:
+                    multas_alineacion_indebida[team_name].append({
+                        'jornada': round_number,
+                        'jugador': player,
+                        'multa': reglas['multa_alineacion_indebida']
+                    })
+
+            # B. Verificamos si se genera una NUEVA sanción en esta jornada
+            capitan = round_data['capitan']
+            if capitan != "N/A":
+                contador_capitanes[team_name][capitan] += 1
+
+                if contador_capitanes[team_name][capitan] % reglas['capitanias_para_sancion'] == 0:
+                    if not sancion_vigente(indice, team_name, capitan, posicion):
+                        nueva_sancion = {
+                            'type': '3_match_ban',
+                            'jornada_triggered': round_number,
+                            'status': 'active',
+                            'games_to_serve': reglas['partidos_sancion'],
+                            'games_served': 0
+                        }
+                        sanciones_equipo.setdefault(capitan, []).append(nueva_sancion)
+                        anadir_sancion(indice, team_name, capitan, posicion, nueva_sancion, reglas)
+                        nuevas.append((team_name, capitan, nueva_sancion))
+
+    # Paso 4: Estado de cada sanción tras la última jornada disputada por su equipo.
+    posicion_final = {team_name: posiciones[max(rounds_data)] for team_name, rounds_data in all_teams_data.items()}
+    sanciones_con_estado = {}
+    for team_name, jugadores in sanciones_actualizadas.items():
+        sanciones_con_estado[team_name] = {}
+        entradas_equipo = indice.get(team_name, {})
+        for jugador, sanciones in jugadores.items():
+            entradas = {id(e["sancion"]): e for e in entradas_equipo.get(jugador, [])}
+            sanciones_con_estado[team_name][jugador] = [
+                sancion_con_estado(entradas[id(sancion)], posicion_final.get(team_name, len(calendario) - 1), calendario) for sancion in sanciones
+            ]
+    nuevas_sanciones = defaultdict(dict)
+    for team_name, capitan, sancion in nuevas:
+        nuevas_sanciones[team_name][capitan] = sanciones_con_estado[team_name][capitan][sanciones_actualizadas[team_name][capitan].index(sancion)]
+
+    # Paso 5: Preparar los datos finales para la tabla HTML
+    capitanes_para_informe = {}
+    for round_number in calendario:
+        capitanes_para_informe[round_number] = []
+        for team_name, rounds_data in all_teams_data.items():
+            if round_number in rounds_data:
+                capitan_name = rounds_data[round_number]['capitan']
+                cap_info = {'team_name': team_name, 'capitan': capitan_name}
+
+                sancion_del_dia = sancion_vigente(indice, team_name, capitan_name, posiciones[round_number])
+                if sancion_del_dia and sancion_del_dia['sancion']['jornada_triggered'] == round_number:
+                    cap_info['is_red_card'] = True
+
+                capitanes_para_informe[round_number].append(cap_info)
+
+    return capitanes_para_informe, sanciones_con_estado, nuevas_sanciones, multas_alineacion_indebida
+
+# Integra las multas por alineación indebida en el desglose de cada jornada y en los totales.
+def integrar_violaciones(datos_jornadas, totales, violaciones):
+    for team_name, lista_multas in violaciones.items():
+        for multa in lista_multas:
+            jornada_num = multa['jornada']
+            monto = multa['multa']
+            jugador = multa['jugador']
+
+            # Actualizar totales
+            totales[team_name] = totales.get(team_name, 0.0) + monto
+
+            # Actualizar desglose jornada
+            for jornada_data in datos_jornadas:
+                if jornada_data['numero'] == jornada_num:
+                    if team_name in jornada_data['multas']:
+                        team_data = jornada_data['multas'][team_name]
+                        team_data['multa_total'] += monto
+                        desglose = team_data['desglose']
+                        if 'alineacion_indebida' not in desglose:
+                            desglose['alineacion_indebida'] = {"cantidad": 0, "multa": 0.0, "jugadores": []}
+
+                        desglose['alineacion_indebida']['cantidad'] += 1
+                        desglose['alineacion_indebida']['multa'] += monto
+                        desglose['alineacion_indebida']['jugadores'].append(jugador)
+                    break
@@ -0,0 +1,159 @@
+import base64
+import os
+import time
+from urllib.parse import quote
+import webbrowser
+
+import msal
+import pyperclip
+import requests
+
+CLIENT_ID = os.getenv("CLIENT_ID")
+GRAPH_API_ENDPOINT = os.getenv("GRAPH_API_ENDPOINT", 'https://graph.microsoft.com/v1.0')
+AUTHORITY = 'https://login.microsoftonline.com/common/'
+SCOPES = ['Files.ReadWrite.All']
+ONEDRIVE_SHARE_LINK = "https://1drv.ms/x/s!AidvQapyuNp6jBKR5uMUCaBYdLl0?e=3kXyKW"
+# Máximo de peticiones que admite Graph en una misma llamada a $batch.
+MAX_PETICIONES_LOTE = 20
+
+# Muestra el código de autenticación en la terminal.
+def show_auth_code_window(message, verification_uri):
+    try:
+        user_code = message.split("enter the code ")[1].split(" to authenticate")[0]
+    except IndexError:
+        user_code = "No se pudo extraer el código"
+
+    print("\n" + "="*60)
+    print("AUTENTICACIÓN REQUERIDA")
+    print("="*60)
+    print(f"1. Copia este código: {user_code}")
+    print(f"2. Abre esta URL en tu navegador: {verification_uri}")
+    print("="*60)
+    
+    pyperclip.copy(user_code)
+    print("(El código ha sido copiado al portapapeles automáticamente)")
+    
+    webbrowser.open(verification_uri)
+    input("\nPresiona Enter después de haberte autenticado en el navegador...")
+
+# Se autentica de forma interactiva y obtiene un token de acceso para Microsoft Graph.
+def get_access_token():
+    # Un token ya emitido (o el del servidor simulado) evita el flujo interactivo.
+    if os.getenv("GRAPH_ACCESS_TOKEN"):
+        return os.getenv("GRAPH_ACCESS_TOKEN")
+    app = msal.PublicClientApplication(CLIENT_ID, authority=AUTHORITY)
+    result = None
+    accounts = app.get_accounts()
+    if accounts:
+        result = app.acquire_token_silent(SCOPES, account=accounts[0])
+    if not result:
+        flow = app.initiate_device_flow(scopes=SCOPES)
+        if "error" in flow:
+            print(f"\nERROR AL INICIAR LA AUTENTICACIÓN:\nError: {flow.get('error')}\nDescripción: {flow.get('error_description')}")
+            return None
+        show_auth_code_window(flow["message"], flow["verification_uri"])
+        result = app.acquire_token_by_device_flow(flow)
+    if "access_token" in result:
+        return result['access_token']
+    else:
+        print("Error al obtener el token de acceso:", result.get("error_description"))
+        return None
+
+# Codifica un enlace de compartición de OneDrive a un formato compatible con la API de Graph.
+def encode_sharing_link(sharing_link):
+    base64_value = base64.b64encode(sharing_link.encode('utf-8')).decode('utf-8')
+    return 'u!' + base64_value.rstrip('=').replace('/', '_').replace('+', '-')
+
+# Obtiene el ID del Drive y el ID del archivo a partir de un enlace de compartición.
+def get_drive_item_from_share_link(access_token, share_url):
+    encoded_url = encode_sharing_link(share_url)
+    api_url = f"{GRAPH_API_ENDPOINT}/shares/{encoded_url}/driveItem"
+    headers = {'Authorization': f'Bearer {access_token}'}
+    response = requests.get(api_url, headers=headers)
+    response.raise_for_status()
+    data = response.json()
+    return data['parentReference']['driveId'], data['id']
+
+# Descarga el contenido de un archivo Excel desde OneDrive.
+def download_excel_from_onedrive(access_token, drive_id, item_id):
+    api_url = f"{GRAPH_API_ENDPOINT}/drives/{drive_id}/items/{item_id}/content"
+    headers = {'Authorization': f'Bearer {access_token}'}
+    response = requests.get(api_url, headers=headers)
+    response.raise_for_status()
+    print("Excel descargado de OneDrive con éxito.")
+    return response.content
+
+# Sube (o sobrescribe) el contenido de un archivo Excel a OneDrive, con reintentos si está bloqueado.
+def upload_excel_to_onedrive(access_token, drive_id, item_id, file_content):
+    api_url = f"{GRAPH_API_ENDPOINT}/drives/{drive_id}/items/{item_id}/content"
+    headers = {
+        'Authorization': f'Bearer {access_token}',
+        'Content-Type': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    }
+    max_retries = 3
+    retry_delay = 5
+    for attempt in range(max_retries):
+        try:
+            response = requests.put(api_url, headers=headers, data=file_content)
+            response.raise_for_status()
+            print("Excel subido a OneDrive con éxito.")
+            return
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 423 and attempt < max_retries - 1:
+                print(f"El archivo está bloqueado. Reintentando en {retry_delay} segundos... (Intento {attempt + 1}/{max_retries})")
+                time.sleep(retry_delay)
+            else:
+                raise
+    print("No se pudo subir el archivo después de varios intentos.")
+
+# Ruta relativa (a la versión de Graph) del libro de Excel de un elemento de OneDrive.
+def _ruta_libro(drive_id, item_id):
+    return f"/drives/{drive_id}/items/{item_id}/workbook"
+
+# Ruta relativa de una hoja del libro, con el nombre escapado como exige Graph.
+def _ruta_hoja(drive_id, item_id, hoja):
+    nombre = quote(hoja.replace("'", "''"), safe='')
+    return f"{_ruta_libro(drive_id, item_id)}/worksheets('{nombre}')"
+
+# Abre una sesión persistente del libro para que todas las escrituras se apliquen sobre la misma copia.
+def crear_sesion_libro(access_token, drive_id, item_id):
+    api_url = f"{GRAPH_API_ENDPOINT}{_ruta_libro(drive_id, item_id)}/createSession"
+    headers = {'Authorization': f'Bearer {access_token}'}
+    response = requests.post(api_url, headers=headers, json={"persistChanges": True})
+    response.raise_for_status()
+    return response.json()['id']
+
+# Cierra la sesión del libro; Graph guarda entonces los cambios en el archivo.
+def cerrar_sesion_libro(access_token, drive_id, item_id, session_id):
+    api_url = f"{GRAPH_API_ENDPOINT}{_ruta_libro(drive_id, item_id)}/closeSession"
+    headers = {'Authorization': f'Bearer {access_token}', 'workbook-session-id': session_id}
+    response = requests.post(api_url, headers=headers)
+    response.raise_for_status()
+
+# Lee la dirección y los valores del rango usado de una hoja del libro.
+def leer_rango_usado(access_token, drive_id, item_id, session_id, hoja):
+    api_url = f"{GRAPH_API_ENDPOINT}{_ruta_hoja(drive_id, item_id, hoja)}/usedRange?$select=address,values"
+    headers = {'Authorization': f'Bearer {access_token}', 'workbook-session-id': session_id}
+    response = requests.get(api_url, headers=headers)
+    response.raise_for_status()
+    data = response.json()
+    return data['address'], data['values']
+
+# Escribe una lista de rangos (hoja, dirección, valores) con PATCH agrupados en llamadas a $batch.
+def escribir_rangos_por_lotes(access_token, drive_id, item_id, session_id, rangos):
+    headers = {'Authorization': f'Bearer {access_token}'}
+    for inicio in range(0, len(rangos), MAX_PETICIONES_LOTE):
+        lote = rangos[inicio:inicio + MAX_PETICIONES_LOTE]
+        peticiones = [{
+            "id": str(n),
+            "method": "PATCH",
+            "url": f"{_ruta_hoja(drive_id, item_id, hoja)}/range(address='{direccion}')",
+            "headers": {"Content-Type": "application/json", "workbook-session-id": session_id},
+            "body": {"values": valores},
+        } for n, (hoja, direccion, valores) in enumerate(lote, start=inicio + 1)]
+        response = requests.post(f"{GRAPH_API_ENDPOINT}/$batch", headers=headers, json={"requests": peticiones})
+        response.raise_for_status()
+        fallidas = [r for r in response.json().get('responses', []) if r.get('status', 500) >= 400]
+        if fallidas:
+            raise Exception(f"Graph rechazó {len(fallidas)} escrituras del lote (primer estado: {fallidas[0].get('status')}).")
+    print(f"{len(rangos)} rangos actualizados en OneDrive en {-(-len(rangos) // MAX_PETICIONES_LOTE)} lotes.")
@@ -0,0 +1,141 @@
+from collections import Counter
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+# Segundos entre dos muestras de la pila; el hilo de muestreo solo toma el GIL una vez por intervalo.
+INTERVALO_MUESTREO = 0.005
+TOP_POR_DEFECTO = 15
+# Las etapas que corren a la vez comparten resumen.json: su lectura y escritura se serializan.
+_BLOQUEO_RESUMEN = threading.Lock()
+
+# Directorio de perfiles de una ejecución, con la fecha y hora para poder comparar ejecuciones a lo largo del tiempo.
+def directorio_ejecucion(directorio_base):
+    return os.path.join(directorio_base, time.strftime("%Y%m%d-%H%M%S"))
+
+# Pila de llamadas de un frame, de la raíz a la hoja, cortada en el frame del muestreador.
+def _pila(frame):
+    pila = []
+    while frame is not None and frame.f_code is not muestrear.__code__:
+        codigo = frame.f_code
+        pila.append((codigo.co_qualname, os.path.basename(codigo.co_filename), codigo.co_firstlineno))
+        frame = frame.f_back
+    pila.reverse()
+    return tuple(pila)
+
+# Ejecuta una función muestreando periódicamente, desde otro hilo, la pila del hilo que la ejecuta.
+# Las muestras (pila, segundos) se añaden a la lista recibida, que conserva las tomadas aunque la función falle.
+def muestrear(funcion, muestras, *args, intervalo=INTERVALO_MUESTREO, **kwargs):
+    hilo = threading.get_ident()
+    parar = threading.Event()
+
+    def muestreador():
+        anterior = time.perf_counter()
+        while not parar.wait(intervalo):
+            ahora = time.perf_counter()
+            frame = sys._current_frames().get(hilo)
+            if frame is not None:
+                pila = _pila(frame)
+                if pila:
+                    muestras.append((pila, ahora - anterior))
+            anterior = ahora
+
+    hilo_muestreo = threading.Thread(target=muestreador, name="perfilado", daemon=True)
+    hilo_muestreo.start()
+    try:
+        return funcion(*args, **kwargs)
+    finally:
+        parar.set()
+        hilo_muestreo.join()
+
+# Nombre legible de un frame: función (archivo:línea).
+def nombre_frame(frame):
+    funcion, archivo, linea = frame
+    return f"{funcion} ({archivo}:{linea})"
+
+# Pilas agregadas en formato "collapsed" (raíz;...;hoja número_de_muestras), el que leen flamegraph.pl, speedscope o inferno.
+def pilas_colapsadas(muestras):
+    conteo = Counter(pila for pila, _ in muestras)
+    return [f"{';'.join(nombre_frame(f).replace(';', ',') for f in pila)} {n}" for pila, n in sorted(conteo.items())]
+
+# Perfil en el formato de archivo de speedscope (perfil "sampled" con el peso en segundos de cada muestra).
+def perfil_speedscope(nombre, muestras, duracion):
+    indices = {}
+    frames = []
+    pilas = []
+    for pila, _ in muestras:
+        pilas.append([indices.setdefault(frame, len(indices)) for frame in pila])
+    for funcion, archivo, linea in indices:
+        frames.append({"name": funcion, "file": archivo, "line": linea})
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "exporter": "fuentmondo",
+        "name": nombre,
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": nombre,
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": round(duracion, 6),
+            "samples": pilas,
+            "weights": [round(segundos, 6) for _, segundos in muestras],
+        }],
+    }
+
+# Los N frames con más muestras: 'propio' cuenta solo cuando el frame está en la cima de la pila, 'total' cuando aparece en ella.
+def frames_calientes(muestras, n=TOP_POR_DEFECTO):
+    propio, total = Counter(), Counter()
+    for pila, _ in muestras:
+        propio[pila[-1]] += 1
+        for frame in set(pila):
+            total[frame] += 1
+    n_muestras = len(muestras) or 1
+    return {
+        "propio": [{"frame": nombre_frame(f), "muestras": c, "porcentaje": round(100 * c / n_muestras, 1)} for f, c in propio.most_common(n)],
+        "total": [{"frame": nombre_frame(f), "muestras": c, "porcentaje": round(100 * c / n_muestras, 1)} for f, c in total.most_common(n)],
+    }
+
+# Guarda los perfiles de una etapa (collapsed y speedscope), añade su resumen a resumen.json y lo muestra por pantalla.
+def guardar_perfil(directorio, nombre, muestras, duracion, top=TOP_POR_DEFECTO):
+    try:
+        os.makedirs(directorio, exist_ok=True)
+        with open(os.path.join(directorio, f"{nombre}.collapsed"), 'w', encoding='utf-8') as f:
+            f.write("\n".join(pilas_colapsadas(muestras)) + "\n")
+        with open(os.path.join(directorio, f"{nombre}.speedscope.json"), 'w', encoding='utf-8') as f:
+            json.dump(perfil_speedscope(nombre, muestras, duracion), f, ensure_ascii=False, separators=(',', ':'))
+
+        calientes = frames_calientes(muestras, top)
+        ruta_resumen = os.path.join(directorio, "resumen.json")
+        with _BLOQUEO_RESUMEN:
+            resumen = {}
+            if os.path.exists(ruta_resumen):
+                with open(ruta_resumen, 'r', encoding='utf-8') as f:
+                    resumen = json.load(f)
+            resumen[nombre] = {"duracion": round(duracion, 3), "muestras": len(muestras), "intervalo": INTERVALO_MUESTREO, **calientes}
+            with open(ruta_resumen, 'w', encoding='utf-8') as f:
+                json.dump(resumen, f, ensure_ascii=False, indent=4)
+    except Exception as e:
+        print(f"Error al guardar el perfil de la etapa '{nombre}': {e}")
+        return
+
+    print(f"\n--- PERFIL DE {nombre.upper()} ({duracion:.2f} s, {len(muestras)} muestras) en '{directorio}' ---")
+    print(f"{'propio':>8}  {'total':>8}  frame")
+    totales = {e["frame"]: e["porcentaje"] for e in frames_calientes(muestras, None)["total"]}
+    for entrada in calientes["propio"]:
+        print(f"{entrada['porcentaje']:7.1f}%  {totales.get(entrada['frame'], 0.0):7.1f}%  {entrada['frame']}")
+
+# Envuelve una etapa para ejecutarla bajo el muestreador y guardar su perfil al terminar (también si falla).
+def perfilar_etapa(etapa, directorio, top=TOP_POR_DEFECTO):
+    @functools.wraps(etapa)
+    def envoltorio(*args, **kwargs):
+        muestras = []
+        inicio = time.perf_counter()
+        try:
+            return muestrear(etapa, muestras, *args, **kwargs)
+        finally:
+            guardar_perfil(directorio, etapa.__name__, muestras, time.perf_counter() - inicio, top)
+    return envoltorio
@@ -0,0 +1,162 @@
+from contextlib import contextmanager
+import json
+import os
+import tempfile
+import threading
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+# Cerrojo de hilo por archivo (reentrante) y profundidad con la que lo tiene el hilo que lo posee: un bloqueo anidado en el mismo
+# hilo no se bloquea a sí mismo, y otro hilo espera al cerrojo en vez de colarse sin el bloqueo del sistema operativo.
+_cerrojos_hilos = {}
+_bloqueos_activos = {}
+_cerrojo_registro = threading.Lock()
+
+# Codifica datos a JSON en bytes: compacto para archivos de máquina (con orjson si está instalado) o con sangría para los que se leen a mano.
+def codificar_json(datos, legible=False):
+    if legible:
+        return json.dumps(datos, indent=4, ensure_ascii=False).encode('utf-8')
+    if orjson:
+        return orjson.dumps(datos, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(datos, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+# Decodifica JSON desde bytes, con orjson si está instalado.
+def decodificar_json(contenido):
+    if orjson:
+        return orjson.loads(contenido)
+    return json.loads(contenido)
+
+# Bloqueo exclusivo y consultivo de un archivo (sobre un '.lock' al lado, porque el archivo se sustituye al guardarlo).
+@contextmanager
+def bloqueo_archivo(ruta_archivo):
+    ruta_bloqueo = os.path.abspath(ruta_archivo) + '.lock'
+    with _cerrojo_registro:
+        cerrojo = _cerrojos_hilos.setdefault(ruta_bloqueo, threading.RLock())
+    # La profundidad solo la lee y la cambia el hilo que tiene el cerrojo.
+    with cerrojo:
+        if _bloqueos_activos.get(ruta_bloqueo):
+            _bloqueos_activos[ruta_bloqueo] += 1
+            try:
+                yield
+            finally:
+                _bloqueos_activos[ruta_bloqueo] -= 1
+            return
+
+        os.makedirs(os.path.dirname(ruta_bloqueo), exist_ok=True)
+        with open(ruta_bloqueo, 'a+b') as f:
+            if os.name == 'nt':
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            _bloqueos_activos[ruta_bloqueo] = 1
+            try:
+                yield
+            finally:
+                del _bloqueos_activos[ruta_bloqueo]
+                if os.name == 'nt':
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+# Escribe un archivo de forma atómica: a un temporal en el mismo directorio y después os.replace, conservando los permisos.
+def escribir_atomico(contenido, ruta_archivo):
+    escribir_atomico_con(lambda f: f.write(contenido), ruta_archivo)
+
+# Como escribir_atomico, pero el contenido lo escribe escribir(f) directamente en el temporal (un libro de Excel, un .npz,
+# una copia por bloques...), sin reunirlo antes en memoria.
+def escribir_atomico_con(escribir, ruta_archivo):
+    f, ruta_temporal = abrir_temporal_atomico(ruta_archivo)
+    try:
+        escribir(f)
+        confirmar_atomico(f, ruta_temporal, ruta_archivo)
+    except BaseException:
+        descartar_atomico(f, ruta_temporal)
+        raise
+
+# Abre (en binario) un temporal en el directorio de ruta_archivo para escribirlo por partes. Devuelve (archivo, ruta del temporal):
+# confirmar_atomico lo lleva después a su sitio y descartar_atomico lo borra. Permite escribir varios archivos y sustituirlos al final.
+def abrir_temporal_atomico(ruta_archivo):
+    directorio = os.path.dirname(ruta_archivo)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    descriptor, ruta_temporal = tempfile.mkstemp(dir=directorio or '.', prefix=f".{os.path.basename(ruta_archivo)}.", suffix='.tmp')
+    return os.fdopen(descriptor, 'wb'), ruta_temporal
+
+# Vuelca a disco y cierra el temporal y lo sustituye por ruta_archivo con os.replace, conservando los permisos del anterior.
+def confirmar_atomico(f, ruta_temporal, ruta_archivo):
+    with f:
+        f.flush()
+        os.fsync(f.fileno())
+    os.chmod(ruta_temporal, os.stat(ruta_archivo).st_mode & 0o777 if os.path.exists(ruta_archivo) else 0o644)
+    os.replace(ruta_temporal, ruta_archivo)
+
+# Cierra y borra un temporal que no se va a confirmar.
+def descartar_atomico(f, ruta_temporal):
+    f.close()
+    if os.path.exists(ruta_temporal):
+        os.remove(ruta_temporal)
+
+# Carga un archivo JSON (payload) desde una ruta específica.
+def cargar_payload(ruta_archivo):
+    try:
+        with open(ruta_archivo, 'rb') as archivo:
+            return decodificar_json(archivo.read())
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"Error al cargar '{ruta_archivo}': {e}")
+        return None
+
+# Carga un archivo JSON de la caché de etapas, devolviendo un valor por defecto si no existe.
+def cargar_json(ruta_archivo, por_defecto=None):
+    try:
+        with open(ruta_archivo, 'rb') as f:
+            return decodificar_json(f.read())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return por_defecto
+
+# Guarda datos en un archivo JSON compacto de la caché de etapas, creando el directorio si hace falta.
+def guardar_json(datos, ruta_archivo):
+    escribir_atomico(codificar_json(datos), ruta_archivo)
+
+# Guarda los datos de respuesta de la API en un archivo JSON.
+def guardar_respuesta(datos, nombre_archivo):
+    try:
+        escribir_atomico(codificar_json(datos, legible=True), nombre_archivo)
+        print(f"Respuesta de la API guardada en '{nombre_archivo}'.")
+    except Exception as e:
+        print(f"Error al guardar el archivo '{nombre_archivo}': {e}")
+
+# Carga el archivo de sanciones o devuelve una estructura vacía si no existe.
+def cargar_sanciones(ruta_archivo):
+    return cargar_json(ruta_archivo, {"primera": {}, "segunda": {}})
+
+# Guarda el estado actual de las sanciones en un archivo JSON.
+def guardar_sanciones(datos, ruta_archivo):
+    try:
+        with bloqueo_archivo(ruta_archivo):
+            escribir_atomico(codificar_json(datos, legible=True), ruta_archivo)
+        print(f"Archivo de sanciones guardado en '{ruta_archivo}'.")
+    except Exception as e:
+        print(f"Error al guardar el archivo de sanciones: {e}")
+
+# Carga el archivo de violaciones o devuelve una estructura vacía si no existe.
+def cargar_violaciones(ruta_archivo):
+    return cargar_json(ruta_archivo, {"primera": {}, "segunda": {}})
+
+# Guarda el estado actual de las violaciones en un archivo JSON.
+def guardar_violaciones(datos, ruta_archivo):
+    try:
+        with bloqueo_archivo(ruta_archivo):
+            escribir_atomico(codificar_json(datos, legible=True), ruta_archivo)
+        print(f"Archivo de violaciones guardado en '{ruta_archivo}'.")
+    except Exception as e:
+        print(f"Error al guardar el archivo de violaciones: {e}")
@@ -0,0 +1,205 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Ritmo máximo (peticiones por segundo) y ráfaga de cada endpoint; el cubo de cada endpoint es independiente.
+# Su ritmo también es AIMD: se multiplica por FACTOR_FRENADA con cada 429 (traiga o no Retry-After) y recupera INCREMENTO_TASA peticiones/s
+# por cada respuesta correcta.
+TASA_POR_DEFECTO = 20.0
+TASA_MINIMA = 1.0
+FACTOR_FRENADA = 0.8
+INCREMENTO_TASA = 1.0
+RAFAGA_POR_DEFECTO = 10
+# Límites de la concurrencia adaptativa (AIMD): crece en una petición por ventana sin errores y se reduce a la mitad con cada aviso de saturación.
+CONCURRENCIA_INICIAL = 4
+CONCURRENCIA_MINIMA = 1
+CONCURRENCIA_MAXIMA = 16
+FACTOR_REDUCCION = 0.5
+# Una latencia media mayor que este múltiplo de la mínima observada se trata como saturación aunque las respuestas sean correctas.
+# Por debajo de LATENCIA_DESPRECIABLE (segundos) las variaciones no se tienen en cuenta.
+FACTOR_LATENCIA = 3.0
+LATENCIA_DESPRECIABLE = 0.05
+PESO_LATENCIA = 0.2
+MAX_REINTENTOS = 5
+ESPERA_BASE = 0.1
+ESPERA_MAXIMA = 30.0
+
+# Estado del planificador: cubos de fichas por endpoint, límite de concurrencia adaptativo y contadores.
+def crear_planificador(tasa=TASA_POR_DEFECTO, rafaga=RAFAGA_POR_DEFECTO, concurrencia=CONCURRENCIA_INICIAL,
+                       minimo=CONCURRENCIA_MINIMA, maximo=CONCURRENCIA_MAXIMA):
+    return {
+        "tasa": tasa,
+        "rafaga": rafaga,
+        "cubos": {},
+        "limite": float(concurrencia),
+        "minimo": minimo,
+        "maximo": maximo,
+        "en_curso": 0,
+        "latencia_minima": None,
+        "latencia_media": None,
+        "ultimo_recorte": 0.0,
+        "condicion": threading.Condition(),
+        "contadores": Counter(),
+    }
+
+# Clave del cubo de fichas de una URL: su ruta, sin esquema ni servidor.
+def clave_endpoint(url):
+    return urlsplit(url).path
+
+# Espera a que haya una ficha en el cubo del endpoint (y a que pase la pausa pedida por el servidor) y la consume.
+def _tomar_ficha(planificador, endpoint):
+    while True:
+        with planificador["condicion"]:
+            ahora = time.monotonic()
+            cubo = _cubo(planificador, endpoint)
+            cubo["fichas"] = min(planificador["rafaga"], cubo["fichas"] + (ahora - cubo["ultimo"]) * cubo["tasa"])
+            cubo["ultimo"] = ahora
+            if ahora >= cubo["pausa_hasta"] and cubo["fichas"] >= 1:
+                cubo["fichas"] -= 1
+                return
+            espera = max(cubo["pausa_hasta"] - ahora, (1 - cubo["fichas"]) / cubo["tasa"])
+        time.sleep(espera)
+
+def _cubo(planificador, endpoint):
+    return planificador["cubos"].setdefault(endpoint, {
+        "fichas": float(planificador["rafaga"]), "ultimo": time.monotonic(), "tasa": planificador["tasa"], "pausa_hasta": 0.0, "ultimo_recorte": 0.0,
+    })
+
+# Frena un endpoint: con un 429 (limitado) reduce su ritmo, a lo sumo una vez por ventana como _reducir para que los 429 de las peticiones
+# que ya estaban en curso cuenten como uno; si el servidor pide una espera (Retry-After), además lo pausa ese tiempo y vacía su cubo.
+def _frenar_endpoint(planificador, endpoint, segundos, limitado):
+    with planificador["condicion"]:
+        cubo = _cubo(planificador, endpoint)
+        ahora = time.monotonic()
+        ventana = max(planificador["latencia_media"] or 0.0, LATENCIA_DESPRECIABLE)
+        if limitado and ahora - cubo["ultimo_recorte"] >= ventana:
+            cubo["tasa"] = max(TASA_MINIMA, cubo["tasa"] * FACTOR_FRENADA)
+            cubo["ultimo_recorte"] = ahora
+            planificador["contadores"]["frenadas"] += 1
+        if segundos is not None:
+            cubo["pausa_hasta"] = max(cubo["pausa_hasta"], ahora + segundos)
+            cubo["fichas"] = 0.0
+
+# Acelera un endpoint tras una respuesta correcta, hasta el ritmo máximo configurado.
+def _acelerar_endpoint(planificador, endpoint):
+    with planificador["condicion"]:
+        cubo = _cubo(planificador, endpoint)
+        cubo["tasa"] = min(planificador["tasa"], cubo["tasa"] + INCREMENTO_TASA)
+
+# Ocupa un hueco de concurrencia, esperando mientras estén todos ocupados.
+def _entrar(planificador):
+    with planificador["condicion"]:
+        while planificador["en_curso"] >= int(planificador["limite"]):
+            planificador["condicion"].wait()
+        planificador["en_curso"] += 1
+
+# Reduce el límite de concurrencia a lo sumo una vez por ventana (la latencia media), para que una ráfaga de errores cuente como uno.
+def _reducir(planificador, ahora):
+    ventana = max(planificador["latencia_media"] or 0.0, LATENCIA_DESPRECIABLE)
+    if ahora - planificador["ultimo_recorte"] >= ventana:
+        planificador["limite"] = max(planificador["minimo"], planificador["limite"] * FACTOR_REDUCCION)
+        planificador["ultimo_recorte"] = ahora
+        planificador["contadores"]["recortes"] += 1
+
+# Libera el hueco de concurrencia y ajusta el límite (AIMD) según el resultado y la latencia de la petición.
+def _salir(planificador, latencia, saturado):
+    with planificador["condicion"]:
+        planificador["en_curso"] -= 1
+        planificador["contadores"]["peticiones"] += 1
+        ahora = time.monotonic()
+        if saturado:
+            _reducir(planificador, ahora)
+        else:
+            minima, media = planificador["latencia_minima"], planificador["latencia_media"]
+            planificador["latencia_minima"] = minima = latencia if minima is None else min(minima, latencia)
+            planificador["latencia_media"] = media = latencia if media is None else media + PESO_LATENCIA * (latencia - media)
+            if media > FACTOR_LATENCIA * max(minima, LATENCIA_DESPRECIABLE):
+                _reducir(planificador, ahora)
+            else:
+                planificador["limite"] = min(planificador["maximo"], planificador["limite"] + 1 / planificador["limite"])
+        planificador["contadores"]["limite_maximo"] = max(planificador["contadores"]["limite_maximo"], int(planificador["limite"]))
+        planificador["condicion"].notify_all()
+
+# Espera antes de reintentar: la pedida por el servidor o un retroceso exponencial por intento.
+def _espera_reintento(espera_servidor, intento):
+    if espera_servidor is not None:
+        return min(ESPERA_MAXIMA, espera_servidor)
+    return min(ESPERA_MAXIMA, ESPERA_BASE * 2 ** intento)
+
+# Ejecuta peticion(*tarea) para cada tarea (la primera posición de la tupla es la URL) respetando los cubos y la concurrencia adaptativa.
+# reintentable(error) devuelve (si hay que reintentar, segundos pedidos por el servidor o None, si es un límite de ritmo como un 429):
+# esas peticiones cuentan como saturación y vuelven a la cola tras su espera; las limitadas reducen además el ritmo de su endpoint. Devuelve (resultados en el orden de las tareas, {índice: último error} de las que fallaron del todo).
+def ejecutar_peticiones(planificador, peticion, tareas, reintentable):
+    resultados = [None] * len(tareas)
+    errores = {}
+    # Cola de (listo_en, orden, índice, intento): los reintentos se encolan detrás de las peticiones que ya estaban listas.
+    cola = [(0.0, i, i, 0) for i in range(len(tareas))]
+    heapq.heapify(cola)
+    orden = [len(tareas)]
+    pendientes = [len(tareas)]
+    condicion = threading.Condition()
+
+    def trabajador():
+        while True:
+            with condicion:
+                while not cola and pendientes[0]:
+                    condicion.wait()
+                if not pendientes[0]:
+                    return
+                listo_en, _, i, intento = heapq.heappop(cola)
+            espera = listo_en - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+
+            endpoint = clave_endpoint(tareas[i][0])
+            _tomar_ficha(planificador, endpoint)
+            _entrar(planificador)
+            inicio = time.monotonic()
+            error, reintentar, espera_servidor, limitado = None, False, None, False
+            try:
+                resultados[i] = peticion(*tareas[i])
+            except Exception as e:
+                error = e
+                # Si el propio clasificador falla, el error de la petición se da por definitivo para no dejar la tarea sin contar.
+                try:
+                    reintentar, espera_servidor, limitado = reintentable(e)
+                except Exception:
+                    reintentar, espera_servidor, limitado = False, None, False
+            try:
+                _salir(planificador, time.monotonic() - inicio, reintentar)
+                if error is None:
+                    _acelerar_endpoint(planificador, endpoint)
+            except Exception as e:
+                resultados[i] = None
+                error, reintentar = error or e, False
+
+            with condicion:
+                if reintentar and intento < MAX_REINTENTOS:
+                    planificador["contadores"]["reintentos"] += 1
+                    espera = _espera_reintento(espera_servidor, intento)
+                    if limitado or espera_servidor is not None:
+                        _frenar_endpoint(planificador, endpoint, espera if espera_servidor is not None else None, limitado)
+                    heapq.heappush(cola, (time.monotonic() + espera, orden[0], i, intento + 1))
+                    orden[0] += 1
+                else:
+                    if error is not None:
+                        errores[i] = error
+                        planificador["contadores"]["fallidas"] += 1
+                    pendientes[0] -= 1
+                condicion.notify_all()
+
+    hilos = min(len(tareas), planificador["maximo"])
+    if hilos:
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            for futuro in [pool.submit(trabajador) for _ in range(hilos)]:
+                futuro.result()
+    return resultados, errores
+
+# Resumen legible de los contadores del planificador.
+def resumen_planificador(planificador):
+    contadores = planificador["contadores"]
+    return (f"{contadores['peticiones']} peticiones, {contadores['reintentos']} reintentos, {contadores['fallidas']} fallidas; "
+            f"concurrencia {planificador['limite']:.1f} (máxima alcanzada {contadores['limite_maximo']}, {contadores['recortes']} recortes)")
@@ -0,0 +1,115 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+
+import numpy as np
+
+from clasificacion import PUNTOS_VICTORIA, PUNTOS_EMPATE
+
+SIMULACIONES_POR_DEFECTO = 100_000
+# Temporadas que se simulan a la vez en cada paso vectorizado; acota la memoria de cada proceso.
+TAMANO_LOTE = 10_000
+
+# Prepara la proyección de una división: clasificación actual y puntuaciones históricas por jornada de cada equipo.
+def preparar_datos_proyeccion(rondas, name_map, clasificacion, jornadas_temporada):
+    equipos = [equipo['name'] for equipo in clasificacion]
+    indice_equipo = {nombre: i for i, nombre in enumerate(equipos)}
+    historico = [[] for _ in equipos]
+    for round_number in sorted(rondas):
+        answer = rondas[round_number]['datos'].get('answer', {})
+        ranking = answer.get('ranking', [])
+        for match in answer.get('matches', []):
+            puntos = match.get('data', {}).get('partial', match.get('m', [0, 0]))
+            for posicion, puntos_equipo in zip(match['p'], puntos):
+                if not 1 <= posicion <= len(ranking):
+                    continue
+                team_name = name_map.get(ranking[posicion - 1]['name'], ranking[posicion - 1]['name'])
+                if team_name in indice_equipo:
+                    historico[indice_equipo[team_name]].append(float(puntos_equipo))
+
+    # Un equipo sin jornadas disputadas se simula con el histórico de toda la división.
+    todos = [p for puntos in historico for p in puntos] or [0.0]
+    historico = [puntos or todos for puntos in historico]
+    tabla = np.zeros((len(equipos), max(len(puntos) for puntos in historico)))
+    for i, puntos in enumerate(historico):
+        tabla[i, :len(puntos)] = puntos
+    return {
+        "equipos": equipos,
+        "puntos": np.array([equipo['points'] for equipo in clasificacion], dtype=float),
+        "puntos_generales": np.array([equipo['general_points'] for equipo in clasificacion], dtype=float),
+        "historico": tabla,
+        "n_historico": np.array([len(puntos) for puntos in historico]),
+        "jornadas_restantes": max(0, jornadas_temporada - len({int(n) for n in rondas})),
+    }
+
+# Simula un bloque de temporadas y cuenta cuántas veces acaba cada equipo en cada posición (se ejecuta en un proceso del pool).
+def _simular_bloque(argumentos):
+    datos, n_simulaciones, semilla = argumentos
+    rng = np.random.default_rng(semilla)
+    n_equipos = len(datos["equipos"])
+    equipos = np.arange(n_equipos)
+    n_pares = n_equipos // 2
+    conteo = np.zeros(n_equipos * n_equipos, dtype=np.int64)
+    # Puntos según el signo de la diferencia de marcador (derrota, empate, victoria).
+    puntos_resultado = np.array([0, PUNTOS_EMPATE, PUNTOS_VICTORIA], dtype=float)
+
+    for inicio in range(0, n_simulaciones, TAMANO_LOTE):
+        n_lote = min(TAMANO_LOTE, n_simulaciones - inicio)
+        filas = np.arange(n_lote)[:, None]
+        puntos = np.tile(datos["puntos"], (n_lote, 1))
+        generales = np.tile(datos["puntos_generales"], (n_lote, 1))
+        for _ in range(datos["jornadas_restantes"]):
+            # Puntuación de cada equipo remuestreada de su propio histórico y emparejamientos al azar (el calendario no se descarga).
+            muestra = (rng.random((n_lote, n_equipos)) * datos["n_historico"]).astype(np.intp)
+            marcador = datos["historico"][equipos, muestra]
+            generales += marcador
+            emparejamiento = np.argsort(rng.random((n_lote, n_equipos)), axis=1)
+            local, visitante = emparejamiento[:, 0:2 * n_pares:2], emparejamiento[:, 1:2 * n_pares:2]
+            resultado = np.sign(marcador[filas, local] - marcador[filas, visitante]).astype(np.intp) + 1
+            puntos[filas, local] += puntos_resultado[resultado]
+            puntos[filas, visitante] += puntos_resultado[2 - resultado]
+
+        # Igual que la clasificación real: por puntos y, a igualdad, por puntos generales.
+        orden = np.lexsort((-generales, -puntos), axis=1)
+        conteo += np.bincount((orden * n_equipos + equipos).ravel(), minlength=n_equipos * n_equipos)
+    return conteo.reshape(n_equipos, n_equipos)
+
+# Contexto de multiprocessing para los procesos de simulación: forkserver si la plataforma lo tiene y si no spawn, nunca fork.
+def _contexto_procesos():
+    return multiprocessing.get_context("forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+
+# Proyecta la clasificación final con Monte Carlo, repartiendo las simulaciones entre varios procesos.
+def proyectar_clasificacion(datos, simulaciones=SIMULACIONES_POR_DEFECTO, procesos=None, semilla=None):
+    procesos = max(1, min(procesos or os.cpu_count() or 1, -(-simulaciones // TAMANO_LOTE)))
+    reparto = [simulaciones // procesos + (1 if i < simulaciones % procesos else 0) for i in range(procesos)]
+    argumentos = [(datos, n, s) for n, s in zip(reparto, np.random.SeedSequence(semilla).spawn(procesos))]
+    if procesos == 1:
+        conteo = _simular_bloque(argumentos[0])
+    else:
+        # El grafo de etapas lanza la proyección desde un hilo con otros vivos: un fork podría heredar un cerrojo tomado por otro hilo
+        # (stdout, los de persistencia...) y bloquearse. Los procesos se crean con forkserver (o spawn donde no existe), sin fork.
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=_contexto_procesos()) as pool:
+            conteo = sum(pool.map(_simular_bloque, argumentos))
+    return conteo / simulaciones
+
+# Resume las probabilidades por equipo (campeón, descenso, colista y posición media), ordenadas por posición media.
+def resumir_proyeccion(datos, probabilidades, simulaciones, plazas_descenso=0):
+    posiciones = np.arange(1, len(datos["equipos"]) + 1)
+    equipos = []
+    for i, team_name in enumerate(datos["equipos"]):
+        p = probabilidades[i]
+        equipos.append({
+            "name": team_name,
+            "puntos": float(datos["puntos"][i]),
+            "campeon": round(float(p[0]), 4),
+            "descenso": round(float(p[len(p) - plazas_descenso:].sum()), 4) if plazas_descenso else None,
+            "colista": round(float(p[-1]), 4),
+            "posicion_media": round(float(p @ posiciones), 2),
+            "posiciones": [round(float(x), 4) for x in p],
+        })
+    return {
+        "simulaciones": simulaciones,
+        "jornadas_restantes": datos["jornadas_restantes"],
+        "plazas_descenso": plazas_descenso,
+        "equipos": sorted(equipos, key=lambda e: e["posicion_media"]),
+    }
@@ -0,0 +1,147 @@
+from datetime import datetime
+import hashlib
+import json
+import os
+import subprocess
+
+# El manifiesto se guarda dentro del directorio de git, fuera del árbol de trabajo. Antes se guardaba en la raíz del proyecto.
+MANIFIESTO_PUBLICACION = "publicacion.json"
+MANIFIESTO_ANTIGUO = ".publicacion.json"
+AUTOR_PUBLICACION = "Fuentmondo Bot <fuentmondo@users.noreply.github.com>"
+
+# Calcula el identificador de blob de git (SHA-1 de "blob <tamaño>\0<contenido>") de un contenido.
+def hash_blob_git(contenido):
+    cabecera = f"blob {len(contenido)}\0".encode('utf-8')
+    return hashlib.sha1(cabecera + contenido).hexdigest()
+
+# Carga el manifiesto de la última publicación (ruta del artefacto -> hash del blob).
+def cargar_manifiesto(ruta_manifiesto):
+    for ruta in (ruta_manifiesto, MANIFIESTO_ANTIGUO):
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            continue
+    return {"rama": None, "commit": None, "artefactos": {}}
+
+# Guarda el manifiesto tras una publicación correcta (y borra el de la ubicación antigua, si quedaba).
+def guardar_manifiesto(manifiesto, ruta_manifiesto):
+    with open(ruta_manifiesto, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=4, ensure_ascii=False, sort_keys=True)
+    if os.path.abspath(ruta_manifiesto) != os.path.abspath(MANIFIESTO_ANTIGUO) and os.path.exists(MANIFIESTO_ANTIGUO):
+        os.remove(MANIFIESTO_ANTIGUO)
+
+# Lee los artefactos del disco y devuelve (cambios, eliminados): los que han cambiado respecto al manifiesto y las rutas
+# publicadas que ya no están entre los artefactos (p. ej. un script con huella sustituido por otro), que se borran del árbol publicado.
+def detectar_cambios(rutas_artefactos, manifiesto):
+    publicados = manifiesto.get("artefactos", {})
+    cambios = {}
+    presentes = set()
+    for ruta in rutas_artefactos:
+        if not os.path.exists(ruta):
+            print(f"     -> Aviso: El artefacto '{ruta}' no existe. Se omite.")
+            continue
+        with open(ruta, 'rb') as f:
+            contenido = f.read()
+        ruta_repo = ruta.replace(os.sep, '/')
+        presentes.add(ruta_repo)
+        blob_id = hash_blob_git(contenido)
+        if publicados.get(ruta_repo) != blob_id:
+            cambios[ruta_repo] = (blob_id, contenido)
+    return cambios, sorted(set(publicados) - presentes)
+
+# Resuelve una referencia leyendo directamente el directorio de git (ref suelta o packed-refs).
+def _resolver_ref(git_dir, ref):
+    ruta_ref = os.path.join(git_dir, *ref.split('/'))
+    if os.path.isfile(ruta_ref):
+        with open(ruta_ref, 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    ruta_packed = os.path.join(git_dir, 'packed-refs')
+    if os.path.isfile(ruta_packed):
+        with open(ruta_packed, 'r', encoding='utf-8') as f:
+            for linea in f:
+                partes = linea.strip().split(' ')
+                if len(partes) == 2 and partes[1] == ref:
+                    return partes[0]
+    return None
+
+# Devuelve la rama a la que apunta HEAD, o None si HEAD está separado.
+def _rama_head(git_dir):
+    try:
+        with open(os.path.join(git_dir, 'HEAD'), 'r', encoding='utf-8') as f:
+            contenido = f.read().strip()
+    except FileNotFoundError:
+        return None
+    if contenido.startswith('ref: '):
+        return contenido[len('ref: '):]
+    return None
+
+# Indica si el directorio de git pertenece a un repositorio bare (sin árbol de trabajo).
+def _es_bare(git_dir):
+    try:
+        with open(os.path.join(git_dir, 'config'), 'r', encoding='utf-8') as f:
+            return any(linea.replace(' ', '').strip().lower() == 'bare=true' for linea in f)
+    except FileNotFoundError:
+        return False
+
+# Construye el flujo de 'git fast-import' con un único commit que contiene solo los blobs modificados y los borrados.
+def _construir_flujo_fast_import(cambios, eliminados, ref, mensaje, padre):
+    marca_tiempo = int(datetime.now().timestamp())
+    mensaje_bytes = mensaje.encode('utf-8')
+    partes = [
+        f"commit {ref}\n".encode('utf-8'),
+        f"committer {AUTOR_PUBLICACION} {marca_tiempo} +0000\n".encode('utf-8'),
+        f"data {len(mensaje_bytes)}\n".encode('utf-8'), mensaje_bytes, b"\n",
+    ]
+    if padre:
+        partes.append(f"from {ref}^0\n".encode('utf-8'))
+    for ruta_repo, (_, contenido) in sorted(cambios.items()):
+        partes.append(f"M 100644 inline {ruta_repo}\n".encode('utf-8'))
+        partes.append(f"data {len(contenido)}\n".encode('utf-8'))
+        partes.append(contenido)
+        partes.append(b"\n")
+    for ruta_repo in eliminados:
+        partes.append(f"D {ruta_repo}\n".encode('utf-8'))
+    partes.append(b"done\n")
+    return b"".join(partes)
+
+# Publica en un único commit solo los artefactos cuyo contenido ha cambiado desde la última publicación (y borra los que ya no están).
+def publicar_artefactos(rutas_artefactos, remote_url, rama="main", git_dir=".git", ruta_manifiesto=None):
+    print("\n--- PUBLICANDO ARTEFACTOS DEL INFORME ---")
+    ruta_manifiesto = ruta_manifiesto or os.path.join(git_dir, MANIFIESTO_PUBLICACION)
+    manifiesto = cargar_manifiesto(ruta_manifiesto)
+    cambios, eliminados = detectar_cambios(rutas_artefactos, manifiesto)
+    if not cambios and not eliminados:
+        print("✅ No hay cambios en los artefactos publicados. No se necesita subir nada.")
+        return False
+
+    ref = f"refs/heads/{rama}"
+    padre = _resolver_ref(git_dir, ref)
+    mensaje = f"Informe actualizado automáticamente - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n" + "\n".join([*sorted(cambios), *(f"(borrado) {ruta}" for ruta in eliminados)])
+    flujo = _construir_flujo_fast_import(cambios, eliminados, ref, mensaje, padre)
+
+    try:
+        subprocess.run(["git", f"--git-dir={git_dir}", "fast-import", "--quiet", "--done"], input=flujo, check=True, capture_output=True)
+        subprocess.run(["git", f"--git-dir={git_dir}", "push", "--quiet", remote_url, f"{ref}:{ref}"], check=True, capture_output=True)
+        # Si la rama publicada es la que está desprotegida, el índice se sincroniza con el nuevo commit.
+        if not _es_bare(git_dir) and _rama_head(git_dir) == ref:
+            subprocess.run(["git", f"--git-dir={git_dir}", f"--work-tree={os.path.dirname(os.path.abspath(git_dir))}", "reset", "--quiet", "--", *sorted(cambios), *eliminados], check=True, capture_output=True)
+    except FileNotFoundError:
+        print("❌ Error: Git no está instalado o no se encuentra en el PATH del sistema.")
+        return False
+    except subprocess.CalledProcessError as e:
+        error = e.stderr.decode('utf-8', errors='replace') if isinstance(e.stderr, bytes) else e.stderr
+        print(f"❌ Error durante la publicación con Git: {error}")
+        return False
+
+    manifiesto["rama"] = rama
+    manifiesto["commit"] = _resolver_ref(git_dir, ref)
+    artefactos = manifiesto.setdefault("artefactos", {})
+    artefactos.update({ruta: blob_id for ruta, (blob_id, _) in cambios.items()})
+    for ruta in eliminados:
+        del artefactos[ruta]
+    guardar_manifiesto(manifiesto, ruta_manifiesto)
+    print(f"✅ Publicados {len(cambios)} artefacto(s) modificados: {', '.join(sorted(cambios))}")
+    if eliminados:
+        print(f"✅ Borrados {len(eliminados)} artefacto(s) que ya no se generan: {', '.join(eliminados)}")
+    return True
@@ -0,0 +1,103 @@
+import glob
+import gzip
+import hashlib
+import os
+import re
+import zlib
+
+from persistencia import escribir_atomico, escribir_atomico_con
+
+# Caracteres del hash de contenido que se añaden al nombre de cada recurso.
+LONGITUD_HUELLA = 10
+
+# Cabeceras de caché para hostings estáticos que leen un archivo _headers (Netlify, Cloudflare Pages): los recursos con huella
+# no cambian nunca y se cachean un año; el HTML y los datos se revalidan en cada visita.
+ARCHIVO_CABECERAS = "_headers"
+CABECERAS_HOSTING = """/{recursos}/*
+  Cache-Control: public, max-age=31536000, immutable
+/
+  Cache-Control: no-cache
+/*.html
+  Cache-Control: no-cache
+/{datos}/*
+  Cache-Control: no-cache
+"""
+
+_BLOQUE_SCRIPT = re.compile(r"(<script\b[^>]*>.*?</script>)", re.S | re.I)
+_ESPACIO_ENTRE_ETIQUETAS = re.compile(r">\s*\n\s*<")
+_SANGRIA = re.compile(r"\n\s+")
+
+# Huella del contenido de un recurso (prefijo de su SHA-256).
+def huella(contenido):
+    return hashlib.sha256(contenido).hexdigest()[:LONGITUD_HUELLA]
+
+# Minifica el HTML generado: quita la sangría y los saltos de línea entre etiquetas. El contenido de los <script> no se toca
+# (los datos JSON ya van compactos) y los espacios dentro del texto y de los atributos se conservan.
+def minificar_html(html):
+    partes = _BLOQUE_SCRIPT.split(html)
+    for i in range(0, len(partes), 2):
+        partes[i] = _SANGRIA.sub("\n", _ESPACIO_ENTRE_ETIQUETAS.sub("><", partes[i]))
+    return "".join(partes)
+
+# Minifica un script propio del informe: sin sangría ni líneas en blanco (los scripts no dependen de los saltos de línea).
+def minificar_js(codigo):
+    return "\n".join(linea.strip() for linea in codigo.strip().splitlines() if linea.strip())
+
+# Escribe junto a un archivo sus variantes .gz y, si está instalado brotli, .br. Son deterministas (sin fecha en la cabecera gzip),
+# así que un contenido que no cambia produce los mismos bytes y la publicación no los vuelve a subir.
+def escribir_variantes_comprimidas(ruta, contenido):
+    rutas = [ruta + ".gz"]
+    escribir_atomico(gzip.compress(contenido, compresslevel=9, mtime=0), rutas[0])
+    try:
+        import brotli
+    except ImportError:
+        return rutas
+    rutas.append(ruta + ".br")
+    escribir_atomico(brotli.compress(contenido, quality=11), rutas[1])
+    return rutas
+
+# Como escribir_variantes_comprimidas, pero lee el archivo ya escrito por bloques y comprime en streaming, sin tenerlo entero en memoria.
+def escribir_variantes_comprimidas_por_bloques(ruta, tamano_bloque=2**20):
+    def comprimir(escribir_bloques):
+        with open(ruta, 'rb') as origen:
+            for bloque in iter(lambda: origen.read(tamano_bloque), b""):
+                escribir_bloques(bloque)
+
+    # Con la cabecera gzip de zlib (wbits=31), como gzip.compress con mtime=0: los mismos bytes que escribir_variantes_comprimidas.
+    def escribir_gzip(f):
+        compresor = zlib.compressobj(9, zlib.DEFLATED, 31)
+        comprimir(lambda bloque: f.write(compresor.compress(bloque)))
+        f.write(compresor.flush())
+
+    rutas = [ruta + ".gz"]
+    escribir_atomico_con(escribir_gzip, rutas[0])
+    try:
+        import brotli
+    except ImportError:
+        return rutas
+
+    def escribir_brotli(f):
+        compresor = brotli.Compressor(quality=11)
+        comprimir(lambda bloque: f.write(compresor.process(bloque)))
+        f.write(compresor.finish())
+
+    rutas.append(ruta + ".br")
+    escribir_atomico_con(escribir_brotli, rutas[1])
+    return rutas
+
+# Escribe un recurso con la huella de su contenido en el nombre (nombre.<huella>.ext) y sus variantes comprimidas, y borra las
+# versiones anteriores del mismo recurso. Devuelve (nombre del archivo, rutas escritas).
+def escribir_recurso_con_huella(contenido, directorio, nombre, extension):
+    archivo = f"{nombre}.{huella(contenido)}{extension}"
+    ruta = os.path.join(directorio, archivo)
+    for anterior in glob.glob(os.path.join(glob.escape(directorio), f"{glob.escape(nombre)}.*{extension}*")):
+        if not os.path.basename(anterior).startswith(archivo):
+            os.remove(anterior)
+    escribir_atomico(contenido, ruta)
+    return archivo, [ruta, *escribir_variantes_comprimidas(ruta, contenido)]
+
+# Escribe el archivo _headers con las cabeceras de caché del informe en el directorio de publicación.
+def escribir_cabeceras_hosting(directorio, directorio_recursos, directorio_datos):
+    ruta = os.path.join(directorio, ARCHIVO_CABECERAS)
+    escribir_atomico(CABECERAS_HOSTING.format(recursos=directorio_recursos, datos=directorio_datos).encode('utf-8'), ruta)
+    return ruta
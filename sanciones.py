@@ -0,0 +1,77 @@
+from bisect import bisect_left, bisect_right, insort
+
+# Restricciones de un jugador sancionado en una jornada.
+PARTIDOS = "partidos"
+CAPITANIA = "capitania"
+
+# Índice de sanciones vacío: por equipo y jugador, sus sanciones ordenadas por la posición en el calendario de la jornada que las generó.
+def indice_vacio():
+    return {}
+
+# Posición de una jornada en el calendario ordenado (una jornada que no está se coloca en la anterior que sí esté).
+def posicion_jornada(calendario, jornada):
+    return bisect_right(calendario, jornada) - 1
+
+# Jornada de una posición del calendario; las posiciones posteriores a la última jornada se cuentan como las jornadas enteras siguientes.
+def jornada_en_posicion(calendario, posicion):
+    if posicion < len(calendario):
+        return calendario[posicion]
+    return (int(calendario[-1]) if calendario else 0) + posicion - len(calendario) + 1
+
+# Fin de los intervalos de una sanción generada en la posición t: partidos [t+1, t+G] y sin capitanía [t+G+1, t+G+C].
+# Funciona igual con posiciones sueltas que con arrays de numpy (el simulador evalúa todas las variantes a la vez).
+def intervalos_sancion(posicion, partidos, jornadas_sin_capitania):
+    return posicion + partidos, posicion + partidos + jornadas_sin_capitania
+
+# Añade una sanción al índice con sus intervalos en posiciones del calendario.
+def anadir_sancion(indice, team_name, jugador, posicion, sancion, reglas):
+    fin_partidos, fin_capitania = intervalos_sancion(posicion, sancion.get('games_to_serve', reglas['partidos_sancion']), reglas['jornadas_sin_capitania'])
+    entrada = {"posicion": posicion, "fin_partidos": fin_partidos, "fin_capitania": fin_capitania, "sancion": sancion}
+    insort(indice.setdefault(team_name, {}).setdefault(jugador, []), entrada, key=lambda e: e["posicion"])
+    return entrada
+
+# Restricción de un jugador en una posición del calendario (PARTIDOS, CAPITANIA o None).
+def restriccion(indice, team_name, jugador, posicion):
+    entradas = indice.get(team_name, {}).get(jugador)
+    if not entradas:
+        return None
+    # No se sanciona a quien ya cumple partidos de sanción, así que los intervalos de una sanción terminan antes
+    # que los de la siguiente y basta con mirar la última sanción generada antes de la jornada.
+    i = bisect_left(entradas, posicion, key=lambda e: e["posicion"])
+    if i == 0:
+        return None
+    entrada = entradas[i - 1]
+    if posicion <= entrada["fin_partidos"]:
+        return PARTIDOS
+    if posicion <= entrada["fin_capitania"]:
+        return CAPITANIA
+    return None
+
+# Sanción de un jugador con partidos aún por cumplir en una posición (incluida la generada en esa misma jornada), o None.
+def sancion_vigente(indice, team_name, jugador, posicion):
+    entradas = indice.get(team_name, {}).get(jugador)
+    if not entradas:
+        return None
+    i = bisect_right(entradas, posicion, key=lambda e: e["posicion"])
+    if i and posicion < entradas[i - 1]["fin_partidos"]:
+        return entradas[i - 1]
+    return None
+
+# Campos de estado de una sanción después de una posición del calendario; se derivan de sus intervalos, no se guardan modificados.
+def estado_sancion(entrada, posicion_actual, calendario):
+    partidos = entrada["fin_partidos"] - entrada["posicion"]
+    cumplidos = min(max(posicion_actual - entrada["posicion"], 0), partidos)
+    estado = {"status": "active", "games_served": cumplidos}
+    if cumplidos >= partidos:
+        estado["status"] = "captain_banned"
+        estado["jornada_completed"] = calendario[entrada["fin_partidos"]]
+        if posicion_actual >= entrada["fin_capitania"]:
+            estado["status"] = "completed"
+            estado["jornada_fully_cleared"] = calendario[entrada["fin_capitania"]]
+    return estado
+
+# Copia de una sanción con su estado derivado tras una posición del calendario (sin restos de un estado anterior).
+def sancion_con_estado(entrada, posicion_actual, calendario):
+    sancion = {k: v for k, v in entrada["sancion"].items() if k not in ("jornada_completed", "jornada_fully_cleared")}
+    sancion.update(estado_sancion(entrada, posicion_actual, calendario))
+    return sancion
@@ -0,0 +1,280 @@
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import re
+import threading
+import time
+from urllib.parse import unquote, urlsplit
+import uuid
+
+# Rutas de Microsoft Graph que reproduce el servidor simulado (relativas a /v1.0).
+RUTA_SHARE = re.compile(r"^/shares/[^/]+/driveItem$")
+RUTA_CONTENIDO = re.compile(r"^/drives/[^/]+/items/[^/]+/content$")
+RUTA_SESION = re.compile(r"^/drives/[^/]+/items/[^/]+/workbook/(createSession|closeSession)$")
+RUTA_RANGO_USADO = re.compile(r"^/drives/[^/]+/items/[^/]+/workbook/worksheets\('(.+)'\)/usedRange$")
+RUTA_RANGO = re.compile(r"^/drives/[^/]+/items/[^/]+/workbook/worksheets\('(.+)'\)/range\(address='([A-Z]+[0-9]+(?::[A-Z]+[0-9]+)?)'\)$")
+
+# Estado de un libro de Excel servido por el simulador de Graph, con contadores de tráfico.
+def crear_estado_graph(ruta_excel):
+    return {
+        "ruta": ruta_excel,
+        "bloqueo": threading.Lock(),
+        "sesiones": set(),
+        "trafico": {"peticiones": 0, "bytes_recibidos": 0, "bytes_enviados": 0},
+    }
+
+# Nombre de una hoja tal y como llega en la URL de Graph (escapada y con comillas dobladas).
+def _nombre_hoja(nombre_url):
+    return unquote(nombre_url).replace("''", "'")
+
+# Atiende una petición de Graph ya decodificada y devuelve (estado HTTP, cuerpo JSON o bytes).
+def atender_peticion_graph(estado, metodo, ruta, cuerpo, cabeceras):
+    import openpyxl
+    from openpyxl.utils import get_column_letter, range_boundaries
+
+    if metodo == 'GET' and RUTA_SHARE.match(ruta):
+        return 200, {"id": "item-simulado", "parentReference": {"driveId": "drive-simulado"}}
+    if RUTA_CONTENIDO.match(ruta):
+        with estado["bloqueo"]:
+            if metodo == 'GET':
+                with open(estado["ruta"], 'rb') as f:
+                    return 200, f.read()
+            if metodo == 'PUT':
+                with open(estado["ruta"], 'wb') as f:
+                    f.write(cuerpo)
+                return 200, {"id": "item-simulado"}
+
+    sesion = RUTA_SESION.match(ruta)
+    if metodo == 'POST' and sesion:
+        if sesion.group(1) == 'createSession':
+            session_id = uuid.uuid4().hex
+            estado["sesiones"].add(session_id)
+            return 201, {"id": session_id, "persistChanges": True}
+        estado["sesiones"].discard(cabeceras.get('workbook-session-id'))
+        return 204, None
+
+    rango_usado = RUTA_RANGO_USADO.match(ruta)
+    rango = RUTA_RANGO.match(ruta)
+    if not (rango_usado or rango):
+        return 404, {"error": {"code": "itemNotFound", "message": f"Ruta no simulada: {metodo} {ruta}"}}
+    if cabeceras.get('workbook-session-id') not in estado["sesiones"]:
+        return 400, {"error": {"code": "invalidSessionId", "message": "Sesión de libro inexistente."}}
+
+    with estado["bloqueo"]:
+        workbook = openpyxl.load_workbook(estado["ruta"])
+        hoja = _nombre_hoja((rango_usado or rango).group(1))
+        if hoja not in workbook.sheetnames:
+            return 404, {"error": {"code": "itemNotFound", "message": f"Hoja '{hoja}' no encontrada."}}
+        sheet = workbook[hoja]
+
+        if metodo == 'GET' and rango_usado:
+            direccion = f"{get_column_letter(sheet.min_column)}{sheet.min_row}:{get_column_letter(sheet.max_column)}{sheet.max_row}"
+            valores = [["" if cell.value is None else cell.value for cell in row] for row in sheet.iter_rows(min_row=sheet.min_row, max_row=sheet.max_row, min_col=sheet.min_column, max_col=sheet.max_column)]
+            return 200, {"address": f"{hoja}!{direccion}", "values": valores}
+
+        if metodo == 'PATCH' and rango:
+            min_col, min_row, max_col, max_row = range_boundaries(rango.group(2))
+            valores = cuerpo.get("values", [])
+            if len(valores) != max_row - min_row + 1 or any(len(fila) != max_col - min_col + 1 for fila in valores):
+                return 400, {"error": {"code": "invalidArgument", "message": "Las dimensiones de 'values' no coinciden con el rango."}}
+            for i, fila in enumerate(valores):
+                for j, valor in enumerate(fila):
+                    if valor is not None:
+                        sheet.cell(row=min_row + i, column=min_col + j).value = None if valor == "" else valor
+            workbook.save(estado["ruta"])
+            return 200, {"address": f"{hoja}!{rango.group(2)}"}
+    return 405, {"error": {"code": "methodNotAllowed", "message": f"{metodo} no admitido en {ruta}"}}
+
+# Crea la clase manejadora HTTP del simulador de Graph, incluido el endpoint $batch.
+def crear_manejador_graph(estado, prefijo="/v1.0"):
+    class ManejadorGraph(BaseHTTPRequestHandler):
+        def _responder(self, codigo, datos):
+            if isinstance(datos, bytes):
+                contenido, tipo = datos, 'application/octet-stream'
+            else:
+                contenido, tipo = (b"" if datos is None else json.dumps(datos).encode('utf-8')), 'application/json'
+            estado["trafico"]["bytes_enviados"] += len(contenido)
+            self.send_response(codigo)
+            self.send_header('Content-Type', tipo)
+            self.send_header('Content-Length', str(len(contenido)))
+            self.end_headers()
+            self.wfile.write(contenido)
+
+        def _atender(self):
+            longitud = int(self.headers.get('Content-Length') or 0)
+            crudo = self.rfile.read(longitud) if longitud else b""
+            estado["trafico"]["peticiones"] += 1
+            estado["trafico"]["bytes_recibidos"] += len(crudo)
+            ruta = urlsplit(self.path).path
+            if not ruta.startswith(prefijo):
+                self._responder(404, {"error": {"code": "itemNotFound", "message": ruta}})
+                return
+            ruta = ruta[len(prefijo):]
+            if self.headers.get('Authorization', '').split(' ')[-1] in ('', 'Bearer'):
+                self._responder(401, {"error": {"code": "InvalidAuthenticationToken", "message": "Falta el token."}})
+                return
+
+            es_json = crudo and 'json' in self.headers.get('Content-Type', '')
+            cuerpo = json.loads(crudo) if es_json else crudo
+            cabeceras = {k.lower(): v for k, v in self.headers.items()}
+            if self.command == 'POST' and ruta == '/$batch':
+                respuestas = []
+                for peticion in cuerpo.get("requests", []):
+                    sub_cabeceras = {k.lower(): v for k, v in peticion.get("headers", {}).items()}
+                    codigo, datos = atender_peticion_graph(estado, peticion["method"], urlsplit(peticion["url"]).path, peticion.get("body"), sub_cabeceras)
+                    respuestas.append({"id": peticion["id"], "status": codigo, "body": datos})
+                self._responder(200, {"responses": respuestas})
+                return
+            self._responder(*atender_peticion_graph(estado, self.command, ruta, cuerpo, cabeceras))
+
+        do_GET = do_POST = do_PUT = do_PATCH = _atender
+
+        def log_message(self, format, *args):
+            pass
+
+    return ManejadorGraph
+
+# Arranca en segundo plano un simulador de Graph sobre un .xlsx local y devuelve (servidor, estado, endpoint).
+def iniciar_servidor_graph(ruta_excel, host="127.0.0.1", puerto=0):
+    estado = crear_estado_graph(ruta_excel)
+    servidor = ThreadingHTTPServer((host, puerto), crear_manejador_graph(estado))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, estado, f"http://{host}:{servidor.server_address[1]}/v1.0"
+
+# Clave de una respuesta del simulador de Futmondo: ruta del endpoint y consulta en JSON canónico (la cabecera con el token no cuenta).
+def clave_futmondo(ruta, query):
+    return f"{ruta}?{json.dumps(query, sort_keys=True, ensure_ascii=False, separators=(',', ':'))}"
+
+# Respuestas servidas desde el archivo de respuestas de la API: devuelve una función (ruta, consulta) -> cuerpo JSON crudo o None.
+def respuestas_desde_archivo():
+    from archivo_api import claves_archivadas, cuerpo_archivado
+
+    claves = {}
+    for clave in claves_archivadas():
+        url, _, query = clave.partition('?')
+        claves[f"{urlsplit(url).path}?{query}"] = clave
+    return lambda ruta, query: cuerpo_archivado(claves[clave_futmondo(ruta, query)]) if clave_futmondo(ruta, query) in claves else None
+
+# Estado del simulador de Futmondo: de dónde salen las respuestas, cómo limita el ritmo (cubo de fichas del servidor),
+# cuánto tarda (latencia base más una parte por cada petición en curso, como un servidor cargado) y contadores de tráfico.
+def crear_estado_futmondo(respuestas, tasa=20.0, rafaga=10, prob_error=0.0, latencia=0.0, latencia_por_peticion=0.0, semilla=0):
+    return {
+        "respuestas": respuestas,
+        "tasa": tasa,
+        "rafaga": rafaga,
+        "fichas": float(rafaga),
+        "ultimo": time.monotonic(),
+        "prob_error": prob_error,
+        "latencia": latencia,
+        "latencia_por_peticion": latencia_por_peticion,
+        "en_curso": 0,
+        "aleatorio": random.Random(semilla),
+        "bloqueo": threading.Lock(),
+        "trafico": {"peticiones": 0, "200": 0, "404": 0, "429": 0, "503": 0, "max_en_curso": 0},
+    }
+
+# Atiende una petición POST a Futmondo y devuelve (estado HTTP, cuerpo JSON o bytes, cabeceras adicionales).
+# Por encima del ritmo permitido responde 429 con Retry-After (en segundos, con decimales) y con cierta probabilidad 503.
+def atender_peticion_futmondo(estado, ruta, cuerpo):
+    with estado["bloqueo"]:
+        trafico = estado["trafico"]
+        trafico["peticiones"] += 1
+        ahora = time.monotonic()
+        estado["fichas"] = min(estado["rafaga"], estado["fichas"] + (ahora - estado["ultimo"]) * estado["tasa"])
+        estado["ultimo"] = ahora
+        if estado["fichas"] < 1:
+            trafico["429"] += 1
+            espera = (1 - estado["fichas"]) / estado["tasa"]
+            return 429, {"error": "Too Many Requests"}, {"Retry-After": f"{espera:.3f}"}
+        estado["fichas"] -= 1
+        if estado["aleatorio"].random() < estado["prob_error"]:
+            trafico["503"] += 1
+            return 503, {"error": "Service Unavailable"}, {}
+        estado["en_curso"] += 1
+        trafico["max_en_curso"] = max(trafico["max_en_curso"], estado["en_curso"])
+        latencia = estado["latencia"] + estado["latencia_por_peticion"] * estado["en_curso"]
+
+    try:
+        time.sleep(latencia)
+        datos = estado["respuestas"](ruta, (cuerpo or {}).get('query', {}))
+    finally:
+        with estado["bloqueo"]:
+            estado["en_curso"] -= 1
+    with estado["bloqueo"]:
+        if datos is None:
+            estado["trafico"]["404"] += 1
+            return 404, {"answer": "api.error.general"}, {}
+        estado["trafico"]["200"] += 1
+    return 200, datos, {}
+
+# Crea la clase manejadora HTTP del simulador de Futmondo (todas las llamadas son POST con un payload JSON).
+def crear_manejador_futmondo(estado):
+    class ManejadorFutmondo(BaseHTTPRequestHandler):
+        def do_POST(self):
+            longitud = int(self.headers.get('Content-Length') or 0)
+            try:
+                cuerpo = json.loads(self.rfile.read(longitud)) if longitud else {}
+            except ValueError:
+                cuerpo = None
+            if not isinstance(cuerpo, dict):
+                codigo, datos, cabeceras = 400, {"error": "Payload JSON no válido."}, {}
+            else:
+                codigo, datos, cabeceras = atender_peticion_futmondo(estado, urlsplit(self.path).path, cuerpo)
+            contenido = datos if isinstance(datos, bytes) else json.dumps(datos).encode('utf-8')
+            self.send_response(codigo)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(contenido)))
+            for clave, valor in cabeceras.items():
+                self.send_header(clave, valor)
+            self.end_headers()
+            self.wfile.write(contenido)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ManejadorFutmondo
+
+# Arranca en segundo plano un simulador de Futmondo y devuelve (servidor, estado, URL base para FUTMONDO_API_URL).
+def iniciar_servidor_futmondo(respuestas, host="127.0.0.1", puerto=0, **opciones):
+    estado = crear_estado_futmondo(respuestas, **opciones)
+    servidor = ThreadingHTTPServer((host, puerto), crear_manejador_futmondo(estado))
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, estado, f"http://{host}:{servidor.server_address[1]}"
+
+# Punto de entrada: sirve un simulador hasta que se interrumpe con Ctrl+C.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidores simulados para probar el proceso sin servicios externos.")
+    subparsers = parser.add_subparsers(dest='servicio', required=True)
+    parser_graph = subparsers.add_parser('graph', help="Simula la API de libros de Excel de Microsoft Graph sobre un .xlsx local.")
+    parser_graph.add_argument('excel', help="Archivo .xlsx que hace de libro de OneDrive.")
+    parser_graph.add_argument('--puerto', type=int, default=8765)
+    parser_futmondo = subparsers.add_parser('futmondo', help="Simula la API de Futmondo con límite de ritmo, sirviendo el archivo de respuestas.")
+    parser_futmondo.add_argument('--puerto', type=int, default=8766)
+    parser_futmondo.add_argument('--tasa', type=float, default=20.0, help="Peticiones por segundo admitidas antes de responder 429.")
+    parser_futmondo.add_argument('--rafaga', type=int, default=10, help="Peticiones admitidas de golpe.")
+    parser_futmondo.add_argument('--error', type=float, default=0.0, help="Probabilidad de responder 503.")
+    parser_futmondo.add_argument('--latencia', type=float, default=0.02, help="Latencia base en segundos.")
+    parser_futmondo.add_argument('--latencia-por-peticion', type=float, default=0.01, help="Latencia añadida por cada petición en curso.")
+    args = parser.parse_args(argv)
+
+    if args.servicio == 'graph':
+        servidor, estado, endpoint = iniciar_servidor_graph(args.excel, puerto=args.puerto)
+        print(f"Simulador de Graph en {endpoint} sirviendo '{args.excel}'.")
+        print(f"Usa GRAPH_API_ENDPOINT={endpoint} y GRAPH_ACCESS_TOKEN=simulado.")
+    elif args.servicio == 'futmondo':
+        servidor, estado, endpoint = iniciar_servidor_futmondo(
+            respuestas_desde_archivo(), puerto=args.puerto, tasa=args.tasa, rafaga=args.rafaga, prob_error=args.error,
+            latencia=args.latencia, latencia_por_peticion=args.latencia_por_peticion,
+        )
+        print(f"Simulador de Futmondo en {endpoint} sirviendo el archivo de respuestas ({args.tasa:g} peticiones/s, ráfaga {args.rafaga}).")
+        print(f"Usa FUTMONDO_API_URL={endpoint}.")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
+        print(f"\nTráfico: {estado['trafico']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import json
+import os
+
+import numpy as np
+
+from multas import REGLAS_POR_DEFECTO, analizar_ronda, calcular_indicadores_jornada, construir_reglas
+from sanciones import intervalos_sancion
+
+# Orden de las multas fijas por jornada en la matriz de indicadores.
+COLUMNAS_MULTAS = [
+    ("jugadores_repetidos", "multa_jugador_repetido"),
+    ("capitan_repetido_con_rival", "multa_capitan_repetido"),
+    ("tenias_capitan_rival", "multa_capitan_rival"),
+    ("alinear_peor_jugador", "multa_peor_jugador"),
+    ("elegir_peor_capitan", "multa_peor_capitan"),
+]
+
+# Extrae de las rondas en caché los indicadores de multas y el historial de capitanías de una división. Capitanías y presencias
+# se guardan como posiciones en el calendario (no como números de jornada), igual que las cuenta el motor de sanciones.
+def preparar_datos_temporada(rondas, name_map):
+    indice_equipo = {}
+    equipo_obs, indicadores_obs, posicion_obs = [], [], []
+    capitanias = defaultdict(lambda: defaultdict(list))
+    presencias = defaultdict(lambda: defaultdict(list))
+
+    for posicion, round_number in enumerate(sorted(rondas)):
+        ronda = rondas[round_number]
+        analisis = analizar_ronda(ronda['datos'], ronda['alineaciones'], name_map)
+        if analisis:
+            indicadores = calcular_indicadores_jornada(**analisis['entradas_multas'])
+            for team_name, ind in indicadores.items():
+                equipo_obs.append(indice_equipo.setdefault(team_name, len(indice_equipo)))
+                indicadores_obs.append([float(ind[clave]) for clave, _ in COLUMNAS_MULTAS])
+                posicion_obs.append(ind['posicion_peor_equipo'])
+
+        for team_info in ronda['datos'].get('answer', {}).get('ranking', []):
+            team_name = name_map.get(team_info['name'], team_info['name'])
+            indice_equipo.setdefault(team_name, len(indice_equipo))
+            lineup_players = ronda['alineaciones'].get(team_info['_id'], [])
+            capitan = next((p['name'] for p in lineup_players if p.get('cpt')), "N/A")
+            if capitan != "N/A":
+                capitanias[team_name][capitan].append(posicion)
+            for p in lineup_players:
+                presencias[team_name][p['name']].append(posicion)
+
+    equipos = sorted(indice_equipo, key=indice_equipo.get)
+    eventos = []
+    for team_name in equipos:
+        eventos.append({
+            "jugadores": [
+                (np.array(posiciones_cap, dtype=float), np.array(presencias[team_name][jugador], dtype=float))
+                for jugador, posiciones_cap in capitanias[team_name].items()
+            ],
+        })
+    return {
+        "equipos": equipos,
+        "equipo_obs": np.array(equipo_obs, dtype=np.intp),
+        "indicadores": np.array(indicadores_obs, dtype=float).reshape(-1, len(COLUMNAS_MULTAS)),
+        "posicion": np.array(posicion_obs, dtype=np.intp),
+        "eventos": eventos,
+    }
+
+# Evalúa las multas por jornada de todas las variantes a la vez: (observaciones x indicadores) · (indicadores x variantes).
+def _evaluar_multas(datos, variantes):
+    pesos = np.array([[reglas[regla] for _, regla in COLUMNAS_MULTAS] for reglas in variantes], dtype=float)
+    multas = datos["indicadores"] @ pesos.T
+
+    max_posicion = max((max(reglas["multas_peores_equipos"], default=0) for reglas in variantes), default=0)
+    tabla = np.zeros((len(variantes), max_posicion + 1))
+    for j, reglas in enumerate(variantes):
+        for pos, multa in reglas["multas_peores_equipos"].items():
+            tabla[j, pos] = multa
+    posicion = np.where(datos["posicion"] <= max_posicion, datos["posicion"], 0)
+    multas += tabla[:, posicion].T
+
+    # Igual que en el cálculo real, el total de cada equipo y jornada se redondea a céntimos.
+    multas = np.round(multas, 2)
+    totales = np.zeros((len(datos["equipos"]), len(variantes)))
+    np.add.at(totales, datos["equipo_obs"], multas)
+    return totales
+
+# Reproduce la regla de sanciones por capitanías para todas las variantes a la vez, jugador a jugador. Los intervalos de cada
+# sanción salen de sanciones.intervalos_sancion sobre posiciones del calendario, como en el motor real.
+def _evaluar_sanciones(datos, variantes):
+    umbral = np.array([reglas["capitanias_para_sancion"] for reglas in variantes], dtype=float)
+    partidos = np.array([reglas["partidos_sancion"] for reglas in variantes], dtype=float)
+    restriccion = np.array([reglas["jornadas_sin_capitania"] for reglas in variantes], dtype=float)
+    forma = (len(datos["equipos"]), len(variantes))
+    sanciones, indebidas, capitanias_restringidas = np.zeros(forma), np.zeros(forma), np.zeros(forma)
+
+    for team_idx, eventos in enumerate(datos["eventos"]):
+        for posiciones_cap, presencia in eventos["jugadores"]:
+            ultima_sancion = np.full(len(variantes), -np.inf)
+            for n_capitania, posicion in enumerate(posiciones_cap, start=1):
+                # Solo se sanciona si no hay otra sanción de partidos aún activa para el jugador.
+                dispara = (n_capitania % umbral == 0) & (posicion - ultima_sancion >= partidos)
+                if not dispara.any():
+                    continue
+                ultima_sancion = np.where(dispara, posicion, ultima_sancion)
+                sanciones[team_idx] += dispara
+                fin_partidos, fin_capitania = intervalos_sancion(posicion, partidos, restriccion)
+
+                # Alineaciones indebidas: presencias en [t+1, t+G]; capitanías en restricción: en [t+G+1, t+G+C].
+                n_indebidas = np.searchsorted(presencia, fin_partidos, side='right') - np.searchsorted(presencia, posicion, side='right')
+                indebidas[team_idx] += np.where(dispara, n_indebidas, 0)
+                n_restringidas = np.searchsorted(posiciones_cap, fin_capitania, side='right') - np.searchsorted(posiciones_cap, fin_partidos, side='right')
+                capitanias_restringidas[team_idx] += np.where(dispara, n_restringidas, 0)
+    return sanciones, indebidas, capitanias_restringidas
+
+# Evalúa un bloque de variantes sobre los datos de todas las divisiones (se ejecuta en un proceso del pool).
+def _evaluar_bloque(argumentos):
+    datos_divisiones, variantes = argumentos
+    multa_indebida = np.array([reglas["multa_alineacion_indebida"] for reglas in variantes], dtype=float)
+    resultados = [{"reglas": reglas, "divisiones": {}} for reglas in variantes]
+    for division, datos in datos_divisiones.items():
+        multas = _evaluar_multas(datos, variantes)
+        sanciones, indebidas, capitanias_restringidas = _evaluar_sanciones(datos, variantes)
+        multas = multas + indebidas * multa_indebida
+        for j, resultado in enumerate(resultados):
+            resultado["divisiones"][division] = {
+                "multas": {equipo: round(float(multas[i, j]), 2) for i, equipo in enumerate(datos["equipos"])},
+                "sanciones": {equipo: int(sanciones[i, j]) for i, equipo in enumerate(datos["equipos"]) if sanciones[i, j]},
+                "alineaciones_indebidas": {equipo: int(indebidas[i, j]) for i, equipo in enumerate(datos["equipos"]) if indebidas[i, j]},
+                "capitanias_en_restriccion": {equipo: int(capitanias_restringidas[i, j]) for i, equipo in enumerate(datos["equipos"]) if capitanias_restringidas[i, j]},
+            }
+    return resultados
+
+# Genera las variantes del producto cartesiano de una rejilla {regla: [valores]} sobre las reglas por defecto.
+def generar_variantes_rejilla(rejilla):
+    claves = list(rejilla)
+    return [construir_reglas(dict(zip(claves, valores))) for valores in itertools.product(*(rejilla[c] for c in claves))]
+
+# Carga variantes de reglas (parciales) desde un archivo JSON con una lista de objetos.
+def cargar_variantes(ruta_archivo):
+    with open(ruta_archivo, 'r', encoding='utf-8') as f:
+        return [construir_reglas(parciales) for parciales in json.load(f)]
+
+# Simula todas las variantes de reglas, repartidas en bloques entre varios procesos.
+def simular_variantes(datos_divisiones, variantes, procesos=None):
+    procesos = max(1, min(procesos or os.cpu_count() or 1, len(variantes)))
+    tamano_bloque = -(-len(variantes) // procesos)
+    bloques = [variantes[i:i + tamano_bloque] for i in range(0, len(variantes), tamano_bloque)]
+    if len(bloques) == 1:
+        return _evaluar_bloque((datos_divisiones, bloques[0]))
+    with ProcessPoolExecutor(max_workers=len(bloques)) as pool:
+        return [resultado for bloque in pool.map(_evaluar_bloque, [(datos_divisiones, b) for b in bloques]) for resultado in bloque]
+
+# Muestra un resumen por variante: multa total de cada división y equipo más multado.
+def imprimir_resumen_simulacion(resultados):
+    print(f"\n--- SIMULACIÓN DE {len(resultados)} VARIANTES DE REGLAS ---")
+    for n, resultado in enumerate(resultados, start=1):
+        cambios = {k: v for k, v in resultado["reglas"].items() if v != REGLAS_POR_DEFECTO[k]}
+        partes = []
+        for division, datos in resultado["divisiones"].items():
+            if not datos["multas"]:
+                continue
+            equipo_max = max(datos["multas"], key=datos["multas"].get)
+            partes.append(f"{division}: {sum(datos['multas'].values()):.2f}€, {sum(datos['sanciones'].values())} sanciones, máx. {equipo_max} ({datos['multas'][equipo_max]:.2f}€)")
+        print(f"{n:>4}. {cambios or 'reglas actuales'} -> " + " | ".join(partes))
@@ -0,0 +1,35 @@
+from itertools import combinations
+
+from alineaciones_bits import coincidencias_ronda, coincidencias_temporada, contiene, indice_jugadores, mascara_alineacion, mascara_nombres
+from liga_sintetica import crear_liga, rondas_liga
+
+def test_mascaras_y_pertenencia():
+    indice = indice_jugadores()
+    mascara = mascara_alineacion(indice, [{"name": "Pedri"}, {"name": "Vini"}, {"name": "Pedri"}])
+    assert indice == {"Pedri": 0, "Vini": 1} and mascara == 0b11
+    # El mismo jugador conserva su bit en otra alineación; los nuevos toman los siguientes.
+    assert mascara_nombres(indice, ["Koke", "Vini"]) == 0b110
+    assert contiene(indice, mascara, "Vini") and not contiene(indice, mascara, "Koke")
+    assert not contiene(indice, mascara, "Desconocido") and "Desconocido" not in indice
+
+def test_coincidencias_iguales_que_con_conjuntos():
+    liga = crear_liga("T", equipos=8, jornadas=4, semilla=5)
+    indice = indice_jugadores()
+    por_ronda, esperado = [], {}
+    for _, ronda in sorted(rondas_liga(liga).items()):
+        nombres = {equipo: {p["name"] for p in alineacion} for equipo, alineacion in ronda["alineaciones"].items()}
+        coincidencias = coincidencias_ronda({equipo: mascara_nombres(indice, jugadores) for equipo, jugadores in nombres.items()})
+        por_ronda.append(coincidencias)
+
+        equipos = coincidencias["equipos"]
+        for (i, a), (j, b) in combinations(enumerate(equipos), 2):
+            compartidos = len(nombres[a] & nombres[b])
+            assert coincidencias["matriz"][i][j] == coincidencias["matriz"][j][i] == compartidos
+            if compartidos:
+                par = esperado.setdefault((a, b), [0, 0])
+                par[0] += compartidos
+                par[1] += 1
+        assert all(coincidencias["matriz"][i][i] == 0 for i in range(len(equipos)))
+
+    assert esperado
+    assert coincidencias_temporada(por_ronda) == esperado
@@ -0,0 +1,45 @@
+import gzip
+import http.client
+
+from api_local import acepta_gzip, iniciar_api_local
+
+def test_acepta_gzip_respeta_los_valores_q():
+    assert acepta_gzip("gzip, deflate, br")
+    assert acepta_gzip("deflate;q=1, GZIP;q=0.5")
+    assert not acepta_gzip("gzip;q=0")
+    assert not acepta_gzip("gzip; q=0.000, identity")
+    assert not acepta_gzip("identity, br")
+    assert not acepta_gzip(None)
+    assert acepta_gzip("*")
+    assert not acepta_gzip("*;q=0")
+    assert not acepta_gzip("gzip;q=0, *")
+
+def _pedir(puerto, cabeceras):
+    conexion = http.client.HTTPConnection("127.0.0.1", puerto)
+    conexion.request("GET", "/api/d1/clasificacion", headers=cabeceras)
+    respuesta = conexion.getresponse()
+    cuerpo = respuesta.read()
+    conexion.close()
+    return respuesta, cuerpo
+
+def test_cada_codificacion_tiene_su_etag():
+    clasificacion = [{"name": f"Equipo {n}", "points": n, "general_points": 100 + n, "comentario": ""} for n in range(100)]
+    estado = {"d1": {"clasificacion": clasificacion, "totales": {}, "jornadas": [], "sanciones": {}, "violaciones": {}, "capitanes": {}, "ultima_ronda": 1}}
+    servidor, contenedor, _ = iniciar_api_local(lambda: estado, lambda: None)
+    puerto = servidor.server_address[1]
+    try:
+        plana, cuerpo_plano = _pedir(puerto, {"Accept-Encoding": "gzip;q=0"})
+        comprimida, cuerpo_comprimido = _pedir(puerto, {"Accept-Encoding": "gzip"})
+        assert plana.getheader("Content-Encoding") is None
+        assert comprimida.getheader("Content-Encoding") == "gzip"
+        assert gzip.decompress(cuerpo_comprimido) == cuerpo_plano
+        assert plana.getheader("ETag") != comprimida.getheader("ETag")
+
+        # Un ETag solo valida la representación a la que pertenece.
+        assert _pedir(puerto, {"Accept-Encoding": "gzip", "If-None-Match": comprimida.getheader("ETag")})[0].status == 304
+        assert _pedir(puerto, {"If-None-Match": comprimida.getheader("ETag")})[0].status == 200
+        assert _pedir(puerto, {"Accept-Encoding": "gzip", "If-None-Match": plana.getheader("ETag")})[0].status == 200
+        assert _pedir(puerto, {"If-None-Match": plana.getheader("ETag")})[0].status == 304
+    finally:
+        contenedor["parar"].set()
+        servidor.shutdown()
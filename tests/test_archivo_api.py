@@ -0,0 +1,20 @@
+import archivo_api
+
+def _archivo_vacio(monkeypatch, tmp_path):
+    monkeypatch.setattr(archivo_api, "ARCHIVO_API_DIR", str(tmp_path))
+    monkeypatch.setattr(archivo_api, "_indice", None)
+    monkeypatch.setattr(archivo_api, "_contadores", {"nuevas": 0, "duplicadas": 0})
+
+def test_misma_huella_entera_o_por_trozos(monkeypatch, tmp_path):
+    _archivo_vacio(monkeypatch, tmp_path)
+    cuerpo = '{"answer": {"ranking": [{"name": "Equipo ñ", "points": 12}]}}'.encode('utf-8')
+
+    huella_entera = archivo_api.archivar_respuesta("https://api/ronda", {"query": {"a": 1}}, cuerpo)
+    enviar, terminar = archivo_api.archivador_respuesta("https://api/ronda", {"query": {"a": 2}})
+    for i in range(0, len(cuerpo), 7):
+        enviar(cuerpo[i:i + 7])
+    huella_trozos = terminar()
+
+    assert huella_entera == huella_trozos
+    assert archivo_api._contadores == {"nuevas": 1, "duplicadas": 1}
+    assert archivo_api.leer_respuesta_archivada("https://api/ronda", {"query": {"a": 2}}) == {"answer": {"ranking": [{"name": "Equipo ñ", "points": 12}]}}
@@ -0,0 +1,42 @@
+import numpy as np
+
+from archivo_temporadas import SIN_CAPITAN, abrir_instantanea, guardar_instantanea, rachas_capitania
+
+# Arrays mínimos de una instantánea: capitanes por nombre de jugador (None si el equipo no tiene capitán esa jornada).
+def _instantanea(rondas, capitanes_por_equipo):
+    jugadores = sorted({j for fila in capitanes_por_equipo.values() for j in fila if j} | {"Suplente"})
+    capitanes = [[SIN_CAPITAN if j is None else jugadores.index(j) for j in fila] for fila in capitanes_por_equipo.values()]
+    return {
+        "equipos": np.array(list(capitanes_por_equipo), dtype=str),
+        "jugadores": np.array(jugadores, dtype=str),
+        "rondas": np.array(rondas, dtype=np.float32),
+        "capitanes": np.array(capitanes, dtype=np.int32),
+        "multas": np.zeros((len(capitanes_por_equipo), len(rondas)), dtype=np.float32),
+    }
+
+def test_una_racha_continua_en_la_temporada_siguiente():
+    instantaneas = [
+        ("24-25", "primera", _instantanea([1, 2, 2.5, 3], {"Alfa": ["Pedri", "Vini", "Vini", "Vini"], "Beta": ["Vini", "Vini", "Vini", None]})),
+        ("25-26", "primera", _instantanea([1, 2, 3], {"Alfa": ["Vini", "Vini", "Pedri"], "Beta": ["Vini", "Vini", "Vini"]})),
+    ]
+    rachas = rachas_capitania(instantaneas)
+
+    assert rachas[0] == {"equipo": "Alfa", "jugador": "Vini", "jornadas": 5, "desde": ("24-25", 2), "hasta": ("25-26", 2)}
+    # La de Beta se corta en la última jornada sin capitán: son dos rachas de tres.
+    assert {"equipo": "Beta", "jugador": "Vini", "jornadas": 3, "desde": ("24-25", 1), "hasta": ("24-25", 2.5)} in rachas
+    assert {"equipo": "Beta", "jugador": "Vini", "jornadas": 3, "desde": ("25-26", 1), "hasta": ("25-26", 3)} in rachas
+    assert sum(r["jornadas"] for r in rachas if r["equipo"] == "Alfa") == 7
+    assert rachas_capitania(instantaneas, n=1) == rachas[:1]
+
+def test_instantanea_guardada_se_abre_mapeada(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    arrays = _instantanea([1, 2], {"Alfa": ["Pedri", None]})
+    ruta = str(tmp_path / "temporadas" / "25-26" / "primera.npz")
+    guardar_instantanea(arrays, ruta)
+    monkeypatch.setattr("archivo_temporadas.ARCHIVO_TEMPORADAS_DIR", str(tmp_path / "temporadas"))
+
+    abiertos = abrir_instantanea(ruta)
+    assert set(abiertos) == set(arrays)
+    assert isinstance(abiertos["capitanes"], np.memmap)
+    for nombre, valores in arrays.items():
+        np.testing.assert_array_equal(abiertos[nombre], valores)
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+import campos_api
+from campos_api import CAMPOS_ALINEACION, CAMPOS_RONDA, decodificador_proyectado, decodificar_proyectado
+from clasificacion import puntos_ronda
+
+RONDA = {
+    "answer": {
+        "ranking": [
+            {"_id": "t1", "name": "Alfa", "points": 71.5, "avatar": {"url": "a.png", "name": "no"}, "extra": [1, {"points": 3}]},
+            {"_id": "t2", "name": "Beta", "points": 64, "userid": "u2"},
+        ],
+        "matches": [{"p": [1, 2], "m": [71.5, 64], "data": {"partial": [70, 64], "goles": [2, 1]}, "fecha": "2025-09-01"}],
+        "round": {"number": 3, "name": "Jornada 3"},
+    },
+    "header": {"token": "x"},
+}
+ALINEACION = {"answer": {"players": [{"name": "Pedri", "points": 8, "cpt": True, "role": 2, "stats": {"name": "no"}}], "formation": "4-3-3"}}
+
+# Proyección de referencia: el JSON completo decodificado y filtrado después, a cualquier profundidad.
+def _filtrar(valor, campos):
+    if isinstance(valor, dict):
+        return {k: _filtrar(v, campos) for k, v in valor.items() if k in campos}
+    if isinstance(valor, list):
+        return [_filtrar(v, campos) for v in valor]
+    return valor
+
+@pytest.fixture(params=["object_hook", "ijson"])
+def decodificador(request, monkeypatch):
+    if request.param == "ijson":
+        pytest.importorskip("ijson")
+    else:
+        monkeypatch.setattr(campos_api, "ijson", None)
+    return request.param
+
+@pytest.mark.parametrize("respuesta, campos", [(RONDA, CAMPOS_RONDA), (ALINEACION, CAMPOS_ALINEACION)])
+def test_proyeccion_igual_que_decodificar_y_filtrar(decodificador, respuesta, campos):
+    contenido = json.dumps(respuesta).encode('utf-8')
+    esperado = _filtrar(json.loads(contenido), campos)
+    assert decodificar_proyectado(contenido, campos) == esperado
+
+    # Por trozos de 7 bytes, como llega el cuerpo con iter_content.
+    enviar, terminar = decodificador_proyectado(campos)
+    for inicio in range(0, len(contenido), 7):
+        enviar(contenido[inicio:inicio + 7])
+    assert terminar() == esperado
+
+def test_la_proyeccion_conserva_lo_que_usa_el_proceso(decodificador):
+    proyectada = decodificar_proyectado(json.dumps(RONDA).encode('utf-8'), CAMPOS_RONDA)
+    assert "avatar" not in proyectada["answer"]["ranking"][0] and "round" not in proyectada["answer"]
+    assert puntos_ronda({"datos": proyectada}, {}) == puntos_ronda({"datos": RONDA}, {}) == {"Alfa": [3, 70.0], "Beta": [0, 64.0]}
+
+def test_json_invalido(decodificador):
+    with pytest.raises(ValueError):
+        decodificar_proyectado(b'{"answer": [1, 2', CAMPOS_RONDA)
@@ -0,0 +1,39 @@
+from clasificacion import ajustes_por_equipo, clasificacion_en_jornada, orden_api, procesar_y_ordenar_clasificacion
+
+REGISTRO = {"version": 3, "ajustes": [
+    {"equipo": "Alfa", "puntos": -3, "motivo": "Sanción", "division": "primera", "desde_jornada": 4},
+    {"equipo": "Alfa", "puntos": 1, "motivo": "Compensación", "division": "primera"},
+    {"equipo": "Beta", "puntos": -2, "motivo": "Otra división", "division": "segunda"},
+    {"equipo": "Beta", "puntos": 5, "motivo": "Todas las divisiones"},
+]}
+
+def test_ajustes_vigentes_desde_su_jornada():
+    assert ajustes_por_equipo(REGISTRO, "primera", 3)["Alfa"] == {"puntos": 1, "comentario": "Compensación"}
+    assert ajustes_por_equipo(REGISTRO, "primera", 4)["Alfa"] == {"puntos": -2, "comentario": "Sanción; Compensación"}
+    # Sin jornada se aplican todos, como en la clasificación actual.
+    assert ajustes_por_equipo(REGISTRO, "primera")["Alfa"]["puntos"] == -2
+
+def test_ajustes_por_division():
+    assert ajustes_por_equipo(REGISTRO, "primera")["Beta"] == {"puntos": 5, "comentario": "Todas las divisiones"}
+    assert ajustes_por_equipo(REGISTRO, "segunda")["Beta"] == {"puntos": 3, "comentario": "Otra división; Todas las divisiones"}
+    assert "Alfa" not in ajustes_por_equipo(REGISTRO, "segunda")
+
+def test_clasificacion_en_jornada_igual_que_la_de_la_api():
+    # Zeta, Omega y Mu empatan a todo; la API los devuelve al revés que el orden alfabético.
+    acumulado = {"Zeta": [9, 300.0], "Omega": [9, 300.0], "Beta": [12, 280.0], "Mu": [9, 300.0], "Rho": [9, 310.0]}
+    historico = {"jornadas": [
+        {"ronda": 1, "huella": "h1", "acumulado": {nombre: [0, 0.0] for nombre in acumulado}},
+        {"ronda": 5, "huella": "h5", "acumulado": acumulado},
+    ]}
+    orden = ["Beta", "Rho", "Zeta", "omega", "Mu"]
+    datos_general = {"answer": {"ranking": [{"name": nombre, "points": acumulado.get(nombre, acumulado["Omega"])[0]} for nombre in orden]}}
+    datos_teams = {"answer": {"teams": [{"teamname": nombre, "points": acumulado.get(nombre, acumulado["Omega"])[1]} for nombre in orden]}}
+    name_map = {"omega": "Omega"}
+    ajustes = ajustes_por_equipo(REGISTRO, "primera", 6)
+
+    actual = procesar_y_ordenar_clasificacion(datos_general, datos_teams, name_map, ajustes=ajustes)
+    en_jornada = clasificacion_en_jornada(historico, 6, ajustes, orden_api(datos_general, name_map))
+    assert en_jornada == actual
+    assert [equipo["name"] for equipo in en_jornada] == ["Beta", "Rho", "Zeta", "Omega", "Mu"]
+    assert en_jornada[0] == {"name": "Beta", "points": 17, "general_points": 280.0, "comentario": "Todas las divisiones"}
+    assert clasificacion_en_jornada(historico, 0, ajustes) == []
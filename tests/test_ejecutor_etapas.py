@@ -0,0 +1,30 @@
+from ejecutor_etapas import CORRECTA, FALLIDA, OMITIDA, crear_etapa, ejecutar_grafo
+
+def _fallar():
+    raise RuntimeError("fallo")
+
+def test_entrada_opcional_fallida_no_omite_la_etapa():
+    recibidas = []
+    etapas = [
+        crear_etapa("proyeccion", _fallar, salidas=["proyeccion"]),
+        crear_etapa("informe", lambda disponibles: recibidas.append(disponibles), salidas=["informe"], opcionales=["proyeccion"]),
+        crear_etapa("publicar", lambda: None, ["informe"]),
+    ]
+    resultados = ejecutar_grafo(etapas)
+    assert resultados["proyeccion"]["estado"] == FALLIDA
+    assert resultados["informe"]["estado"] == CORRECTA
+    assert resultados["publicar"]["estado"] == CORRECTA
+    assert recibidas == [()]
+
+def test_entrada_opcional_correcta_se_espera_y_se_recibe():
+    orden = []
+    etapas = [
+        crear_etapa("proyeccion", lambda: orden.append("proyeccion"), salidas=["proyeccion"]),
+        crear_etapa("informe", lambda disponibles: orden.append(disponibles), opcionales=["proyeccion"]),
+    ]
+    ejecutar_grafo(etapas)
+    assert orden == ["proyeccion", ("proyeccion",)]
+
+def test_entrada_obligatoria_fallida_omite_la_etapa():
+    etapas = [crear_etapa("excel", _fallar, salidas=["excel"]), crear_etapa("subir", lambda: None, ["excel"])]
+    assert ejecutar_grafo(etapas)["subir"]["estado"] == OMITIDA
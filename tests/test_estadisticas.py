@@ -0,0 +1,54 @@
+import copy
+
+import pytest
+
+from estadisticas import actualizar_estadisticas, aportaciones_vacias, estadisticas_vacias, retirar_rondas
+from liga_sintetica import crear_liga, rondas_liga
+from multas import iterar_multas_jornadas
+
+@pytest.fixture(autouse=True)
+def _en_directorio_temporal(tmp_path, monkeypatch):
+    # iterar_multas_jornadas guarda el resultado de cada jornada en resultados/ del directorio de trabajo.
+    monkeypatch.chdir(tmp_path)
+
+def _preparar():
+    liga = crear_liga("E", equipos=8, jornadas=6, aplazadas=1, semilla=3)
+    rondas = rondas_liga(liga)
+    name_map = {equipo["name"]: equipo["name"] for equipo in liga["equipos"]}
+    multas = {str(j["numero"]): j["multas"] for j in iterar_multas_jornadas(sorted(rondas.items()), name_map, "prueba")}
+    return rondas, name_map, multas
+
+def _desde_cero(rondas, name_map, multas):
+    estadisticas, aportaciones = estadisticas_vacias(), aportaciones_vacias()
+    actualizar_estadisticas(estadisticas, aportaciones, sorted(rondas.items()), name_map, multas)
+    return estadisticas, aportaciones
+
+def test_los_totales_no_guardan_las_aportaciones_por_jornada():
+    estadisticas, aportaciones = _desde_cero(*_preparar())
+    assert set(estadisticas) == {"jornadas", "jugadores", "equipos"}
+    assert estadisticas["jornadas"] == len(aportaciones) == 7
+
+def test_retirar_una_jornada_deshace_su_aportacion():
+    rondas, name_map, multas = _preparar()
+    estadisticas, aportaciones = _desde_cero(rondas, name_map, multas)
+    ultimas = sorted(rondas)[-2:]
+    restantes = {n: r for n, r in rondas.items() if n not in ultimas}
+
+    assert retirar_rondas(estadisticas, aportaciones, [str(n) for n in restantes]) == sorted(str(n) for n in ultimas)
+    assert (estadisticas, aportaciones) == _desde_cero(restantes, name_map, multas)
+
+def test_sustituir_una_jornada_equivale_a_recalcular():
+    rondas, name_map, multas = _preparar()
+    estadisticas, aportaciones = _desde_cero(rondas, name_map, multas)
+
+    cambiadas = copy.deepcopy(rondas)
+    numero = sorted(cambiadas)[2]
+    for alineacion in cambiadas[numero]["alineaciones"].values():
+        for jugador in alineacion:
+            jugador["points"] += 3
+    alineacion = next(iter(cambiadas[numero]["alineaciones"].values()))
+    alineacion.pop()
+    incorporadas = actualizar_estadisticas(estadisticas, aportaciones, sorted(cambiadas.items()), name_map, multas)
+
+    assert incorporadas == [numero]
+    assert (estadisticas, aportaciones) == _desde_cero(cambiadas, name_map, multas)
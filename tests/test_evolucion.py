@@ -0,0 +1,18 @@
+from clasificacion import orden_api, procesar_y_ordenar_clasificacion
+from evolucion import anadir_columna, calcular_evolucion, matriz_vacia
+
+def test_empates_completos_se_resuelven_como_la_clasificacion():
+    # Tres equipos empatados a puntos de liga y generales; la matriz los conoce en otro orden que la API.
+    matriz = matriz_vacia()
+    anadir_columna(matriz, 1, "h1", {"Zeta": (3, 50.0), "Alfa": (3, 50.0), "Mu": (0, 40.0)})
+    anadir_columna(matriz, 2, "h2", {"Zeta": (0, 40.0), "Alfa": (0, 40.0), "Mu": (3, 50.0)})
+    datos_general = {"answer": {"ranking": [{"name": "mu", "points": 3}, {"name": "Alfa", "points": 3}, {"name": "Zeta", "points": 3}]}}
+    datos_teams = {"answer": {"teams": [{"teamname": nombre, "points": 90.0} for nombre in ("mu", "Alfa", "Zeta")]}}
+    name_map = {"mu": "Mu"}
+
+    clasificacion = procesar_y_ordenar_clasificacion(datos_general, datos_teams, name_map, ajustes={})
+    evolucion = calcular_evolucion(matriz, orden=orden_api(datos_general, name_map))
+
+    posiciones_finales = {nombre: int(fila[-1]) for nombre, fila in zip(matriz["equipos"], evolucion["posiciones"])}
+    assert [equipo["name"] for equipo in clasificacion] == ["Mu", "Alfa", "Zeta"]
+    assert sorted(posiciones_finales, key=posiciones_finales.get) == ["Mu", "Alfa", "Zeta"]
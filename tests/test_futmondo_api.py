@@ -0,0 +1,25 @@
+from futmondo_api import MARGEN_RONDAS_APLAZADAS, clasificar_ronda, huella_respuesta, planificar_descarga_rondas
+
+def test_ronda_entera_se_cierra_con_la_siguiente():
+    assert clasificar_ronda(5, 5) == 'abierta'
+    assert clasificar_ronda(5, 6) == 'cerrada'
+
+def test_ronda_aplazada_espera_el_margen():
+    # La 5.5 se juega tras la 5; sigue abierta hasta que existan MARGEN_RONDAS_APLAZADAS jornadas enteras posteriores.
+    for ultima in range(5, 5 + MARGEN_RONDAS_APLAZADAS):
+        assert clasificar_ronda(5.5, ultima) == 'abierta'
+    assert clasificar_ronda(5.5, 5 + MARGEN_RONDAS_APLAZADAS) == 'cerrada'
+
+def test_huella_estable_y_sensible_a_cambios():
+    assert huella_respuesta({"a": 1, "b": [1, 2]}) == huella_respuesta({"b": [1, 2], "a": 1})
+    assert huella_respuesta({"a": 1, "b": [1, 2]}) != huella_respuesta({"a": 1, "b": [2, 1]})
+
+def test_planificacion_de_descargas():
+    rounds_map = {1: "r1", 2: "r2", 3: "r3", 3.5: "r3b", 4: "r4"}
+    ids_previos = {1: "r1", 2: "r2-antiguo", 3: "r3", 3.5: "r3b"}
+    estados = {1: 'cerrada', 2: 'cerrada', 3: 'cerrada', 3.5: 'abierta'}
+    en_cache = {1, 2, 3.5}
+
+    # 1 cerrada y en caché se omite; 2 cambió de id; 3 no está en caché; 3.5 sigue abierta; 4 es nueva.
+    assert planificar_descarga_rondas(rounds_map, ids_previos, estados, en_cache) == [2, 3, 3.5, 4]
+    assert planificar_descarga_rondas(rounds_map, rounds_map, dict.fromkeys(rounds_map, 'cerrada'), set(rounds_map)) == []
@@ -0,0 +1,36 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PESADOS = ("requests", "openpyxl", "msal", "pyperclip", "smtplib", "numpy")
+
+# Módulos pesados que quedan cargados tras importar los indicados en un intérprete nuevo.
+def _pesados_cargados(*modulos):
+    codigo = f"import sys, json\nfor m in {modulos!r}: __import__(m)\nprint(json.dumps([m for m in {PESADOS!r} if m in sys.modules]))"
+    salida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True, check=True)
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+def test_el_punto_de_entrada_no_carga_dependencias_pesadas():
+    assert _pesados_cargados("fuentmondo") == []
+    # La comprobación detecta una importación pesada: OneDrive sí necesita msal y requests.
+    assert {"msal", "requests"} <= set(_pesados_cargados("onedrive"))
+
+@pytest.mark.parametrize("modulos, permitidos", [
+    # Solo email: el correo usa smtplib, pero nada de HTTP, Excel ni autenticación.
+    (("fuentmondo", "correo"), {"smtplib"}),
+    # Solo informe HTML: sin openpyxl ni msal.
+    (("fuentmondo", "informe_html"), set()),
+])
+def test_cada_modo_carga_solo_lo_que_usa(modulos, permitidos):
+    assert set(_pesados_cargados(*modulos)) <= permitidos
+
+def test_las_etapas_viven_en_sus_modulos():
+    import etapas
+    import fuentmondo
+
+    assert fuentmondo.etapa_email is etapas.etapa_email
+    assert fuentmondo.etapa_informe is etapas.etapa_informe
@@ -0,0 +1,45 @@
+import json
+import os
+
+import informe_html
+
+def _datos(multa):
+    datos = {
+        "jornadas": [{"numero": 1, "multas": {"Equipo A": {"multa_total": multa, "desglose": {}}}}],
+        "totales": {"Equipo A": multa},
+        "clasificacion": [{"name": "Equipo A", "points": 3, "general_points": 50.0, "comentario": ""}],
+        "capitanes": {1: [{"team_name": "Equipo A", "capitan": 'Jugador "1" </script>'}]},
+        "sanciones": {},
+        "violaciones_historico": {},
+    }
+    return {"primera": datos, "segunda": datos}
+
+def test_secciones_se_escriben_como_json(tmp_path):
+    rutas = informe_html.generar_pagina_html_completa(_datos(1.0), str(tmp_path / "index.html"), 1)
+    ruta_secciones = str(tmp_path / "datos" / "primera.secciones.json")
+    assert ruta_secciones in rutas and ruta_secciones + ".gz" in rutas
+    with open(ruta_secciones, 'rb') as f:
+        contenido = f.read()
+    html = json.loads(contenido)["html"]
+    assert contenido == json.dumps({"html": html}, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    assert 'id="primera-clasificacion"' in html and 'Jugador "1"' in html
+
+def test_un_error_no_deja_secciones_a_medias(tmp_path, monkeypatch):
+    salida = str(tmp_path / "index.html")
+    informe_html.generar_pagina_html_completa(_datos(1.0), salida, 1)
+    antes = {nombre: (tmp_path / "datos" / nombre).read_bytes() for nombre in os.listdir(tmp_path / "datos")}
+
+    def fallar(*args):
+        raise OSError("disco lleno")
+
+    escribir_scripts = informe_html._escribir_scripts_informe
+    monkeypatch.setattr(informe_html, "_escribir_scripts_informe", fallar)
+    assert informe_html.generar_pagina_html_completa(_datos(7.5), salida, 1) == []
+    assert {nombre: (tmp_path / "datos" / nombre).read_bytes() for nombre in os.listdir(tmp_path / "datos")} == antes
+
+    # Falla index.html (después de llevar las secciones a su sitio): no quedan temporales sueltos.
+    monkeypatch.setattr(informe_html, "_escribir_scripts_informe", escribir_scripts)
+    monkeypatch.setattr(informe_html, "escribir_atomico", fallar)
+    assert informe_html.generar_pagina_html_completa(_datos(7.5), salida, 1) == []
+    assert not [nombre for nombre in os.listdir(tmp_path / "datos") if nombre.endswith(".tmp")]
+
@@ -0,0 +1,34 @@
+import openpyxl
+
+from libro_analitico import CABECERA_CAPITANES, CABECERA_INDEBIDAS, CABECERA_MULTAS, CABECERA_SANCIONES, generar_libro_analitico
+
+DATOS = {
+    "primera": {
+        "jornadas": [{"numero": 1, "multas": {
+            "Beta": {"multa_total": 1.5, "desglose": {"jugadores_repetidos": {"cantidad": 3, "multa": 1.5}}},
+            "Alfa": {"multa_total": 2.0, "desglose": {"peor_equipo_jornada": {"posicion": 1, "multa": 1.0}, "alineacion_indebida": {"multa": 1.0}}},
+        }}],
+        "capitanes": {2: [{"team_name": "Alfa", "capitan": "Pedri"}], 1: [{"team_name": "Alfa", "capitan": "Vini"}]},
+        "sanciones": {"Alfa": {"Vini": [{"jornada_triggered": 4, "games_to_serve": 1, "games_served": 1, "status": "completed", "jornada_completed": 5}]}},
+        "violaciones": {"Alfa": [{"jornada": 6, "jugador": "Vini", "multa": 1.0}]},
+    },
+    "segunda": {"jornadas": [], "capitanes": {1.5: [{"team_name": "Gamma", "capitan": "Koke"}]}, "sanciones": {}, "violaciones": {}},
+}
+
+def test_libro_en_modo_solo_escritura(tmp_path):
+    ruta = tmp_path / "analitica.xlsx"
+    generar_libro_analitico(DATOS, {"primera": "Primera", "segunda": "Segunda"}, str(ruta))
+    workbook = openpyxl.load_workbook(ruta)
+    hojas = {sheet.title: [list(fila) for fila in sheet.iter_rows(values_only=True)] for sheet in workbook.worksheets}
+
+    assert list(hojas) == ["Multas por jornada", "Capitanes", "Sanciones", "Alineaciones indebidas"]
+    assert hojas["Multas por jornada"] == [
+        CABECERA_MULTAS,
+        ["Primera", 1, "Alfa", 0, 0, 0, 1, 0, 0, 1, 2],
+        ["Primera", 1, "Beta", 1.5, 0, 0, 0, 0, 0, 0, 1.5],
+    ]
+    assert hojas["Capitanes"] == [CABECERA_CAPITANES, ["Primera", 1, "Alfa", "Vini"], ["Primera", 2, "Alfa", "Pedri"], ["Segunda", 1.5, "Gamma", "Koke"]]
+    assert hojas["Sanciones"] == [CABECERA_SANCIONES, ["Primera", "Alfa", "Vini", 4, 1, 1, "completed", 5]]
+    assert hojas["Alineaciones indebidas"] == [CABECERA_INDEBIDAS, ["Primera", 6, "Alfa", "Vini", 1]]
+    assert workbook["Sanciones"]["A1"].font.bold and workbook["Sanciones"].freeze_panes == "A2"
+    assert [p.name for p in tmp_path.iterdir()] == ["analitica.xlsx"]
@@ -0,0 +1,27 @@
+import pytest
+
+import configuracion
+from liga_sintetica import crear_liga, preparar_divisiones_sinteticas, retirar_bloqueos, usar_divisiones
+from persistencia import bloqueo_archivo, guardar_json
+
+def test_las_divisiones_sinteticas_no_quedan_en_la_configuracion(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    originales = dict(configuracion.DIVISIONES)
+    sinteticas = preparar_divisiones_sinteticas([crear_liga("L1", 4, 2), crear_liga("L2", 6, 2)], "libro.xlsx")
+    assert list(sinteticas) == ["liga_L1", "liga_L2"]
+    assert configuracion.DIVISIONES == originales
+
+    with pytest.raises(RuntimeError):
+        with usar_divisiones(sinteticas) as divisiones:
+            assert divisiones == ["liga_L1", "liga_L2"]
+            assert configuracion.DIVISIONES == sinteticas
+            raise RuntimeError("fallo en una etapa")
+    assert configuracion.DIVISIONES == originales
+
+def test_retirar_bloqueos_deja_solo_los_artefactos(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for ruta in ("sanciones.json", "cache/liga_L1/multas.json"):
+        with bloqueo_archivo(ruta):
+            guardar_json({}, ruta)
+    retirar_bloqueos(".")
+    assert sorted(p.relative_to(tmp_path).as_posix() for p in tmp_path.rglob("*") if p.is_file()) == ["cache/liga_L1/multas.json", "sanciones.json"]
@@ -0,0 +1,59 @@
+import json
+
+from alineaciones_bits import indice_jugadores, mascara_alineacion
+from liga_sintetica import crear_liga, rondas_liga
+from multas import calcular_indicadores_jornada, iterar_multas_jornadas, procesar_historico_jornadas
+
+def _entradas():
+    alineaciones = {
+        "A": [{"name": "Uno"}, {"name": "Dos"}, {"name": "Tres"}],
+        "B": [{"name": "Dos"}, {"name": "Tres"}, {"name": "Cuatro"}],
+    }
+    return {
+        "teams_in_round": ["A", "B"],
+        "matches": [{"p": [1, 2]}],
+        "team_map_name": {1: "A", 2: "B"},
+        "dict_alineaciones": alineaciones,
+        "dict_capitanes": {"A": "Dos", "B": "Cuatro"},
+        "lista_peores_equipos": [{"equipo": "B", "posicion": 1}],
+        "peores_jugadores_final": [{"nombre": "Uno"}],
+        "peores_capitanes_final": [{"nombre": "Cuatro"}],
+    }
+
+def test_mascaras_sin_indice_se_recalculan():
+    entradas = _entradas()
+    esperado = calcular_indicadores_jornada(**entradas)
+    # Máscaras de otro índice (con los bits en otro orden): sin su índice no pueden usarse tal cual.
+    otro_indice = indice_jugadores()
+    mascara_alineacion(otro_indice, [{"name": "Cuatro"}, {"name": "Tres"}, {"name": "Dos"}, {"name": "Uno"}])
+    mascaras = {equipo: mascara_alineacion(otro_indice, lineup) for equipo, lineup in entradas["dict_alineaciones"].items()}
+
+    assert calcular_indicadores_jornada(**entradas, mascaras_alineaciones=mascaras) == esperado
+    assert calcular_indicadores_jornada(**entradas, indice=otro_indice, mascaras_alineaciones=mascaras) == esperado
+    assert esperado["A"]["jugadores_repetidos"] == 1
+    assert esperado["A"]["alinear_peor_jugador"] and esperado["B"]["elegir_peor_capitan"]
+
+def test_multas_en_flujo_iguales_que_con_todas_las_rondas(tmp_path, monkeypatch):
+    # Escribe resultados/jornada_*.json en el directorio de trabajo.
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "resultados").mkdir()
+    liga = crear_liga("T", equipos=10, jornadas=6, aplazadas=1, semilla=3)
+    rondas = rondas_liga(liga)
+    name_map = {equipo["name"]: equipo["name"] for equipo in liga["equipos"]}
+    esperado, totales = procesar_historico_jornadas(rondas, name_map, "prueba")
+
+    # El generador pide cada ronda justo antes de devolver sus multas: nunca tiene más de una en curso.
+    pedidas = []
+    def flujo():
+        for numero in sorted(rondas):
+            pedidas.append(numero)
+            yield numero, json.loads(json.dumps(rondas[numero]))
+
+    jornadas = []
+    for jornada in iterar_multas_jornadas(flujo(), name_map, "prueba"):
+        assert pedidas[-1] == jornada["numero"]
+        jornadas.append(jornada)
+    assert json.loads(json.dumps(jornadas)) == json.loads(json.dumps(esperado))
+    assert [j["numero"] for j in jornadas] == sorted(rondas)
+    assert totales == {equipo: sum(j["multas"].get(equipo, {}).get("multa_total", 0.0) for j in jornadas) for equipo in totales}
+    assert any(totales.values())
@@ -0,0 +1,80 @@
+import openpyxl
+import pytest
+
+import etapas
+import onedrive
+from hoja_excel import calcular_rangos_modificados, cargar_libro_desde_valores, valores_libro
+from servidor_simulado import iniciar_servidor_graph
+
+@pytest.fixture
+def graph(tmp_path, monkeypatch):
+    # Libro con una hoja de 30x3 celdas (y la de capitanes que lee la etapa) servido por el simulador de Graph.
+    ruta = tmp_path / "libro.xlsx"
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Hoja"
+    for fila in range(1, 31):
+        for columna in range(1, 4):
+            sheet.cell(row=fila, column=columna).value = fila * 10 + columna
+    workbook.create_sheet("Capitanes")
+    workbook.save(ruta)
+    servidor, estado, endpoint = iniciar_servidor_graph(str(ruta))
+    monkeypatch.setattr(onedrive, "GRAPH_API_ENDPOINT", endpoint)
+    monkeypatch.setenv("GRAPH_ACCESS_TOKEN", "token-simulado")
+    yield ruta, estado
+    servidor.shutdown()
+    servidor.server_close()
+
+def _leer_hoja(ruta):
+    sheet = openpyxl.load_workbook(ruta)["Hoja"]
+    return {(cell.row, cell.column): cell.value for row in sheet.iter_rows() for cell in row if cell.value is not None}
+
+def test_rangos_minimos_y_celdas_borradas():
+    workbook = cargar_libro_desde_valores({"Hoja": ("Hoja!B2:D4", [[1, 2, 3], [4, 5, 6], [7, 8, 9]])})
+    previos = valores_libro(workbook)
+    sheet = workbook["Hoja"]
+    sheet["B2"], sheet["C2"], sheet["B3"], sheet["C3"] = "a", "b", "c", "d"
+    sheet["D4"] = None
+    sheet["F6"] = "nueva"
+
+    assert calcular_rangos_modificados(previos, workbook) == [
+        ("Hoja", "B2:C3", [["a", "b"], ["c", "d"]]),
+        ("Hoja", "D4:D4", [[""]]),
+        ("Hoja", "F6:F6", [["nueva"]]),
+    ]
+
+def test_escritura_por_lotes_contra_el_simulador(graph):
+    ruta, estado = graph
+    session_id = onedrive.crear_sesion_libro("token-simulado", "drive", "item")
+    direccion, valores = onedrive.leer_rango_usado("token-simulado", "drive", "item", session_id, "Hoja")
+    workbook = cargar_libro_desde_valores({"Hoja": (direccion, valores)})
+    previos = valores_libro(workbook)
+    # 25 celdas no contiguas (filas alternas de la columna A) y una celda borrada.
+    for fila in range(1, 30, 2):
+        workbook["Hoja"].cell(row=fila, column=1).value = -fila
+    for fila in range(2, 22, 2):
+        workbook["Hoja"].cell(row=fila, column=3).value = -fila
+    workbook["Hoja"]["B30"] = None
+    rangos = calcular_rangos_modificados(previos, workbook)
+    assert len(rangos) > onedrive.MAX_PETICIONES_LOTE
+
+    peticiones = estado["trafico"]["peticiones"]
+    onedrive.escribir_rangos_por_lotes("token-simulado", "drive", "item", session_id, rangos)
+    assert estado["trafico"]["peticiones"] - peticiones == -(-len(rangos) // onedrive.MAX_PETICIONES_LOTE)
+    onedrive.cerrar_sesion_libro("token-simulado", "drive", "item", session_id)
+
+    assert _leer_hoja(ruta) == valores_libro(workbook)["Hoja"]
+    assert (30, 2) not in _leer_hoja(ruta)
+    assert not estado["sesiones"]
+
+def test_la_sesion_se_cierra_si_falla_la_escritura(graph, monkeypatch):
+    ruta, estado = graph
+    # Una hoja que no existe en el libro remoto hace que Graph rechace el lote.
+    monkeypatch.setattr(etapas, "_actualizar_libro", lambda workbook, datos, filtro: workbook.create_sheet("Inexistente").cell(row=1, column=1, value="x"))
+    monkeypatch.setattr(etapas, "DIVISIONES", {})
+    original = _leer_hoja(ruta)
+
+    with pytest.raises(Exception, match="rechazó"):
+        etapas._etapa_excel_rangos({}, None)
+    assert not estado["sesiones"]
+    assert _leer_hoja(ruta) == original
@@ -0,0 +1,65 @@
+import json
+import time
+
+import pytest
+
+from perfilado import frames_calientes, muestrear, perfil_speedscope, perfilar_etapa, pilas_colapsadas
+
+RAIZ = ("main", "fuentmondo.py", 10)
+MULTAS = ("etapa_multas", "etapas.py", 20)
+CALCULO = ("calcular;multas", "multas.py", 30)
+MUESTRAS = [((RAIZ, MULTAS, CALCULO), 0.005), ((RAIZ, MULTAS), 0.004), ((RAIZ, MULTAS, CALCULO), 0.006)]
+
+def test_pilas_colapsadas():
+    assert pilas_colapsadas(MUESTRAS) == [
+        "main (fuentmondo.py:10);etapa_multas (etapas.py:20) 1",
+        # El ';' separa frames: dentro de un nombre se sustituye.
+        "main (fuentmondo.py:10);etapa_multas (etapas.py:20);calcular,multas (multas.py:30) 2",
+    ]
+
+def test_perfil_speedscope():
+    perfil = perfil_speedscope("fines", MUESTRAS, 0.0151234)
+    assert perfil["shared"]["frames"] == [
+        {"name": "main", "file": "fuentmondo.py", "line": 10},
+        {"name": "etapa_multas", "file": "etapas.py", "line": 20},
+        {"name": "calcular;multas", "file": "multas.py", "line": 30},
+    ]
+    muestreado = perfil["profiles"][0]
+    assert muestreado["samples"] == [[0, 1, 2], [0, 1], [0, 1, 2]]
+    assert muestreado["weights"] == [0.005, 0.004, 0.006]
+    assert (muestreado["type"], muestreado["unit"], muestreado["endValue"]) == ("sampled", "seconds", 0.015123)
+
+def test_frames_calientes():
+    calientes = frames_calientes(MUESTRAS, 2)
+    assert calientes["propio"] == [
+        {"frame": "calcular;multas (multas.py:30)", "muestras": 2, "porcentaje": 66.7},
+        {"frame": "etapa_multas (etapas.py:20)", "muestras": 1, "porcentaje": 33.3},
+    ]
+    assert [e["muestras"] for e in calientes["total"]] == [3, 3]
+
+def _etapa_lenta():
+    fin = time.perf_counter() + 0.1
+    while time.perf_counter() < fin:
+        pass
+
+def test_muestrear_ve_la_funcion_y_conserva_las_muestras_si_falla():
+    muestras = []
+    muestrear(_etapa_lenta, muestras, intervalo=0.002)
+    # La pila se corta en muestrear; como mucho la última muestra puede caer ya en la espera al hilo de muestreo.
+    assert muestras and sum(pila[0][0] != "_etapa_lenta" for pila, _ in muestras) <= 1
+
+    def falla():
+        _etapa_lenta()
+        raise RuntimeError("fallo")
+
+    muestras = []
+    with pytest.raises(RuntimeError):
+        muestrear(falla, muestras, intervalo=0.002)
+    assert muestras
+
+def test_perfilar_etapa_guarda_los_perfiles(tmp_path):
+    perfilar_etapa(_etapa_lenta, str(tmp_path))()
+    assert {p.name for p in tmp_path.iterdir()} == {"_etapa_lenta.collapsed", "_etapa_lenta.speedscope.json", "resumen.json"}
+    resumen = json.loads((tmp_path / "resumen.json").read_text(encoding='utf-8'))
+    assert resumen["_etapa_lenta"]["muestras"] > 0
+    assert json.loads((tmp_path / "_etapa_lenta.speedscope.json").read_text(encoding='utf-8'))["name"] == "_etapa_lenta"
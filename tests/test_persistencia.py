@@ -0,0 +1,52 @@
+import threading
+import time
+
+import pytest
+
+from persistencia import bloqueo_archivo, escribir_atomico_con
+
+def test_bloqueo_anidado_en_un_hilo(tmp_path):
+    ruta = str(tmp_path / "datos.json")
+    with bloqueo_archivo(ruta), bloqueo_archivo(ruta):
+        pass
+
+def test_bloqueo_excluye_a_otros_hilos(tmp_path):
+    ruta = str(tmp_path / "datos.json")
+    dentro = []
+    solapes = []
+    errores = []
+
+    def trabajar():
+        try:
+            for _ in range(20):
+                with bloqueo_archivo(ruta):
+                    with bloqueo_archivo(ruta):
+                        dentro.append(1)
+                        if len(dentro) > 1:
+                            solapes.append(len(dentro))
+                        time.sleep(0.001)
+                        dentro.pop()
+        except Exception as e:
+            errores.append(e)
+
+    hilos = [threading.Thread(target=trabajar) for _ in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert not errores
+    assert not solapes
+
+def test_escritura_atomica_con_escritor(tmp_path):
+    ruta = tmp_path / "libro.xlsx"
+    escribir_atomico_con(lambda f: f.write(b"primera"), str(ruta))
+    assert ruta.read_bytes() == b"primera"
+
+    def escritor_que_falla(f):
+        f.write(b"a medias")
+        raise RuntimeError("fallo al guardar")
+
+    with pytest.raises(RuntimeError):
+        escribir_atomico_con(escritor_que_falla, str(ruta))
+    assert ruta.read_bytes() == b"primera"
+    assert [p.name for p in tmp_path.iterdir()] == ["libro.xlsx"]
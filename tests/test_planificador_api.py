@@ -0,0 +1,82 @@
+import threading
+
+import planificador_api
+from planificador_api import FACTOR_FRENADA, crear_planificador, ejecutar_peticiones
+
+class ErrorSimulado(Exception):
+    def __init__(self, espera, limitado):
+        super().__init__("error simulado")
+        self.espera, self.limitado = espera, limitado
+
+# Ejecuta una única petición que falla una vez con el error indicado y devuelve el cubo de su endpoint.
+def _cubo_tras_un_error(espera, limitado):
+    planificador = crear_planificador(tasa=10.0)
+    fallos = [ErrorSimulado(espera, limitado)]
+
+    def peticion(url):
+        if fallos:
+            raise fallos.pop()
+        return url
+
+    resultados, errores = ejecutar_peticiones(planificador, peticion, [("http://api/ronda",)], lambda e: (True, e.espera, e.limitado))
+    assert resultados == ["http://api/ronda"] and not errores
+    return planificador, planificador["cubos"]["/ronda"]
+
+def test_un_429_sin_retry_after_reduce_el_ritmo():
+    planificador, cubo = _cubo_tras_un_error(None, True)
+    assert planificador["contadores"]["frenadas"] == 1
+    assert cubo["pausa_hasta"] == 0.0
+    # La respuesta correcta posterior recupera INCREMENTO_TASA, sin pasar del máximo.
+    assert cubo["tasa"] == min(10.0, 10.0 * FACTOR_FRENADA + 1.0)
+
+def test_un_429_con_retry_after_reduce_el_ritmo_y_pausa():
+    planificador, cubo = _cubo_tras_un_error(0.01, True)
+    assert planificador["contadores"]["frenadas"] == 1
+    assert cubo["pausa_hasta"] > 0.0
+
+def test_retry_after_sin_429_solo_pausa():
+    planificador, cubo = _cubo_tras_un_error(0.01, False)
+    assert planificador["contadores"]["frenadas"] == 0
+    assert cubo["pausa_hasta"] > 0.0
+
+# Ejecuta las tareas en otro hilo y falla (en lugar de colgarse) si los trabajadores no terminan.
+def _ejecutar_con_limite(planificador, peticion, tareas, reintentable):
+    salida = []
+    hilo = threading.Thread(target=lambda: salida.append(ejecutar_peticiones(planificador, peticion, tareas, reintentable)), daemon=True)
+    hilo.start()
+    hilo.join(10)
+    assert not hilo.is_alive(), "los trabajadores se quedaron esperando"
+    return salida[0]
+
+def test_un_clasificador_que_falla_da_el_error_por_definitivo():
+    planificador = crear_planificador(tasa=100.0, concurrencia=3, maximo=3)
+    tareas = [(f"http://api/ronda/{n}",) for n in range(6)]
+
+    def peticion(url):
+        if url.endswith("/2"):
+            raise ErrorSimulado(None, False)
+        return url
+
+    def reintentable(e):
+        raise ValueError("clasificador roto")
+
+    resultados, errores = _ejecutar_con_limite(planificador, peticion, tareas, reintentable)
+    assert list(errores) == [2] and isinstance(errores[2], ErrorSimulado)
+    assert resultados == [url if n != 2 else None for n, (url,) in enumerate(tareas)]
+    assert planificador["contadores"]["fallidas"] == 1
+
+def test_un_fallo_al_liberar_el_hueco_no_cuelga_a_los_demas(monkeypatch):
+    planificador = crear_planificador(tasa=100.0, concurrencia=3, maximo=3)
+    tareas = [(f"http://api/ronda/{n}",) for n in range(6)]
+    salir = planificador_api._salir
+    fallos = [RuntimeError("fallo al salir")]
+
+    def salir_con_fallo(*args):
+        salir(*args)
+        if fallos:
+            raise fallos.pop()
+
+    monkeypatch.setattr(planificador_api, "_salir", salir_con_fallo)
+    resultados, errores = _ejecutar_con_limite(planificador, lambda url: url, tareas, lambda e: (False, None, False))
+    assert len(errores) == 1 and isinstance(next(iter(errores.values())), RuntimeError)
+    assert sum(resultado is not None for resultado in resultados) == len(tareas) - 1
@@ -0,0 +1,69 @@
+import threading
+
+import numpy as np
+
+from proyeccion import TAMANO_LOTE, _contexto_procesos, _simular_bloque, preparar_datos_proyeccion, proyectar_clasificacion, resumir_proyeccion
+
+def _datos(jornadas_restantes=3):
+    return {
+        "equipos": ["A", "B", "C", "D"],
+        "puntos": np.array([9.0, 6.0, 3.0, 0.0]),
+        "puntos_generales": np.array([200.0, 180.0, 150.0, 120.0]),
+        "historico": np.array([[60.0, 70.0, 65.0], [55.0, 50.0, 60.0], [40.0, 45.0, 50.0], [30.0, 35.0, 40.0]]),
+        "n_historico": np.array([3, 3, 3, 3]),
+        "jornadas_restantes": jornadas_restantes,
+    }
+
+def test_los_procesos_no_se_crean_con_fork():
+    assert _contexto_procesos().get_start_method() in ("forkserver", "spawn")
+
+def test_proyeccion_en_varios_procesos_desde_un_hilo():
+    # Como en el grafo de etapas: la proyección se lanza desde un hilo mientras otro tiene tomado un cerrojo.
+    datos, simulaciones = _datos(), 2 * TAMANO_LOTE
+    cerrojo, resultado = threading.Lock(), {}
+    with cerrojo:
+        hilo = threading.Thread(target=lambda: resultado.update(p=proyectar_clasificacion(datos, simulaciones, procesos=2, semilla=3)))
+        hilo.start()
+        hilo.join(timeout=120)
+    assert not hilo.is_alive()
+
+    semillas = np.random.SeedSequence(3).spawn(2)
+    esperado = (_simular_bloque((datos, TAMANO_LOTE, semillas[0])) + _simular_bloque((datos, TAMANO_LOTE, semillas[1]))) / simulaciones
+    np.testing.assert_array_equal(resultado["p"], esperado)
+
+def test_semilla_fija_reproducible_y_probabilidades_completas():
+    datos = _datos()
+    probabilidades = proyectar_clasificacion(datos, 5000, procesos=1, semilla=7)
+    np.testing.assert_array_equal(probabilidades, proyectar_clasificacion(datos, 5000, procesos=1, semilla=7))
+    assert not np.array_equal(probabilidades, proyectar_clasificacion(datos, 5000, procesos=1, semilla=8))
+    np.testing.assert_allclose(probabilidades.sum(axis=0), 1.0)
+    np.testing.assert_allclose(probabilidades.sum(axis=1), 1.0)
+
+def test_sin_jornadas_restantes_queda_la_clasificacion_actual():
+    # B y C empatan a puntos: decide el mayor número de puntos generales, como en la clasificación real.
+    datos = dict(_datos(jornadas_restantes=0), puntos=np.array([9.0, 3.0, 3.0, 0.0]), puntos_generales=np.array([200.0, 150.0, 180.0, 120.0]))
+    probabilidades = proyectar_clasificacion(datos, 100, procesos=1, semilla=0)
+    np.testing.assert_array_equal(probabilidades, np.eye(4)[[0, 2, 1, 3]])
+
+    resumen = resumir_proyeccion(datos, probabilidades, 100, plazas_descenso=2)
+    assert [e["name"] for e in resumen["equipos"]] == ["A", "C", "B", "D"]
+    assert [(e["campeon"], e["descenso"], e["colista"]) for e in resumen["equipos"]] == [(1.0, 0.0, 0.0), (0.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 1.0, 1.0)]
+
+def test_un_lider_inalcanzable_es_campeon_seguro():
+    # Con tres jornadas, nadie recupera más de 9 puntos.
+    datos = dict(_datos(), puntos=np.array([10.0, 0.0, 0.0, 0.0]))
+    probabilidades = proyectar_clasificacion(datos, 2000, procesos=1, semilla=1)
+    assert probabilidades[0, 0] == 1.0
+
+def test_datos_de_la_proyeccion_desde_las_rondas():
+    ronda = {"answer": {"ranking": [{"name": "a"}, {"name": "B"}], "matches": [{"p": [1, 2], "m": [70, 50]}]}}
+    rondas = {1: {"datos": ronda}, 2: {"datos": ronda}, 2.5: {"datos": ronda}}
+    clasificacion = [{"name": "A", "points": 9, "general_points": 210.0}, {"name": "B", "points": 0, "general_points": 150.0}, {"name": "C", "points": 0, "general_points": 0.0}]
+    datos = preparar_datos_proyeccion(rondas, {"a": "A"}, clasificacion, jornadas_temporada=5)
+
+    assert datos["equipos"] == ["A", "B", "C"]
+    assert datos["jornadas_restantes"] == 3
+    np.testing.assert_array_equal(datos["n_historico"], [3, 3, 6])
+    # C no ha jugado: se simula con el histórico de toda la división.
+    np.testing.assert_array_equal(datos["historico"][2], [70.0, 70.0, 70.0, 50.0, 50.0, 50.0])
+    np.testing.assert_array_equal(datos["historico"][0, :3], [70.0, 70.0, 70.0])
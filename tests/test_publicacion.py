@@ -0,0 +1,46 @@
+import shutil
+import subprocess
+
+import pytest
+
+from publicacion import MANIFIESTO_PUBLICACION, publicar_artefactos
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git no está instalado")
+
+def _git(*args):
+    return subprocess.run(["git", *args], check=True, capture_output=True, text=True).stdout
+
+def _arbol_remoto(remoto):
+    return sorted(_git(f"--git-dir={remoto}", "ls-tree", "-r", "--name-only", "main").split())
+
+def _escribir(ruta, contenido):
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    ruta.write_text(contenido, encoding='utf-8')
+
+def test_publica_en_un_remoto_bare(tmp_path, monkeypatch):
+    remoto = tmp_path / "remoto.git"
+    trabajo = tmp_path / "trabajo"
+    _git("init", "--quiet", "--bare", str(remoto))
+    _git("init", "--quiet", "-b", "main", str(trabajo))
+    monkeypatch.chdir(trabajo)
+
+    _escribir(trabajo / "index.html", "<html>1</html>")
+    _escribir(trabajo / "recursos" / "navegacion.aaaa.js", "uno()")
+    assert publicar_artefactos(["index.html", "recursos/navegacion.aaaa.js"], str(remoto))
+    assert _arbol_remoto(remoto) == ["index.html", "recursos/navegacion.aaaa.js"]
+
+    # Sin cambios no se crea ningún commit.
+    commit = _git(f"--git-dir={remoto}", "rev-parse", "main")
+    assert not publicar_artefactos(["index.html", "recursos/navegacion.aaaa.js"], str(remoto))
+    assert _git(f"--git-dir={remoto}", "rev-parse", "main") == commit
+
+    # El script con huella nueva sustituye al anterior, que se borra del árbol publicado.
+    (trabajo / "recursos" / "navegacion.aaaa.js").unlink()
+    _escribir(trabajo / "recursos" / "navegacion.bbbb.js", "dos()")
+    assert publicar_artefactos(["index.html", "recursos/navegacion.bbbb.js"], str(remoto))
+    assert _arbol_remoto(remoto) == ["index.html", "recursos/navegacion.bbbb.js"]
+    assert _git(f"--git-dir={remoto}", "show", "main:index.html") == "<html>1</html>"
+
+    # El manifiesto queda dentro de .git, no en el árbol de trabajo, y el índice sigue al commit publicado.
+    assert (trabajo / ".git" / MANIFIESTO_PUBLICACION).exists()
+    assert _git("status", "--porcelain") == ""
@@ -0,0 +1,34 @@
+from elegibilidad import SANCIONADO, SIN_CAPITANIA, indice_vacio, recalcular_indice
+from liga_sintetica import crear_liga, rondas_liga
+from multas import construir_reglas, procesar_sanciones_y_capitanes
+from simulador import preparar_datos_temporada, simular_variantes
+
+def _motor(rondas, name_map):
+    return procesar_sanciones_y_capitanes(sorted(rondas.items()), name_map, "prueba", {})
+
+def test_simulador_coincide_con_el_motor_con_jornadas_aplazadas():
+    liga = crear_liga("T", equipos=12, jornadas=16, aplazadas=3, semilla=7)
+    assert any(numero % 1 for numero in liga["rondas"].values())
+    rondas = rondas_liga(liga)
+    name_map = {equipo["name"]: equipo["name"] for equipo in liga["equipos"]}
+
+    _, sanciones, _, violaciones = _motor(rondas, name_map)
+    simulado = simular_variantes({"prueba": preparar_datos_temporada(rondas, name_map)}, [construir_reglas()], procesos=1)[0]["divisiones"]["prueba"]
+
+    sanciones_reales = {equipo: sum(map(len, jugadores.values())) for equipo, jugadores in sanciones.items() if any(jugadores.values())}
+    indebidas_reales = {equipo: len(lista) for equipo, lista in violaciones.items() if lista}
+    assert sanciones_reales
+    assert indebidas_reales
+    assert simulado["sanciones"] == sanciones_reales
+    assert simulado["alineaciones_indebidas"] == indebidas_reales
+
+def test_elegibilidad_usa_las_posiciones_del_calendario():
+    reglas = construir_reglas()
+    calendario = [1, 2, 2.5, 3, 4]
+    sancion = {"jornada_triggered": 2, "status": "active", "games_to_serve": 3}
+    # La sanción de la jornada 2 (posición 1) cubre las posiciones 2-4: las jornadas 2.5, 3 y 4; la próxima (5) ya es sin capitanía.
+    indice = recalcular_indice(indice_vacio(), {"Equipo": {"Jugador": [sancion]}}, 5, calendario, reglas)
+    assert indice["equipos"]["Equipo"]["Jugador"] == {"estado": SIN_CAPITANIA, "hasta": 7}
+
+    indice = recalcular_indice(indice_vacio(), {"Equipo": {"Jugador": [sancion]}}, 3, calendario, reglas)
+    assert indice["equipos"]["Equipo"]["Jugador"] == {"estado": SANCIONADO, "hasta": 4}